@@ -0,0 +1,244 @@
+"""
+LLM密集型接口的准入控制模块。
+
+服务过载时尽早拒绝请求，而不是把工作继续堆到已饱和的LLM服务上：
+
+- 批量任务（简历筛选、综合分析）提交前检查后台队列深度，排队任务数达到上限时返回429。
+  各调用端点所有进程的LLM用量（进行中的请求数占批量可用额度的比例、本分钟请求数占RPM上限的比例）
+  接近上限时，排队的任务短时间内无法开始，队列上限降为 SATURATED_QUEUE_DEPTH。
+  Retry-After 按最近任务的平均耗时、排队任务数和LLM用量估算；
+- 交互接口（实时面试辅助）统计各进程同时进行中的请求数，达到上限时返回503。交互请求的LLM调用
+  走交互通道，优先放行并可使用限流器为其预留的并发额度（见 LLM_INTERACTIVE_RESERVED），
+  批量任务占满其余额度时不影响实时面试。
+
+进行中的请求数保存在数据库共享计数器中（见 counters，增减为原子的条件UPDATE，各进程共享），
+计数不可用时放行请求；交互请求的平均耗时保存在 Django 缓存中，仅用于估算 Retry-After。
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+
+from services.agents import get_config_list, llm_lane, LANE_INTERACTIVE
+from services.agents.llm_client import get_endpoint_id
+from services.agents.llm_config import get_rate_limit_config
+from services.agents.llm_limiter import get_shared_in_flight_key, get_shared_rpm_key
+from .counters import SharedCounterService
+from .exceptions import OverloadedException
+
+logger = logging.getLogger(__name__)
+
+
+def get_admission_setting(key: str, default: Any = None) -> Any:
+    """读取 settings.ADMISSION 中的配置项。"""
+    return getattr(settings, 'ADMISSION', {}).get(key, default)
+
+
+class AdmissionController:
+    """LLM密集型接口的准入控制器。"""
+    
+    KEY_PREFIX = 'admission'
+    
+    # 进行中请求计数的有效期（秒，每次加1时顺延），进程异常退出未归还的计数在无人使用后清零
+    COUNTER_TIMEOUT = 600
+    
+    # 估算任务耗时时参考的最近完成任务数
+    RECENT_JOBS = 20
+    
+    @classmethod
+    def admit_job(cls):
+        """
+        批量任务提交前的准入检查。
+        
+        异常:
+            OverloadedException: 等待中的任务数达到 MAX_QUEUE_DEPTH，或LLM用量达到
+                LLM_SATURATION_THRESHOLD 且等待中的任务数达到 SATURATED_QUEUE_DEPTH 时返回429
+        """
+        max_depth = get_admission_setting('MAX_QUEUE_DEPTH', 100)
+        if not max_depth:
+            return
+        saturated_depth = min(max_depth, get_admission_setting('SATURATED_QUEUE_DEPTH', 10))
+        depth = cls.get_queue_depth()
+        if depth < saturated_depth:
+            return
+        
+        saturation = cls.get_llm_saturation()
+        threshold = get_admission_setting('LLM_SATURATION_THRESHOLD', 0.9)
+        if threshold and saturation >= threshold:
+            limit = saturated_depth
+        else:
+            limit = max_depth
+        if depth < limit:
+            return
+        
+        estimated_wait = cls.estimate_queue_wait(depth, saturation)
+        logger.warning(
+            f"Job admission rejected: queue depth {depth} >= {limit}, LLM saturation {saturation:.2f}"
+        )
+        raise OverloadedException(
+            f"任务队列已满（{depth} 个任务等待中），请稍后重试",
+            retry_after=estimated_wait,
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            errors={
+                'queue_depth': depth,
+                'llm_saturation': round(saturation, 2),
+                'estimated_wait': round(estimated_wait),
+            }
+        )
+    
+    @classmethod
+    def get_queue_depth(cls) -> int:
+        """等待执行的后台任务数（不含回调推送）。"""
+        from apps.task_queue.models import BackgroundJob
+        from apps.task_queue.webhooks import WEBHOOK_JOB_HANDLER
+        
+        return BackgroundJob.objects.filter(
+            status=BackgroundJob.Status.PENDING
+        ).exclude(handler=WEBHOOK_JOB_HANDLER).count()
+    
+    @classmethod
+    def get_llm_saturation(cls) -> float:
+        """
+        各调用端点所有进程合计的LLM用量比例：进行中的请求数 ÷ 批量通道可用额度
+        （LLM_SHARED_MAX_CONCURRENCY - LLM_INTERACTIVE_RESERVED）、本分钟请求数 ÷ LLM_RPM_LIMIT，取较大值。
+        
+        多个端点按合计用量与合计额度计算（路由会把请求分散到空闲端点）；未配置对应上限或计数不可用时返回0。
+        """
+        config = get_rate_limit_config()
+        shared = config['shared_concurrency']
+        bulk_capacity = max(1, shared - config['reserved']) if shared else 0
+        rpm = config['rpm']
+        if not bulk_capacity and not rpm:
+            return 0.0
+        
+        try:
+            endpoints = {get_endpoint_id(item['base_url'], item['api_key']) for item in get_config_list()}
+            saturation = 0.0
+            if bulk_capacity:
+                in_flight = sum(SharedCounterService.get(get_shared_in_flight_key(e)) for e in endpoints)
+                saturation = in_flight / (bulk_capacity * len(endpoints))
+            if rpm:
+                requests = sum(SharedCounterService.get(get_shared_rpm_key(e)) for e in endpoints)
+                saturation = max(saturation, requests / (rpm * len(endpoints)))
+        except Exception as e:
+            logger.warning(f"LLM saturation unavailable: {e}")
+            return 0.0
+        return saturation
+    
+    @classmethod
+    def estimate_queue_wait(cls, depth: int, saturation: float = 0.0) -> float:
+        """
+        估算新任务的等待时间（秒）：
+        (排队任务数 ÷ 单个工作进程的并发任务数 + LLM用量比例) × 最近任务平均耗时。
+        
+        LLM额度被占满时执行中的任务需要先结束，新任务至少还要多等一个任务的耗时。
+        没有已完成任务时按 DEFAULT_JOB_SECONDS 估算。
+        """
+        from apps.task_queue.models import BackgroundJob
+        from apps.task_queue.webhooks import WEBHOOK_JOB_HANDLER
+        
+        recent = list(BackgroundJob.objects.filter(
+            status=BackgroundJob.Status.COMPLETED, started_at__isnull=False, finished_at__isnull=False
+        ).exclude(handler=WEBHOOK_JOB_HANDLER).order_by('-finished_at').values_list(
+            'started_at', 'finished_at'
+        )[:cls.RECENT_JOBS])
+        if recent:
+            seconds = sum((finished - started).total_seconds() for started, finished in recent) / len(recent)
+        else:
+            seconds = get_admission_setting('DEFAULT_JOB_SECONDS', 60)
+        workers = max(1, getattr(settings, 'TASK_QUEUE', {}).get('CONCURRENCY', 4))
+        return (depth / workers + min(saturation, 1.0)) * seconds
+    
+    @classmethod
+    @contextmanager
+    def interactive(cls):
+        """
+        在交互通道内处理一次交互请求。
+        
+        异常:
+            OverloadedException: 进行中的交互请求数达到 MAX_INTERACTIVE_IN_FLIGHT 时返回503
+        """
+        limit = get_admission_setting('MAX_INTERACTIVE_IN_FLIGHT', 16)
+        key = f"{cls.KEY_PREFIX}:interactive:in_flight"
+        acquired = cls._acquire(key, limit) if limit else False
+        if acquired is None:
+            in_flight = cls._get_count(key)
+            estimated_wait = cls.get_interactive_latency()
+            logger.warning(f"Interactive admission rejected: {in_flight} requests in flight")
+            raise OverloadedException(
+                "AI服务繁忙，请稍后重试",
+                retry_after=estimated_wait,
+                errors={'in_flight': in_flight, 'estimated_wait': round(estimated_wait)}
+            )
+        try:
+            started = time.monotonic()
+            with llm_lane(LANE_INTERACTIVE):
+                yield
+            cls._record_interactive_latency(time.monotonic() - started)
+        finally:
+            if acquired:
+                cls._release(key)
+    
+    @classmethod
+    def get_interactive_latency(cls) -> float:
+        """最近交互请求的平均耗时（秒，指数移动平均），作为预计等待时间。"""
+        try:
+            latency = cache.get(f"{cls.KEY_PREFIX}:interactive:latency")
+        except Exception:
+            latency = None
+        return latency or get_admission_setting('DEFAULT_INTERACTIVE_SECONDS', 10)
+    
+    @classmethod
+    def _record_interactive_latency(cls, seconds: float):
+        """更新交互请求耗时的指数移动平均。"""
+        previous = cls.get_interactive_latency()
+        try:
+            cache.set(f"{cls.KEY_PREFIX}:interactive:latency", previous * 0.8 + seconds * 0.2, None)
+        except Exception as e:
+            logger.warning(f"Failed to record interactive latency: {e}")
+    
+    @classmethod
+    def _acquire(cls, key: str, limit: int):
+        """
+        进行中计数加1（未达到上限时）。
+        
+        返回:
+            True 表示已计数；None 表示已达到上限；False 表示计数不可用（放行但不计数）
+        """
+        try:
+            return True if SharedCounterService.acquire(key, limit, cls.COUNTER_TIMEOUT) else None
+        except Exception as e:
+            logger.warning(f"Admission counter unavailable: {e}")
+            return False
+    
+    @classmethod
+    def _release(cls, key: str):
+        """进行中计数减1。"""
+        try:
+            SharedCounterService.release(key)
+        except Exception as e:
+            logger.warning(f"Admission counter release failed: {e}")
+    
+    @classmethod
+    def _get_count(cls, key: str) -> int:
+        """读取进行中计数，计数不可用时返回0。"""
+        try:
+            return SharedCounterService.get(key)
+        except Exception:
+            return 0
+
+
+class InteractiveAdmissionMixin:
+    """
+    交互接口视图的准入控制混入类。
+    
+    POST 请求经过交互准入检查，并在交互通道内调用LLM；需放在 SafeAPIView 之前。
+    """
+    
+    def post(self, request, *args, **kwargs):
+        with AdmissionController.interactive():
+            return super().post(request, *args, **kwargs)
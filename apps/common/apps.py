@@ -5,3 +5,10 @@ class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.common'
     verbose_name = '公共模块'
+
+    def ready(self):
+        # LLM限流器按端点统计所有进程进行中的请求数，计数保存在数据库中
+        from services.agents.llm_limiter import set_shared_counter
+        from .counters import SharedCounterService
+
+        set_shared_counter(SharedCounterService)
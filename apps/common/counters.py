@@ -0,0 +1,74 @@
+"""
+跨进程共享计数器模块。
+
+计数保存在数据库 shared_counters 表中，增减均为带条件的单条UPDATE，在SQLite/MySQL/PostgreSQL上
+都是原子的，不依赖缓存后端（FileBasedCache 的 add/incr 不是原子操作）。用于统计各进程同时进行中的
+交互请求数和各调用端点进行中的LLM请求数（见 admission 与 services.agents.llm_limiter）。
+
+每个计数带有效期：进行中计数每次加1时顺延有效期，进程异常退出未归还的计数在无人使用一段时间后清零；
+固定窗口计数（如每分钟请求数）加1时不顺延，到期后从1重新计数。
+"""
+from datetime import timedelta
+from typing import Optional
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SharedCounter
+
+
+class SharedCounterService:
+    """共享计数器服务类。"""
+
+    # 默认有效期（秒）
+    DEFAULT_TTL = 600
+
+    @classmethod
+    def acquire(cls, key: str, limit: int = 0, ttl: int = None, refresh: bool = True) -> Optional[int]:
+        """
+        计数加1（未达到上限时）。
+
+        参数:
+            key: 计数键
+            limit: 上限，0表示不限制
+            ttl: 有效期（秒）
+            refresh: 是否顺延有效期（固定窗口计数传False）
+
+        返回:
+            加1后的计数值；已达到上限时返回None（计数不变）
+        """
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=ttl or cls.DEFAULT_TTL)
+        SharedCounter.objects.get_or_create(key=key, defaults={'value': 0, 'expires_at': expires_at})
+
+        # 已过期的计数从1重新开始
+        if SharedCounter.objects.filter(key=key, expires_at__lte=now).update(
+            value=1, expires_at=expires_at, updated_at=now
+        ):
+            return 1
+
+        queryset = SharedCounter.objects.filter(key=key, expires_at__gt=now)
+        if limit:
+            queryset = queryset.filter(value__lt=limit)
+        changes = {'value': F('value') + 1, 'updated_at': now}
+        if refresh:
+            changes['expires_at'] = expires_at
+        if not queryset.update(**changes):
+            return None
+        return cls.get(key)
+
+    @classmethod
+    def release(cls, key: str) -> None:
+        """计数减1（不会减到0以下，已过期的计数不变）。"""
+        now = timezone.now()
+        SharedCounter.objects.filter(key=key, value__gt=0, expires_at__gt=now).update(
+            value=F('value') - 1, updated_at=now
+        )
+
+    @classmethod
+    def get(cls, key: str) -> int:
+        """获取当前计数值，不存在或已过期时返回0。"""
+        value = SharedCounter.objects.filter(
+            key=key, expires_at__gt=timezone.now()
+        ).values_list('value', flat=True).first()
+        return value or 0
@@ -3,6 +3,7 @@ API自定义异常处理模块。
 提供统一的错误响应格式: {code, message, data}
 """
 import logging
+import math
 from rest_framework.views import exception_handler
 from rest_framework import status
 from django.core.exceptions import ValidationError as DjangoValidationError
@@ -17,6 +18,9 @@ class APIException(Exception):
     status_code = status.HTTP_400_BAD_REQUEST
     default_message = "API错误"
     
+    # 错误响应附带的响应头
+    headers = None
+    
     def __init__(self, message: str = None, errors: dict = None):
         self.message = message or self.default_message
         self.errors = errors
@@ -47,6 +51,19 @@ class LLMException(APIException):
     default_message = "AI服务暂时不可用"
 
 
+class OverloadedException(APIException):
+    """服务过载异常（准入控制拒绝请求），响应附带 Retry-After 头，errors 中为预计等待时间等信息。"""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_message = "服务繁忙，请稍后重试"
+    
+    def __init__(self, message: str = None, retry_after: float = 1, status_code: int = None, errors: dict = None):
+        super().__init__(message, errors)
+        if status_code:
+            self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.headers = {'Retry-After': str(self.retry_after)}
+
+
 def custom_exception_handler(exc, context):
     """
     DRF自定义异常处理器。
@@ -60,11 +77,14 @@ def custom_exception_handler(exc, context):
     
     # 处理自定义异常
     if isinstance(exc, APIException):
-        return ApiResponse.error(
+        response = ApiResponse.error(
             code=exc.status_code,
             message=exc.message,
             data=exc.errors
         )
+        for header, value in (exc.headers or {}).items():
+            response[header] = value
+        return response
     
     # 处理Django的Http404
     if isinstance(exc, Http404):
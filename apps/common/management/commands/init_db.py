@@ -22,6 +22,7 @@ class Command(BaseCommand):
         'video_analysis',
         'interview_assist',
         'final_recommend',
+        'task_queue',
     ]
 
     def add_arguments(self, parser):
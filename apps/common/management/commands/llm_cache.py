@@ -0,0 +1,40 @@
+"""
+LLM响应缓存管理命令。
+
+用法:
+    python manage.py llm_cache           # 查看缓存统计
+    python manage.py llm_cache --clear   # 清空缓存
+"""
+from django.core.management.base import BaseCommand
+
+from services.agents import get_llm_cache
+
+
+class Command(BaseCommand):
+    help = '查看或清空LLM响应缓存'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='清空所有缓存条目',
+        )
+
+    def handle(self, *args, **options):
+        cache = get_llm_cache()
+
+        if options.get('clear'):
+            deleted = cache.clear()
+            self.stdout.write(self.style.SUCCESS(f'✅ 已清空 {deleted} 条LLM响应缓存'))
+            return
+
+        stats = cache.stats()
+        self.stdout.write(f"缓存文件: {stats['path']}")
+        self.stdout.write(f"缓存条目: {stats['entries']}")
+        self.stdout.write(f"累计命中: {stats['total_hits']}")
+        for site, counter in stats['call_sites'].items():
+            total = counter['hits'] + counter['misses']
+            rate = counter['hits'] / total * 100 if total else 0
+            self.stdout.write(
+                f"  {site}: 命中 {counter['hits']} / 未命中 {counter['misses']}（命中率 {rate:.1f}%）"
+            )
@@ -0,0 +1,43 @@
+"""
+LLM分角色用量统计管理命令。
+
+用法:
+    python manage.py llm_usage           # 查看各角色的调用次数、耗时、token用量和费用
+    python manage.py llm_usage --clear   # 清空统计
+"""
+from django.core.management.base import BaseCommand
+
+from services.agents import get_llm_usage_stats
+
+
+class Command(BaseCommand):
+    help = '查看或清空LLM分角色用量统计'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='清空所有统计',
+        )
+
+    def handle(self, *args, **options):
+        stats = get_llm_usage_stats()
+
+        if options.get('clear'):
+            deleted = stats.clear()
+            self.stdout.write(self.style.SUCCESS(f'✅ 已清空 {deleted} 条LLM用量统计'))
+            return
+
+        rows = stats.stats()
+        self.stdout.write(f"统计文件: {stats.path}")
+        if not rows:
+            self.stdout.write("暂无统计数据")
+            return
+        for row in rows:
+            cost = f"{row['cost']:.4f}" if row['cost'] is not None else '未配置单价'
+            self.stdout.write(
+                f"  {row['role']} [{row['tier'] or '-'}] {row['model']}: "
+                f"调用 {row['calls']} 次（失败 {row['errors']}），"
+                f"平均耗时 {row['latency_avg']:.2f}s / 最长 {row['latency_max']:.2f}s，"
+                f"token 输入 {row['prompt_tokens']} / 输出 {row['completion_tokens']}，费用 {cost}"
+            )
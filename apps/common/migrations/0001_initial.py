@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SharedCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='计数键')),
+                ('value', models.IntegerField(default=0, verbose_name='计数值')),
+                ('expires_at', models.DateTimeField(verbose_name='到期时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '共享计数器',
+                'verbose_name_plural': '共享计数器',
+                'db_table': 'shared_counters',
+            },
+        ),
+    ]
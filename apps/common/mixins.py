@@ -2,10 +2,15 @@
 视图通用功能混入类模块。
 """
 import logging
+from typing import Any, Callable, Optional
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .exceptions import APIException, NotFoundException
+from .progress import TaskProgressStore
 
 logger = logging.getLogger(__name__)
 
@@ -81,7 +86,8 @@ class SafeAPIView(BaseAPIViewMixin, APIView, metaclass=SafeAPIViewMeta):
             # 使用与原版 RecruitmentSystemAPI 一致的错误格式
             return Response(
                 {"error": e.message},
-                status=e.status_code
+                status=e.status_code,
+                headers=e.headers
             )
         except Exception as e:
             logger.exception(f"未处理的异常: {e}")
@@ -114,3 +120,52 @@ class SafeAPIView(BaseAPIViewMixin, APIView, metaclass=SafeAPIViewMeta):
         if hasattr(self, 'handle_delete'):
             return self.handle_delete(request, *args, **kwargs)
         return Response({"error": "Method not allowed"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class LongPollMixin:
+    """
+    状态接口的长轮询支持（?since_version=N&wait=秒数）。
+    
+    客户端已知的进度版本号仍是最新时，响应推迟到版本号变化或等待超时后再返回，
+    返回内容与普通查询一致。等待通过异步流式响应完成，只读缓存中的进度快照，
+    不占用数据库连接（ASGI 部署时也不占用工作线程）。
+    """
+    
+    # 进度快照类型（见 TaskProgressStore）
+    progress_kind = None
+    
+    # 单次请求的最长等待时间（秒）
+    MAX_WAIT = 60
+    
+    def long_poll_response(
+        self, request, task_id: Any, version: int, build_data: Callable[[], Any]
+    ) -> Optional[StreamingHttpResponse]:
+        """
+        按需返回长轮询响应。
+        
+        参数:
+            request: 请求对象
+            task_id: 任务ID
+            version: 任务当前的进度版本号
+            build_data: 版本变化或超时后生成响应数据的函数（会重新查询数据库）
+        
+        返回:
+            需要等待时返回流式响应；未请求等待或版本已变化时返回None，由调用方直接响应
+        """
+        wait = min(self.get_int_param(request, 'wait', default=0), self.MAX_WAIT)
+        since_version = self.get_int_param(request, 'since_version', default=None)
+        if wait <= 0 or since_version is None or since_version != version:
+            return None
+        
+        kind = self.progress_kind
+        
+        async def wait_and_render():
+            await TaskProgressStore.wait_for_change(kind, task_id, since_version, wait)
+            try:
+                payload = {"code": 200, "message": "成功", "data": await sync_to_async(build_data)()}
+            except APIException as e:
+                # 等待期间任务被删除等情况，状态码已随响应头发出，只能在响应体中返回错误
+                payload = {"error": e.message}
+            yield JSONRenderer().render(payload)
+        
+        return StreamingHttpResponse(wait_and_render(), content_type='application/json')
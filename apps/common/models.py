@@ -0,0 +1,25 @@
+"""
+公共数据模型模块。
+"""
+from django.db import models
+
+
+class SharedCounter(models.Model):
+    """
+    跨进程共享的计数器（如进行中的请求数）。
+
+    计数通过带条件的UPDATE原子增减，持有者异常退出未归还的计数在到期后清零。
+    """
+
+    key = models.CharField(max_length=255, unique=True, verbose_name="计数键")
+    value = models.IntegerField(default=0, verbose_name="计数值")
+    expires_at = models.DateTimeField(verbose_name="到期时间")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        db_table = 'shared_counters'
+        verbose_name = "共享计数器"
+        verbose_name_plural = "共享计数器"
+
+    def __str__(self):
+        return f"{self.key}={self.value}"
@@ -0,0 +1,113 @@
+"""
+任务实时进度存储模块。
+
+后台任务的实时进度（状态、进度百分比、当前发言人等）保存在 Django 缓存中，
+状态接口优先从缓存读取；数据库只做节流持久化，避免每次发言都写任务行。
+Web 进程与工作进程需要共享同一缓存后端（见 settings.CACHES）。
+
+每次更新时快照的 version 加1，客户端可据此判断进度是否变化；
+事件流和长轮询接口通过 wait_for_change() 异步等待版本变化，等待期间只读缓存、不占用数据库连接。
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class TaskProgressStore:
+    """基于缓存的任务进度快照存储。"""
+
+    KEY_PREFIX = 'task_progress'
+
+    # 进度快照的缓存有效期（秒）
+    TIMEOUT = 24 * 3600
+
+    # 等待进度变化时读取缓存的间隔（秒）
+    POLL_INTERVAL = 0.5
+
+    @classmethod
+    def get_key(cls, kind: str, task_id: Any) -> str:
+        """生成缓存键。"""
+        return f"{cls.KEY_PREFIX}:{kind}:{task_id}"
+
+    @classmethod
+    def get(cls, kind: str, task_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        读取任务进度快照。
+
+        参数:
+            kind: 任务类型（如 screening、video）
+            task_id: 任务ID
+
+        返回:
+            进度快照字典，不存在或缓存不可用时返回None
+        """
+        try:
+            return cache.get(cls.get_key(kind, task_id))
+        except Exception as e:
+            logger.warning(f"Failed to read progress for {kind}:{task_id}: {e}")
+            return None
+
+    @classmethod
+    async def aget(cls, kind: str, task_id: Any) -> Optional[Dict[str, Any]]:
+        """异步读取任务进度快照。"""
+        try:
+            return await cache.aget(cls.get_key(kind, task_id))
+        except Exception as e:
+            logger.warning(f"Failed to read progress for {kind}:{task_id}: {e}")
+            return None
+
+    @classmethod
+    async def wait_for_change(
+        cls, kind: str, task_id: Any, since_version: int, timeout: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        异步等待任务进度快照的版本号变化。
+
+        参数:
+            kind: 任务类型
+            task_id: 任务ID
+            since_version: 客户端已知的版本号
+            timeout: 最长等待时间（秒）
+
+        返回:
+            版本号与 since_version 不同的快照（缓存被清空后版本号会重新计数），超时返回None
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            snapshot = await cls.aget(kind, task_id)
+            if snapshot and snapshot.get('version', 0) != since_version:
+                return snapshot
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(cls.POLL_INTERVAL, remaining))
+
+    @classmethod
+    def publish(cls, kind: str, task_id: Any, **state) -> Dict[str, Any]:
+        """
+        更新任务进度快照，版本号加1（每个任务只应由一个线程写入）。
+
+        参数:
+            kind: 任务类型
+            task_id: 任务ID
+            **state: 要更新的字段
+
+        返回:
+            更新后的快照
+        """
+        key = cls.get_key(kind, task_id)
+        snapshot = dict(cls.get(kind, task_id) or {})
+        snapshot.update(state)
+        snapshot['version'] = snapshot.get('version', 0) + 1
+        snapshot['updated_at'] = time.time()
+        try:
+            cache.set(key, snapshot, cls.TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Failed to publish progress for {kind}:{task_id}: {e}")
+        return snapshot
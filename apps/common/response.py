@@ -1,11 +1,35 @@
 """
 标准化API响应工具模块 - 与原版 RecruitmentSystemAPI 格式保持一致。
 """
-from typing import Any, Optional
+import json
+from typing import Any, AsyncIterator, Optional
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 
 
+class EventStreamRenderer(JSONRenderer):
+    """
+    text/event-stream 渲染器。
+    
+    事件流视图需声明该渲染器，否则 EventSource 的 Accept 头会被内容协商拒绝；
+    事件流建立前的错误响应（如任务不存在）仍按JSON输出。
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+
+def format_sse_event(event: str, data: Any, event_id: Optional[Any] = None) -> str:
+    """将事件格式化为 Server-Sent Events 文本。"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
 class ApiResponse:
     """统一API响应包装器 - 提供标准化的响应格式。"""
     
@@ -53,6 +77,18 @@ class ApiResponse:
             "data": data
         }, status=code)
     
+    @staticmethod
+    def event_stream(events: AsyncIterator[str]) -> StreamingHttpResponse:
+        """
+        返回 Server-Sent Events 流式响应。
+        
+        events 为异步迭代器，在 ASGI 下由事件循环驱动，等待事件期间不占用工作线程。
+        """
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # 禁止 Nginx 缓冲事件
+        return response
+    
     @staticmethod
     def not_found(message: str = "资源不存在") -> Response:
         """返回未找到响应。"""
@@ -138,6 +138,98 @@ class EvaluationService:
         
         return "\n".join(infos)
     
+    @classmethod
+    def collect_analysis_inputs(cls, resume) -> Dict[str, Any]:
+        """
+        收集单人综合分析所需的输入数据。
+        
+        参数:
+            resume: ResumeData实例
+            
+        返回:
+            包含简历内容、初筛报告、面试记录、面试报告和岗位配置的字典
+        """
+        from apps.interview_assist.models import InterviewAssistSession
+        
+        # 获取初筛报告
+        screening_report = {
+            "comprehensive_score": resume.screening_score.get("comprehensive_score") if resume.screening_score else None,
+            "screening_summary": resume.screening_summary or ""
+        }
+        
+        # 获取面试会话和报告
+        interview_session = InterviewAssistSession.objects.filter(
+            resume_data=resume
+        ).order_by('-created_at').first()
+        
+        interview_records = []
+        interview_report = {}
+        
+        if interview_session:
+            interview_records = interview_session.qa_records or []
+            interview_report = interview_session.final_report or {}
+        
+        # 获取岗位配置
+        job_config = {
+            "title": resume.position_title or "未指定岗位"
+        }
+        if interview_session:
+            job_config.update(interview_session.job_config or {})
+        
+        return {
+            "resume_content": resume.resume_content or "",
+            "screening_report": screening_report,
+            "interview_records": interview_records,
+            "interview_report": interview_report,
+            "job_config": job_config,
+        }
+    
+    @classmethod
+    def run_comprehensive_analysis(cls, resume):
+        """
+        执行单人综合分析并保存结果。
+        
+        参数:
+            resume: ResumeData实例
+            
+        返回:
+            CandidateComprehensiveAnalysis实例
+        """
+        from services.agents import CandidateComprehensiveAnalyzer
+        from .models import CandidateComprehensiveAnalysis
+        
+        inputs = cls.collect_analysis_inputs(resume)
+        screening_report = inputs["screening_report"]
+        interview_records = inputs["interview_records"]
+        interview_report = inputs["interview_report"]
+        job_config = inputs["job_config"]
+        
+        analyzer = CandidateComprehensiveAnalyzer(job_config=job_config)
+        result = analyzer.analyze(
+            candidate_name=resume.candidate_name,
+            resume_content=inputs["resume_content"],
+            screening_report=screening_report,
+            interview_records=interview_records,
+            interview_report=interview_report,
+            video_analysis=None  # 预留
+        )
+        
+        return CandidateComprehensiveAnalysis.objects.create(
+            resume_data=resume,
+            final_score=result['final_score'],
+            recommendation_level=result['recommendation']['level'],
+            recommendation_label=result['recommendation']['label'],
+            recommendation_action=result['recommendation']['action'],
+            dimension_scores=result['dimension_scores'],
+            comprehensive_report=result['comprehensive_report'],
+            input_data_snapshot={
+                'screening_score': screening_report.get('comprehensive_score'),
+                'interview_qa_count': len(interview_records),
+                'has_interview_report': bool(interview_report),
+                'job_title': job_config.get('title')
+            }
+        )
+    
     # run_evaluation 方法已废弃并删除
     # 批量评估功能不再支持，请使用 CandidateComprehensiveAnalyzer 进行单人综合分析
     # 参见: apps/final_recommend/views.py 中的 CandidateComprehensiveAnalysisView
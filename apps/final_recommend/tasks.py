@@ -1,18 +1,77 @@
 """
-最终推荐的Celery任务模块。
+最终推荐后台任务模块。
+
+单人综合分析的结果保存为新的 CandidateComprehensiveAnalysis 记录，分析进度通过队列任务状态查询。
 
 注意: 批量评估任务（run_evaluation_task）已废弃并移除。
 批量评估功能不再支持，请使用 CandidateComprehensiveAnalyzer 进行单人综合分析。
 """
 import logging
 
+from apps.task_queue.services import TaskQueueService
+from apps.task_queue.webhooks import WebhookService
+
 logger = logging.getLogger(__name__)
 
+COMPREHENSIVE_ANALYSIS_JOB_HANDLER = 'apps.final_recommend.tasks.run_comprehensive_analysis_job'
+
+
+def enqueue_comprehensive_analysis(resume, callback_url: str = None):
+    """
+    将单人综合分析任务写入后台队列。
+
+    参数:
+        resume: ResumeData实例
+        callback_url: 分析结束后推送回调的地址
+
+    返回:
+        BackgroundJob实例
+    """
+    return TaskQueueService.enqueue(
+        COMPREHENSIVE_ANALYSIS_JOB_HANDLER,
+        payload={'resume_id': str(resume.id), 'callback_url': callback_url},
+        reference_id=str(resume.id),
+    )
+
+
+def run_comprehensive_analysis_job(job):
+    """执行单人综合分析任务。"""
+    from apps.resume_screening.models import ResumeData
+    from .services import EvaluationService
+
+    resume = ResumeData.objects.filter(id=job.payload['resume_id']).first()
+    if resume is None:
+        logger.warning(f"ResumeData {job.payload['resume_id']} no longer exists, skipping")
+        return
+
+    analysis = EvaluationService.run_comprehensive_analysis(resume)
+    WebhookService.notify(
+        job.payload.get('callback_url'),
+        'comprehensive_analysis.completed',
+        {
+            'resume_id': str(resume.id),
+            'analysis_id': str(analysis.id),
+            'candidate_name': resume.candidate_name,
+            'status': 'completed',
+            'final_score': analysis.final_score,
+            'recommendation': {
+                'level': analysis.recommendation_level,
+                'label': analysis.recommendation_label,
+                'action': analysis.recommendation_action,
+            },
+        },
+        reference_id=str(resume.id),
+    )
+
+
+def notify_comprehensive_analysis_failed(job, error: str):
+    """队列最终失败回调：推送分析失败的回调事件。"""
+    WebhookService.notify(
+        job.payload.get('callback_url'),
+        'comprehensive_analysis.failed',
+        {'resume_id': job.payload['resume_id'], 'status': 'failed', 'error_message': error},
+        reference_id=job.reference_id,
+    )
+
 
-# ============================================================================
-# run_evaluation_task 已废弃并删除
-# 批量评估功能不再支持
-# 如需对候选人进行综合分析，请使用:
-#   - API: POST /final-recommend/comprehensive-analysis/{resume_id}/
-#   - 服务: services.agents.CandidateComprehensiveAnalyzer
-# ============================================================================
+run_comprehensive_analysis_job.on_failure = notify_comprehensive_analysis_failed
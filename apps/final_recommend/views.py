@@ -5,11 +5,17 @@
 """
 import logging
 
+from apps.common.admission import AdmissionController
 from apps.common.mixins import SafeAPIView
 from apps.common.response import ApiResponse
 from apps.common.exceptions import ValidationException
 
+from apps.task_queue.services import TaskQueueService
+from apps.task_queue.webhooks import WebhookService
+
 from .models import CandidateComprehensiveAnalysis
+from .services import EvaluationService
+from .tasks import enqueue_comprehensive_analysis, COMPREHENSIVE_ANALYSIS_JOB_HANDLER
 
 logger = logging.getLogger(__name__)
 
@@ -41,8 +47,9 @@ class RecommendStatsView(SafeAPIView):
 class CandidateComprehensiveAnalysisView(SafeAPIView):
     """
     单人综合分析API
-    POST: 对单个候选人进行综合分析
-    GET: 获取候选人的分析历史
+    POST: 提交单个候选人的综合分析任务（后台执行，指定 callback_url 时分析结束后推送签名的回调事件；
+          后台队列已满时返回429和Retry-After）
+    GET: 获取候选人的分析结果，分析进行中时返回任务状态
     """
     
     def handle_get(self, request, resume_id=None):
@@ -55,6 +62,18 @@ class CandidateComprehensiveAnalysisView(SafeAPIView):
             resume_data_id=resume_id
         ).order_by('-created_at').first()
         
+        # 存在比最新结果更新且未完成的分析任务时，返回任务状态
+        job = TaskQueueService.get_latest_job(resume_id, handler=COMPREHENSIVE_ANALYSIS_JOB_HANDLER)
+        if job and job.status != 'completed' and (not analysis or job.created_at > analysis.created_at):
+            data = {
+                'resume_id': str(resume_id),
+                'task_id': str(job.id),
+                'status': job.status,
+            }
+            if job.status == 'failed' and job.last_error:
+                data['error_message'] = job.last_error
+            return ApiResponse.success(data=data)
+        
         if not analysis:
             return ApiResponse.success(data=None)
         
@@ -75,90 +94,28 @@ class CandidateComprehensiveAnalysisView(SafeAPIView):
         })
     
     def handle_post(self, request, resume_id):
-        """执行单人综合分析。"""
+        """提交单人综合分析任务。"""
         from apps.resume_screening.models import ResumeData
-        from apps.interview_assist.models import InterviewAssistSession
-        from services.agents import CandidateComprehensiveAnalyzer
         
         # 获取简历数据
         resume = self.get_object_or_404(ResumeData, id=resume_id)
         
-        # 获取简历内容
-        resume_content = resume.resume_content or ""
-        
-        # 获取初筛报告
-        screening_report = {
-            "comprehensive_score": resume.screening_score.get("comprehensive_score") if resume.screening_score else None,
-            "screening_summary": resume.screening_summary or ""
-        }
-        
-        # 获取面试会话和报告
-        interview_session = InterviewAssistSession.objects.filter(
-            resume_data=resume
-        ).order_by('-created_at').first()
-        
-        interview_records = []
-        interview_report = {}
-        
-        if interview_session:
-            interview_records = interview_session.qa_records or []
-            interview_report = interview_session.final_report or {}
-        
         # 检查是否有足够的数据
-        if not screening_report.get("comprehensive_score") and not interview_report:
+        inputs = EvaluationService.collect_analysis_inputs(resume)
+        if not inputs["screening_report"].get("comprehensive_score") and not inputs["interview_report"]:
             raise ValidationException("缺少必要的分析数据（初筛报告或面试报告）")
         
-        # 获取岗位配置
-        job_config = {
-            "title": resume.position_title or "未指定岗位"
-        }
-        if interview_session:
-            job_config.update(interview_session.job_config or {})
+        callback_url = WebhookService.validate_callback_url(self.get_param(request, 'callback_url'))
+        AdmissionController.admit_job()
         
-        # 执行综合分析
-        analyzer = CandidateComprehensiveAnalyzer(job_config=job_config)
+        job = enqueue_comprehensive_analysis(resume, callback_url=callback_url)
         
-        try:
-            result = analyzer.analyze(
-                candidate_name=resume.candidate_name,
-                resume_content=resume_content,
-                screening_report=screening_report,
-                interview_records=interview_records,
-                interview_report=interview_report,
-                video_analysis=None  # 预留
-            )
-            
-            # 保存到数据库
-            analysis = CandidateComprehensiveAnalysis.objects.create(
-                resume_data=resume,
-                final_score=result['final_score'],
-                recommendation_level=result['recommendation']['level'],
-                recommendation_label=result['recommendation']['label'],
-                recommendation_action=result['recommendation']['action'],
-                dimension_scores=result['dimension_scores'],
-                comprehensive_report=result['comprehensive_report'],
-                input_data_snapshot={
-                    'screening_score': screening_report.get('comprehensive_score'),
-                    'interview_qa_count': len(interview_records),
-                    'has_interview_report': bool(interview_report),
-                    'job_title': job_config.get('title')
-                }
-            )
-            
-            return ApiResponse.success(
-                data={
-                    'id': str(analysis.id),
-                    'resume_id': str(resume.id),
-                    'candidate_name': resume.candidate_name,
-                    'final_score': result['final_score'],
-                    'recommendation': result['recommendation'],
-                    'dimension_scores': result['dimension_scores'],
-                    'comprehensive_report': result['comprehensive_report'],
-                    'created_at': analysis.created_at.isoformat()
-                },
-                message='综合分析完成'
-            )
-            
-        except Exception as e:
-            logger.error(f"综合分析失败: {e}", exc_info=True)
-            raise ValidationException(f"综合分析失败: {str(e)}")
+        return ApiResponse.accepted(
+            data={
+                'status': 'submitted',
+                'task_id': str(job.id),
+                'resume_id': str(resume.id),
+                'candidate_name': resume.candidate_name,
+            },
+            message='综合分析任务已提交，正在后台处理'
+        )
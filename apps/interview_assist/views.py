@@ -5,6 +5,7 @@ import logging
 from datetime import datetime
 from django.core.files.base import ContentFile
 
+from apps.common.admission import InteractiveAdmissionMixin
 from apps.common.mixins import SafeAPIView
 from apps.common.response import ApiResponse
 from apps.common.exceptions import ValidationException, NotFoundException
@@ -133,10 +134,10 @@ class SessionDetailView(SafeAPIView):
         return ApiResponse.success(message='会话已删除')
 
 
-class GenerateQuestionsView(SafeAPIView):
+class GenerateQuestionsView(InteractiveAdmissionMixin, SafeAPIView):
     """
     生成问题API
-    POST: 生成候选问题（临时生成，不保存到数据库）
+    POST: 生成候选问题（临时生成，不保存到数据库）；AI服务繁忙时返回503和Retry-After
     """
     
     def handle_post(self, request, session_id):
@@ -195,10 +196,10 @@ class GenerateQuestionsView(SafeAPIView):
         )
 
 
-class RecordQAView(SafeAPIView):
+class RecordQAView(InteractiveAdmissionMixin, SafeAPIView):
     """
     记录问答API
-    POST: 记录问答并获取评估
+    POST: 记录问答并获取评估；AI服务繁忙时返回503和Retry-After
     """
     
     def handle_post(self, request, session_id):
@@ -302,10 +303,10 @@ class RecordQAView(SafeAPIView):
         return hints
 
 
-class GenerateReportView(SafeAPIView):
+class GenerateReportView(InteractiveAdmissionMixin, SafeAPIView):
     """
     生成报告API
-    POST: 生成最终报告
+    POST: 生成最终报告；AI服务繁忙时返回503和Retry-After
     """
     
     def handle_post(self, request, session_id):
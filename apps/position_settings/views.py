@@ -266,6 +266,10 @@ class PositionCriteriaDetailView(SafeAPIView):
         criteria.is_active = False
         criteria.save()
         
+        # 清除该岗位的筛选结果缓存
+        from apps.resume_screening.services import ScreeningCacheService
+        ScreeningCacheService.evict_position(criteria)
+        
         return ApiResponse.success(message='岗位已删除')
 
 
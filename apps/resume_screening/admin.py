@@ -2,7 +2,7 @@
 Admin configuration for resume screening module.
 """
 from django.contrib import admin
-from .models import ResumeScreeningTask, ScreeningReport, ResumeGroup, ResumeData
+from .models import ResumeScreeningTask, ScreeningReport, ResumeGroup, ResumeData, ScreeningResultCache
 
 
 @admin.register(ResumeScreeningTask)
@@ -35,3 +35,11 @@ class ResumeDataAdmin(admin.ModelAdmin):
     list_filter = ['position_title', 'created_at']
     search_fields = ['candidate_name', 'position_title']
     readonly_fields = ['id', 'created_at', 'resume_file_hash']
+
+
+@admin.register(ScreeningResultCache)
+class ScreeningResultCacheAdmin(admin.ModelAdmin):
+    list_display = ['id', 'resume_hash', 'prompt_version', 'hit_count', 'created_at']
+    list_filter = ['prompt_version', 'created_at']
+    search_fields = ['resume_hash', 'position_hash', 'position_id']
+    readonly_fields = ['id', 'created_at']
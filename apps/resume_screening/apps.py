@@ -5,3 +5,9 @@ class ResumeScreeningConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.resume_screening'
     verbose_name = '简历初筛'
+
+    def ready(self):
+        from apps.task_queue.services import TaskQueueService
+        from .tasks import recover_screening_tasks
+
+        TaskQueueService.register_recovery_hook(recover_screening_tasks)
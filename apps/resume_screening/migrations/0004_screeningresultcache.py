@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:38
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_screening', '0003_remove_resumelibrary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningResultCache',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('resume_hash', models.CharField(max_length=64, verbose_name='简历内容哈希值')),
+                ('position_hash', models.CharField(max_length=64, verbose_name='岗位标准哈希值')),
+                ('prompt_version', models.CharField(max_length=64, verbose_name='提示词版本')),
+                ('position_id', models.CharField(blank=True, default='', max_length=64, verbose_name='岗位ID')),
+                ('scores', models.JSONField(default=dict, verbose_name='筛选评分')),
+                ('summary', models.TextField(blank=True, default='', verbose_name='筛选总结')),
+                ('md_content', models.TextField(blank=True, default='', verbose_name='MD报告内容')),
+                ('json_content', models.TextField(blank=True, default='', verbose_name='JSON报告内容')),
+                ('hit_count', models.IntegerField(default=0, verbose_name='命中次数')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True, verbose_name='最近命中时间')),
+            ],
+            options={
+                'verbose_name': '筛选结果缓存',
+                'verbose_name_plural': '筛选结果缓存',
+                'db_table': 'screening_result_cache',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['position_hash'], name='screening_r_positio_59c8c7_idx'), models.Index(fields=['position_id'], name='screening_r_positio_6e11a0_idx')],
+                'constraints': [models.UniqueConstraint(fields=('resume_hash', 'position_hash', 'prompt_version'), name='unique_screening_result_cache_key')],
+            },
+        ),
+    ]
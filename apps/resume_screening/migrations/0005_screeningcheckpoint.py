@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:06
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_screening', '0004_screeningresultcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('resume_index', models.IntegerField(verbose_name='简历序号')),
+                ('candidate_name', models.CharField(max_length=255, verbose_name='候选人姓名')),
+                ('result', models.JSONField(default=dict, verbose_name='筛选结果')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoints', to='resume_screening.resumescreeningtask', verbose_name='关联任务')),
+            ],
+            options={
+                'verbose_name': '筛选检查点',
+                'verbose_name_plural': '筛选检查点',
+                'db_table': 'screening_checkpoints',
+                'ordering': ['resume_index'],
+                'constraints': [models.UniqueConstraint(fields=('task', 'resume_index'), name='unique_screening_checkpoint')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_screening', '0005_screeningcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumescreeningtask',
+            name='cancel_requested',
+            field=models.BooleanField(default=False, verbose_name='已请求取消'),
+        ),
+        migrations.AlterField(
+            model_name='resumescreeningtask',
+            name='status',
+            field=models.CharField(choices=[('pending', '等待中'), ('running', '进行中'), ('completed', '已完成'), ('failed', '失败'), ('cancelled', '已取消')], default='pending', max_length=20, verbose_name='状态'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_screening', '0006_task_cancellation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumescreeningtask',
+            name='priority',
+            field=models.IntegerField(default=0, verbose_name='优先级'),
+        ),
+    ]
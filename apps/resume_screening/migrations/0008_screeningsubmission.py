@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resume_screening', '0007_task_priority'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True, verbose_name='去重键')),
+                ('task_id', models.CharField(max_length=64, verbose_name='任务ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='占用时间')),
+                ('expires_at', models.DateTimeField(verbose_name='到期时间')),
+            ],
+            options={
+                'verbose_name': '筛选提交去重记录',
+                'verbose_name_plural': '筛选提交去重记录',
+                'db_table': 'screening_submissions',
+                'indexes': [models.Index(fields=['expires_at'], name='screening_s_expires_2062dc_idx')],
+            },
+        ),
+    ]
@@ -18,6 +18,7 @@ class ResumeScreeningTask(models.Model):
         RUNNING = 'running', '进行中'
         COMPLETED = 'completed', '已完成'
         FAILED = 'failed', '失败'
+        CANCELLED = 'cancelled', '已取消'
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created_at = models.DateTimeField(default=timezone.now, verbose_name="创建时间")
@@ -42,6 +43,8 @@ class ResumeScreeningTask(models.Model):
         blank=True, 
         verbose_name="岗位信息"
     )
+    cancel_requested = models.BooleanField(default=False, verbose_name="已请求取消")
+    priority = models.IntegerField(default=0, verbose_name="优先级")
 
     class Meta:
         db_table = 'resume_screening_tasks'
@@ -227,3 +230,90 @@ class ResumeData(models.Model):
             models.Index(fields=['resume_file_hash']),
             models.Index(fields=['created_at']),
         ]
+
+
+class ScreeningCheckpoint(models.Model):
+    """筛选任务检查点 - 记录任务中已完成简历的筛选结果，任务中断后从断点继续"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="创建时间")
+    task = models.ForeignKey(
+        ResumeScreeningTask,
+        on_delete=models.CASCADE,
+        related_name='checkpoints',
+        verbose_name="关联任务"
+    )
+    resume_index = models.IntegerField(verbose_name="简历序号")
+    candidate_name = models.CharField(max_length=255, verbose_name="候选人姓名")
+    result = models.JSONField(default=dict, verbose_name="筛选结果")
+    
+    class Meta:
+        db_table = 'screening_checkpoints'
+        ordering = ['resume_index']
+        verbose_name = "筛选检查点"
+        verbose_name_plural = "筛选检查点"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['task', 'resume_index'],
+                name='unique_screening_checkpoint'
+            ),
+        ]
+
+
+class ScreeningResultCache(models.Model):
+    """简历筛选结果缓存 - 相同简历在相同岗位标准和提示词版本下复用筛选结果"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="创建时间")
+    
+    # 缓存键
+    resume_hash = models.CharField(max_length=64, verbose_name="简历内容哈希值")
+    position_hash = models.CharField(max_length=64, verbose_name="岗位标准哈希值")
+    prompt_version = models.CharField(max_length=64, verbose_name="提示词版本")
+    position_id = models.CharField(max_length=64, blank=True, default='', verbose_name="岗位ID")
+    
+    # 筛选结果
+    scores = models.JSONField(default=dict, verbose_name="筛选评分")
+    summary = models.TextField(blank=True, default='', verbose_name="筛选总结")
+    md_content = models.TextField(blank=True, default='', verbose_name="MD报告内容")
+    json_content = models.TextField(blank=True, default='', verbose_name="JSON报告内容")
+    
+    # 命中统计
+    hit_count = models.IntegerField(default=0, verbose_name="命中次数")
+    last_hit_at = models.DateTimeField(null=True, blank=True, verbose_name="最近命中时间")
+    
+    class Meta:
+        db_table = 'screening_result_cache'
+        ordering = ['-created_at']
+        verbose_name = "筛选结果缓存"
+        verbose_name_plural = "筛选结果缓存"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['resume_hash', 'position_hash', 'prompt_version'],
+                name='unique_screening_result_cache_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['position_hash']),
+            models.Index(fields=['position_id']),
+        ]
+
+
+class ScreeningSubmission(models.Model):
+    """筛选任务提交去重记录 - 去重键到任务ID的映射，键唯一，并发的重复提交只有一个能创建任务"""
+    
+    key = models.CharField(max_length=255, unique=True, verbose_name="去重键")
+    task_id = models.CharField(max_length=64, verbose_name="任务ID")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="占用时间")
+    expires_at = models.DateTimeField(verbose_name="到期时间")
+    
+    class Meta:
+        db_table = 'screening_submissions'
+        verbose_name = "筛选提交去重记录"
+        verbose_name_plural = "筛选提交去重记录"
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.key} -> {self.task_id}"
@@ -2,6 +2,8 @@
 简历筛选模块序列化器。
 """
 from rest_framework import serializers
+from apps.common.exceptions import ValidationException
+from apps.task_queue.webhooks import WebhookService
 from .models import ResumeScreeningTask, ScreeningReport, ResumeGroup, ResumeData
 
 
@@ -13,7 +15,7 @@ class ResumeScreeningTaskSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'created_at', 'status', 
             'progress', 'current_step', 'total_steps',
-            'error_message', 'current_speaker', 'position_data'
+            'error_message', 'current_speaker', 'position_data', 'priority'
         ]
         read_only_fields = ['id', 'created_at']
 
@@ -72,7 +74,25 @@ class ResumeScreeningInputSerializer(serializers.Serializer):
     resumes = serializers.ListField(
         child=serializers.DictField(),
         required=True,
-        help_text="简历列表"
+        help_text="简历列表，每项为 {name, content} 或引用简历库的 {library_id}"
+    )
+    force_rescreen = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="是否忽略筛选结果缓存强制重新筛选"
+    )
+    priority = serializers.IntegerField(
+        required=False,
+        default=0,
+        min_value=-10,
+        max_value=10,
+        help_text="任务优先级（-10~10），数值越大越先筛选"
+    )
+    callback_url = serializers.URLField(
+        required=False,
+        allow_null=True,
+        default=None,
+        help_text="任务结束后推送回调的地址"
     )
     
     def validate_position(self, value):
@@ -80,13 +100,19 @@ class ResumeScreeningInputSerializer(serializers.Serializer):
             raise serializers.ValidationError("岗位信息不能为空")
         return value
     
+    def validate_callback_url(self, value):
+        try:
+            return WebhookService.validate_callback_url(value)
+        except ValidationException as e:
+            raise serializers.ValidationError(e.message)
+    
     def validate_resumes(self, value):
         if not value:
             raise serializers.ValidationError("简历列表不能为空")
         
         for idx, resume in enumerate(value):
-            if 'content' not in resume:
-                raise serializers.ValidationError(f"第{idx}份简历缺少content字段")
+            if 'content' not in resume and not resume.get('library_id'):
+                raise serializers.ValidationError(f"第{idx}份简历缺少content或library_id字段")
         
         return value
 
@@ -1,5 +1,8 @@
-from .screening_service import ScreeningService
+from .screening_service import ScreeningService, ScreeningInterrupted, ScreeningCancelled
 from .report_service import ReportService
 from .group_service import GroupService
+from .cache_service import ScreeningCacheService
+from .event_stream import ScreeningEventService
+from .submission_service import SubmissionDedupService
 
-__all__ = ['ScreeningService', 'ReportService', 'GroupService']
+__all__ = ['ScreeningService', 'ScreeningInterrupted', 'ScreeningCancelled', 'ReportService', 'GroupService', 'ScreeningCacheService', 'ScreeningEventService', 'SubmissionDedupService']
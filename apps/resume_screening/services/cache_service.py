@@ -0,0 +1,135 @@
+"""
+简历筛选结果缓存服务模块。
+"""
+import logging
+from typing import Dict, Optional
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.common.utils import generate_hash, calculate_position_hash, dict_to_sorted_json
+from services.agents import (
+    SCREENING_PROMPT_VERSION, SCREENING_MODE_GROUP_CHAT, SCREENING_ROLES, get_config_list, get_role_model
+)
+
+logger = logging.getLogger(__name__)
+
+# 岗位信息中与评审标准无关的字段，计算岗位哈希时忽略
+VOLATILE_POSITION_FIELDS = ('id', 'created_at', 'updated_at', 'resume_count', 'is_active', 'resumes')
+
+
+class ScreeningCacheService:
+    """
+    简历筛选结果缓存服务类。
+    
+    缓存键为 (简历内容哈希, 岗位标准哈希, 提示词版本)，命中时直接复用已保存的评分和报告，
+    不再运行代理对话。
+    """
+    
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """是否启用筛选结果缓存。"""
+        from .screening_service import get_screening_setting
+        return get_screening_setting('RESULT_CACHE', True)
+    
+    @classmethod
+    def get_position_hash(cls, position_data: Dict) -> str:
+        """计算岗位评审标准的哈希值（忽略ID、时间戳等与评审无关的字段）。"""
+        criteria = {
+            key: value for key, value in (position_data or {}).items()
+            if key not in VOLATILE_POSITION_FIELDS
+        }
+        return calculate_position_hash(criteria.get('position', ''), criteria)
+    
+    @classmethod
+    def get_prompt_version(cls) -> str:
+        """
+        获取当前筛选配置的版本标识。
+        
+        由提示词版本和影响对话内容的配置（模型及各角色的模型层级、执行模式、精简/隔离/提前淘汰）共同决定。
+        """
+        from .screening_service import get_screening_setting
+        
+        model = get_config_list()[0]["model"]
+        config = {
+            "model": model,
+            "mode": get_screening_setting('MODE', SCREENING_MODE_GROUP_CHAT),
+            "isolate_context": get_screening_setting('ISOLATE_CONTEXT', False),
+            "lean": get_screening_setting('LEAN', False),
+            "early_exit_threshold": get_screening_setting('EARLY_EXIT_THRESHOLD'),
+        }
+        role_models = {role: get_role_model(role) for role in SCREENING_ROLES}
+        if any(role_model != model for role_model in role_models.values()):
+            # 未分层级时不加入，保持已有缓存有效
+            config["role_models"] = role_models
+        return f"v{SCREENING_PROMPT_VERSION}-{generate_hash(dict_to_sorted_json(config))[:12]}"
+    
+    @classmethod
+    def get(cls, resume_content: str, position_data: Dict) -> Optional[Dict]:
+        """
+        查询缓存的筛选结果。
+        
+        返回:
+            与 ScreeningService.screen_resume 结果格式一致的字典，未命中时返回None
+        """
+        from ..models import ScreeningResultCache
+        
+        entry = ScreeningResultCache.objects.filter(
+            resume_hash=generate_hash(resume_content),
+            position_hash=cls.get_position_hash(position_data),
+            prompt_version=cls.get_prompt_version(),
+        ).first()
+        if entry is None:
+            return None
+        
+        ScreeningResultCache.objects.filter(id=entry.id).update(
+            hit_count=F('hit_count') + 1,
+            last_hit_at=timezone.now()
+        )
+        logger.info(f"Screening cache hit (resume hash: {entry.resume_hash[:8]}...)")
+        return {
+            'md_content': entry.md_content,
+            'json_content': entry.json_content,
+            'scores': entry.scores,
+            'summary': entry.summary,
+            'metrics': {'cache_hit': True},
+        }
+    
+    @classmethod
+    def store(cls, resume_content: str, position_data: Dict, result: Dict) -> None:
+        """保存筛选结果到缓存。"""
+        from ..models import ScreeningResultCache
+        
+        ScreeningResultCache.objects.update_or_create(
+            resume_hash=generate_hash(resume_content),
+            position_hash=cls.get_position_hash(position_data),
+            prompt_version=cls.get_prompt_version(),
+            defaults={
+                'position_id': str((position_data or {}).get('id') or ''),
+                'scores': result.get('scores') or {},
+                'summary': result.get('summary') or '',
+                'md_content': result.get('md_content') or '',
+                'json_content': result.get('json_content') or '',
+            }
+        )
+    
+    @classmethod
+    def evict_position(cls, position) -> int:
+        """
+        删除岗位相关的缓存结果。
+        
+        参数:
+            position: PositionCriteria实例
+            
+        返回:
+            删除的缓存条目数
+        """
+        from ..models import ScreeningResultCache
+        
+        deleted, _ = ScreeningResultCache.objects.filter(
+            Q(position_id=str(position.id)) |
+            Q(position_hash=cls.get_position_hash(position.to_dict()))
+        ).delete()
+        if deleted:
+            logger.info(f"Evicted {deleted} screening cache entries for position {position.id}")
+        return deleted
@@ -0,0 +1,93 @@
+"""
+筛选任务进度事件流（Server-Sent Events）模块。
+
+事件流从实时进度存储（TaskProgressStore）读取进度快照，版本变化时推送事件：
+
+- progress: 状态、进度、当前发言人变化（id 为快照版本号）
+- resume: 单份简历筛选结束（评分或错误信息）
+- completed / failed / cancelled: 任务结束，completed 附带各候选人的最终评分，随后关闭连接
+
+等待期间只读缓存，不占用工作线程和数据库连接；只有任务结束时查询一次数据库。
+"""
+import asyncio
+from typing import AsyncIterator, Dict
+
+from asgiref.sync import sync_to_async
+
+from apps.common.progress import TaskProgressStore
+from apps.common.response import format_sse_event
+from ..tasks import PROGRESS_KIND, get_task_results
+
+
+class ScreeningEventService:
+    """筛选任务进度事件流服务类。"""
+    
+    FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+    PROGRESS_FIELDS = ('status', 'progress', 'current_step', 'total_steps', 'current_speaker')
+    
+    # 无事件时发送心跳注释的间隔（秒），防止代理服务器断开空闲连接
+    HEARTBEAT_INTERVAL = 15
+    
+    # 单个连接的最长持续时间（秒），到期后关闭连接，由浏览器 EventSource 自动重连
+    MAX_DURATION = 30 * 60
+    
+    @classmethod
+    async def stream(cls, task_id, state: Dict) -> AsyncIterator[str]:
+        """
+        生成任务进度事件。
+        
+        参数:
+            task_id: 任务ID
+            state: 连接建立时的任务状态（get_live_progress 的结果，另含 total_steps）
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + cls.MAX_DURATION
+        snapshot = await TaskProgressStore.aget(PROGRESS_KIND, task_id) or {}
+        state = dict(state)
+        version = state.get('version', 0)
+        sent_resumes = 0
+        
+        yield format_sse_event('progress', cls._progress_data(state), version)
+        while True:
+            finished_resumes = snapshot.get('finished_resumes') or []
+            for resume in finished_resumes[sent_resumes:]:
+                yield format_sse_event('resume', resume)
+            sent_resumes = max(sent_resumes, len(finished_resumes))
+            
+            if state['status'] in cls.FINISHED_STATUSES:
+                yield format_sse_event(state['status'], await cls._final_data(task_id, state), version)
+                return
+            
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            changed = await TaskProgressStore.wait_for_change(
+                PROGRESS_KIND, task_id, version, min(cls.HEARTBEAT_INTERVAL, remaining)
+            )
+            if changed is None:
+                yield ": keepalive\n\n"
+                continue
+            
+            snapshot = changed
+            version = snapshot.get('version', 0)
+            state.update({field: snapshot[field] for field in cls.PROGRESS_FIELDS if field in snapshot})
+            if state['status'] not in cls.FINISHED_STATUSES:
+                yield format_sse_event('progress', cls._progress_data(state), version)
+    
+    @classmethod
+    def _progress_data(cls, state: Dict) -> Dict:
+        """progress 事件的数据。"""
+        return {field: state.get(field) for field in cls.PROGRESS_FIELDS}
+    
+    @classmethod
+    async def _final_data(cls, task_id, state: Dict) -> Dict:
+        """任务结束事件的数据：completed 附带最终评分，failed 附带错误信息。"""
+        from ..models import ResumeScreeningTask
+        
+        data = cls._progress_data(state)
+        if state['status'] == 'completed':
+            data['results'] = await sync_to_async(get_task_results)(task_id)
+        elif state['status'] == 'failed':
+            task = await ResumeScreeningTask.objects.filter(id=task_id).only('error_message').afirst()
+            data['error_message'] = task.error_message if task else None
+        return data
@@ -4,10 +4,11 @@
 import os
 import json
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from django.conf import settings
 from django.core.files.base import ContentFile
+from django.db import transaction
 
 from apps.common.utils import ensure_dir, sanitize_filename
 
@@ -80,7 +81,8 @@ class ReportService:
         cls,
         candidate_name: str,
         extracted_data: Dict,
-        conversation_history: List[Dict] = None
+        conversation_history: List[Dict] = None,
+        metrics: Dict = None
     ) -> str:
         """
         从提取的数据生成JSON报告。
@@ -89,6 +91,7 @@ class ReportService:
             candidate_name: 候选人名称
             extracted_data: 提取的分数和评论
             conversation_history: 可选的对话历史
+            metrics: 可选的执行指标（如输入token统计）
             
         返回:
             JSON字符串
@@ -106,6 +109,9 @@ class ReportService:
         if conversation_history:
             report_data["conversation_history"] = conversation_history
         
+        if metrics:
+            report_data["metrics"] = metrics
+        
         return json.dumps(report_data, ensure_ascii=False, indent=2)
     
     @classmethod
@@ -169,71 +175,99 @@ class ReportService:
         返回:
             tuple: (ResumeData实例, 是否为新创建)
         """
+        return cls.bulk_save_resume_data(task, position_data, [{
+            'candidate_name': candidate_name,
+            'resume_content': resume_content,
+            'screening_result': screening_result,
+        }])[0]
+    
+    @classmethod
+    def bulk_save_resume_data(cls, task, position_data: Dict, entries: List[Dict]) -> List[Tuple[Any, bool]]:
+        """
+        批量保存简历数据，已存在相同哈希的简历则更新筛选结果。
+        
+        一次 IN 查询找出已存在的简历，在同一事务中 bulk_create 新简历、bulk_update 已有简历，
+        查询次数与简历数量无关；同一批中内容相同的简历只创建一条记录。
+        
+        参数:
+            task: ResumeScreeningTask实例
+            position_data: 岗位信息
+            entries: 简历列表，每项包含 candidate_name、resume_content 和可选的 screening_result
+            
+        返回:
+            与 entries 一一对应的 (ResumeData实例, 是否为新创建) 列表
+        """
         from ..models import ResumeData
         from apps.common.utils import generate_hash
         
         # 生成哈希：仅基于简历内容，相同内容的简历会有相同哈希值用于去重
-        resume_hash = generate_hash(resume_content)
+        hashes = [generate_hash(entry['resume_content']) for entry in entries]
         
-        # 检查是否已存在相同哈希的简历
-        existing = ResumeData.objects.filter(resume_file_hash=resume_hash).first()
-        
-        if existing:
-            # 如果存在，更新关联任务和筛选结果（如果有）
-            if existing.task is None:  # 只有在没有关联任务时才更新
-                existing.task = task
-                existing.save()
+        with transaction.atomic():
+            records = {
+                item.resume_file_hash: item
+                for item in ResumeData.objects.filter(resume_file_hash__in=set(hashes))
+            }
+            to_create = {}
+            to_update = {}
+            saved = []
             
-            # 如果提供了筛选结果，更新相关字段
-            if screening_result:
-                existing.screening_score = screening_result.get('scores', {})
-                existing.screening_summary = screening_result.get('summary', '')
-                existing.json_report_content = screening_result.get('json_content', '')
-                
-                # 保存报告文件（如果提供）
-                md_content = screening_result.get('md_content')
-                if md_content:
-                    md_filename = f"{sanitize_filename(candidate_name)}简历初筛结果.md"
-                    existing.report_md_file.save(md_filename, ContentFile(md_content.encode('utf-8')), save=False)
-                
-                json_content = screening_result.get('json_content')
-                if json_content:
-                    json_filename = f"{sanitize_filename(candidate_name)}.json"
-                    existing.report_json_file.save(json_filename, ContentFile(json_content.encode('utf-8')), save=False)
+            for entry, resume_hash in zip(entries, hashes):
+                record = records.get(resume_hash)
+                is_new = record is None
+                if is_new:
+                    record = ResumeData(
+                        task=task,
+                        position_title=position_data.get('position', '未知职位'),
+                        position_details=position_data,
+                        candidate_name=entry['candidate_name'],
+                        resume_content=entry['resume_content'],
+                        resume_file_hash=resume_hash,
+                        screening_score={},
+                        screening_summary='',
+                        json_report_content=''
+                    )
+                    records[resume_hash] = to_create[resume_hash] = record
+                elif resume_hash not in to_create and record.task is None:
+                    # 只有在没有关联任务时才更新
+                    record.task = task
+                    to_update[resume_hash] = record
                 
-                existing.save()  # 保存所有更改
-                logger.info(f"更新现有简历数据（哈希: {resume_hash[:8]}...）的筛选结果")
+                screening_result = entry.get('screening_result')
+                if screening_result:
+                    cls._apply_screening_result(record, entry['candidate_name'], screening_result)
+                    if resume_hash not in to_create:
+                        to_update[resume_hash] = record
+                        logger.info(f"更新现有简历数据（哈希: {resume_hash[:8]}...）的筛选结果")
+                saved.append((record, is_new))
             
-            return existing, False  # 返回现有记录，标记为非新建
+            if to_create:
+                ResumeData.objects.bulk_create(list(to_create.values()))
+            if to_update:
+                ResumeData.objects.bulk_update(list(to_update.values()), [
+                    'task', 'screening_score', 'screening_summary', 'json_report_content',
+                    'report_md_file', 'report_json_file'
+                ])
         
-        # 创建新记录
-        resume_data = ResumeData.objects.create(
-            task=task,
-            position_title=position_data.get('position', '未知职位'),
-            position_details=position_data,
-            candidate_name=candidate_name,
-            resume_content=resume_content,
-            resume_file_hash=resume_hash,
-            screening_score=screening_result.get('scores', {}) if screening_result else {},
-            screening_summary=screening_result.get('summary', '') if screening_result else '',
-            json_report_content=screening_result.get('json_content', '') if screening_result else ''
-        )
+        return saved
+    
+    @classmethod
+    def _apply_screening_result(cls, resume_data, candidate_name: str, screening_result: Dict):
+        """将筛选结果写入简历数据实例（报告文件写入存储，实例本身不保存）。"""
+        resume_data.screening_score = screening_result.get('scores', {})
+        resume_data.screening_summary = screening_result.get('summary', '')
+        resume_data.json_report_content = screening_result.get('json_content', '')
         
-        # 如果提供了内容则保存报告文件
-        if screening_result:
-            md_content = screening_result.get('md_content')
-            if md_content:
-                md_filename = f"{sanitize_filename(candidate_name)}简历初筛结果.md"
-                resume_data.report_md_file.save(md_filename, ContentFile(md_content.encode('utf-8')), save=False)
-            
-            json_content = screening_result.get('json_content')
-            if json_content:
-                json_filename = f"{sanitize_filename(candidate_name)}.json"
-                resume_data.report_json_file.save(json_filename, ContentFile(json_content.encode('utf-8')), save=False)
-            
-            resume_data.save()  # 保存文件字段
+        # 保存报告文件（如果提供）
+        md_content = screening_result.get('md_content')
+        if md_content:
+            md_filename = f"{sanitize_filename(candidate_name)}简历初筛结果.md"
+            resume_data.report_md_file.save(md_filename, ContentFile(md_content.encode('utf-8')), save=False)
         
-        return resume_data, True  # 返回新创建的记录，标记为新建
+        json_content = screening_result.get('json_content')
+        if json_content:
+            json_filename = f"{sanitize_filename(candidate_name)}.json"
+            resume_data.report_json_file.save(json_filename, ContentFile(json_content.encode('utf-8')), save=False)
 
     @classmethod
     def save_resume_data(
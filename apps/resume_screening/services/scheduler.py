@@ -0,0 +1,100 @@
+"""
+简历筛选公平调度模块。
+
+同一工作进程中所有筛选任务共享固定数量的简历名额（RESUME_SCREENING['MAX_CONCURRENT_RESUMES']）。
+名额空出时分配给优先级最高的任务，同优先级的任务按最久未获得名额的顺序轮流分配（round-robin），
+因此大批量任务运行期间，新提交的小批量任务也能立即获得名额。
+"""
+import itertools
+import threading
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+
+
+class FairShareScheduler:
+    """按优先级和轮转顺序分配简历名额的调度器（线程安全）。"""
+
+    def __init__(self, slots: int):
+        """
+        初始化调度器。
+
+        参数:
+            slots: 进程内同时筛选的简历总数上限
+        """
+        self.slots = max(1, slots)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiting: Dict[str, Tuple[int, threading.Event]] = {}
+        self._granted: Dict[str, int] = {}
+        self._last_served: Dict[str, int] = {}
+        self._counter = itertools.count()
+
+    def request(self, key: str, priority: int, wakeup: threading.Event):
+        """
+        登记任务需要一个名额，分配后设置 wakeup 事件。
+
+        参数:
+            key: 任务标识
+            priority: 任务优先级，数值越大越先分配
+            wakeup: 分配名额时设置的事件
+        """
+        with self._lock:
+            self._waiting[key] = (priority, wakeup)
+            self._dispatch()
+
+    def take(self, key: str) -> bool:
+        """取走一个已分配给任务的名额，没有已分配名额时返回False。"""
+        with self._lock:
+            granted = self._granted.get(key, 0)
+            if not granted:
+                return False
+            self._granted[key] = granted - 1
+            return True
+
+    def release(self):
+        """归还一个名额（简历筛选结束时调用）。"""
+        with self._lock:
+            self._in_use -= 1
+            self._dispatch()
+
+    def withdraw(self, key: str):
+        """任务结束：取消登记并归还已分配但未取走的名额。"""
+        with self._lock:
+            self._waiting.pop(key, None)
+            self._in_use -= self._granted.pop(key, 0)
+            self._last_served.pop(key, None)
+            self._dispatch()
+
+    def _dispatch(self):
+        """将空闲名额分配给等待中的任务。"""
+        while self._in_use < self.slots and self._waiting:
+            key = min(
+                self._waiting,
+                key=lambda k: (-self._waiting[k][0], self._last_served.get(k, -1))
+            )
+            _, wakeup = self._waiting.pop(key)
+            self._in_use += 1
+            self._granted[key] = self._granted.get(key, 0) + 1
+            self._last_served[key] = next(self._counter)
+            wakeup.set()
+
+    def stats(self) -> Dict[str, int]:
+        """获取已占用名额数和等待中的任务数。"""
+        with self._lock:
+            return {"in_use": self._in_use, "waiting": len(self._waiting)}
+
+
+_scheduler: Optional[FairShareScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_screening_scheduler() -> FairShareScheduler:
+    """获取进程内共享的筛选调度器。"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                slots = getattr(settings, 'RESUME_SCREENING', {}).get('MAX_CONCURRENT_RESUMES', 6)
+                _scheduler = FairShareScheduler(slots)
+    return _scheduler
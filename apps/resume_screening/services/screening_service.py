@@ -4,26 +4,134 @@
 import os
 import re
 import logging
-from typing import Dict, List, Any, Tuple, Optional
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple, Optional, Callable
 from django.conf import settings
 
 from apps.common.utils import generate_hash, extract_name_from_filename
 from apps.common.exceptions import ValidationException, ServiceException
-from services.agents import ScreeningAgentManager
+from services.agents import ScreeningAgentManager, SCREENING_MODE_GROUP_CHAT, AgentRunCancelled
+from .cache_service import ScreeningCacheService
+from .scheduler import get_screening_scheduler
+from ..tasks import publish_progress
 
 logger = logging.getLogger(__name__)
 
 
+def get_screening_setting(key: str, default: Any = None) -> Any:
+    """读取 settings.RESUME_SCREENING 中的配置项。"""
+    return getattr(settings, 'RESUME_SCREENING', {}).get(key, default)
+
+
+class ScreeningInterrupted(Exception):
+    """筛选在简历之间被中断（已完成的简历均已写入检查点）。"""
+
+
+class ScreeningCancelled(ScreeningInterrupted):
+    """筛选任务被用户取消，进行中的简历在下一次发言前停止。"""
+
+
+class ScreeningProgressTracker:
+    """
+    筛选任务进度跟踪器（线程安全）。
+    
+    并发筛选时各简历的发言进度先记录在内存中，由调度线程通过 flush() 统一发布，
+    避免多个线程同时写同一任务行。实时进度发布到缓存（TaskProgressStore），
+    数据库只按 PROGRESS_DB_FLUSH_INTERVAL 节流写入变更字段。
+    
+    progress 为所有简历完成度之和（进行中的简历按已发言的agent数折算）占总数的百分比，
+    current_step 为已结束（成功或失败）的简历数，finished_resumes 为已结束简历的评分或错误（供事件流推送）。
+    """
+    
+    def __init__(self, task, total: int):
+        self.task = task
+        self.total = max(total, 1)
+        self._lock = threading.Lock()
+        self._finished = 0
+        self._steps = {}
+        self._speaker = None
+        self._finished_resumes = []
+        self._dirty = False
+        self._db_dirty = False
+        self._last_db_write = 0.0
+        self.db_flush_interval = get_screening_setting('PROGRESS_DB_FLUSH_INTERVAL', 5)
+    
+    def speaker_callback(self, index: int) -> Callable[[str, int], None]:
+        """生成某份简历的发言进度回调。"""
+        def callback(speaker_name: str, step: int = None):
+            with self._lock:
+                self._speaker = speaker_name
+                if step is not None:
+                    self._steps[index] = step
+                self._dirty = True
+        return callback
+    
+    def mark_finished(self, index: int, candidate_name: str = None, result: Dict = None, error: str = None):
+        """
+        标记某份简历已结束。
+        
+        参数:
+            index: 简历序号
+            candidate_name: 候选人姓名，为空时不记录到 finished_resumes（如被取消的简历）
+            result: 筛选结果
+            error: 筛选失败时的错误信息
+        """
+        with self._lock:
+            self._finished += 1
+            self._steps.pop(index, None)
+            if candidate_name:
+                self._finished_resumes.append({
+                    "index": index,
+                    "candidate_name": candidate_name,
+                    "status": "failed" if error else "completed",
+                    "scores": (result or {}).get('scores', {}),
+                    "error": error,
+                })
+            self._dirty = True
+    
+    def flush(self, force: bool = False):
+        """发布内存中的进度，距上次写库超过节流间隔（或 force）时同时写入数据库。"""
+        with self._lock:
+            if self._dirty:
+                total_agents = ScreeningAgentManager.TOTAL_AGENTS
+                in_flight = sum(min(step, total_agents) / total_agents for step in self._steps.values())
+                progress = int((self._finished + in_flight) / self.total * 100)
+                self.task.progress = min(progress, 99)  # 保留最后1%给完成状态
+                self.task.current_step = self._finished
+                self.task.current_speaker = self._speaker
+                self._dirty = False
+                self._db_dirty = True
+                publish_progress(self.task, finished_resumes=list(self._finished_resumes))
+            
+            now = time.monotonic()
+            if not (force or (self._db_dirty and now - self._last_db_write >= self.db_flush_interval)):
+                return
+            self._db_dirty = False
+            self._last_db_write = now
+        
+        self.task.save(update_fields=['progress', 'current_step', 'current_speaker', 'error_message'])
+
+
 class ScreeningService:
     """简历筛选操作服务类。"""
     
     WEIGHTS = {"hr": 0.3, "technical": 0.4, "manager": 0.3}
     
+    # 并发筛选时调度线程发布进度和轮询取消/停止的间隔（秒）
+    PROGRESS_FLUSH_INTERVAL = 1.0
+    
     @classmethod
     def parse_input_data(cls, data: Dict) -> Tuple[Dict, List[Dict]]:
         """
         解析并验证来自前端的输入数据。
         
+        简历可以直接提供 content，也可以只提供 library_id 引用简历库中的简历，
+        引用的简历在一次查询中加载内容，文件名默认取简历库中的文件名。
+        
         参数:
             data: 包含岗位和简历的请求数据
             
@@ -53,107 +161,348 @@ class ScreeningService:
         if errors:
             raise ValidationException("参数验证失败", errors)
         
+        # 引用简历库的简历（只传 library_id）在一次查询中加载内容
+        library_ids = [
+            str(item['library_id']) for item in resumes
+            if isinstance(item, dict) and item.get('library_id') and item.get('content') is None
+        ]
+        library_resumes = cls._load_library_resumes(library_ids) if library_ids else {}
+        
         # 解析简历
         parsed_resumes = []
         for idx, item in enumerate(resumes):
             if not isinstance(item, dict):
                 raise ValidationException(f"第{idx}份简历必须为对象")
             
-            name = item.get("name") or item.get("filename") or f"resume_{idx}"
             content = item.get("content")
             metadata = item.get("metadata", {}) or {}
+            library_resume = None
             
             if content is None:
-                raise ValidationException(f"第{idx}份简历缺少content字段")
+                if not item.get("library_id"):
+                    raise ValidationException(f"第{idx}份简历缺少content或library_id字段")
+                library_resume = library_resumes.get(str(item["library_id"]))
+                if library_resume is None:
+                    raise ValidationException(f"第{idx}份简历在简历库中不存在: {item['library_id']}")
+                content = library_resume.content
+                metadata = {
+                    "size": metadata.get("size", library_resume.file_size),
+                    "type": metadata.get("type", library_resume.file_type or "text/plain"),
+                }
             
-            parsed_resumes.append({
+            name = (
+                item.get("name") or item.get("filename")
+                or (library_resume.filename if library_resume else None) or f"resume_{idx}"
+            )
+            
+            parsed = {
                 "name": name,
                 "content": content,
                 "metadata": {
                     "size": metadata.get("size", 0),
                     "type": metadata.get("type", "text/plain")
                 }
-            })
+            }
+            if library_resume:
+                parsed["library_id"] = str(library_resume.id)
+            parsed_resumes.append(parsed)
         
         return position, parsed_resumes
     
+    @classmethod
+    def _load_library_resumes(cls, library_ids: List[str]) -> Dict[str, Any]:
+        """按ID批量加载简历库中的简历，返回ID到ResumeLibrary实例的映射。"""
+        from apps.resume_library.services import LibraryService
+        
+        for library_id in library_ids:
+            try:
+                uuid.UUID(library_id)
+            except ValueError:
+                raise ValidationException(f"无效的简历库ID: {library_id}")
+        return {str(resume.id): resume for resume in LibraryService.get_resumes_by_ids(library_ids)}
+    
     @classmethod
     def run_screening(
         cls,
         task,
         position_data: Dict,
         resumes_data: List[Dict],
-        run_chat: bool = True
+        run_chat: bool = True,
+        max_workers: int = None,
+        force_rescreen: bool = False,
+        checkpoint: bool = False,
+        should_stop: Optional[Callable[[], bool]] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        on_result: Optional[Callable[[Dict, str, Dict], None]] = None
     ) -> Dict[str, str]:
         """
         为多份简历运行筛选流程。
         
+        简历在有界线程池中并发筛选，每份简历开始前向进程内公平调度器申请名额（见 scheduler），
+        多个任务同时运行时按优先级和轮转顺序交替筛选。单份简历失败不会中断其他简历；
+        全部简历失败时才抛出异常。已在相同岗位标准下筛选过的简历直接复用缓存结果。
+        
+        开启 checkpoint 时每份简历完成后立即写入检查点，任务重试时跳过检查点中已完成的简历。
+        should_stop 返回True后不再开始新的简历，等待进行中的简历完成并写入检查点后抛出
+        ScreeningInterrupted。
+        
+        is_cancelled 由当前线程在简历之间轮询（间隔不超过 PROGRESS_FLUSH_INTERVAL），返回True后
+        不再开始新的简历，进行中的简历在下一次发言前停止，最后抛出 ScreeningCancelled。
+        
+        指定 on_result 时，每份简历得到结果（筛选完成或命中缓存）后立即在当前线程调用
+        on_result(resume, candidate_name, result) 持久化，结果不再保留在内存中，内存占用与批量大小无关；
+        检查点中的简历已在之前的尝试中持久化，不再重复回调，检查点也只保存评分。
+        
         参数:
             task: ResumeScreeningTask实例
             position_data: 岗位/职位信息
             resumes_data: 简历数据列表
             run_chat: 是否运行实际的LLM对话
+            max_workers: 并发筛选的简历数，默认读取 RESUME_SCREENING['RESUME_CONCURRENCY']
+            force_rescreen: 是否忽略缓存强制重新筛选
+            checkpoint: 是否读写任务检查点
+            should_stop: 停止检查函数
+            is_cancelled: 取消检查函数（可访问数据库，只在当前线程调用）
+            on_result: 单份简历结果回调（可访问数据库，只在当前线程调用）
             
         返回:
-            候选人名称到报告内容的映射字典
+            候选人名称到报告内容的映射字典（指定 on_result 时结果已逐份交给回调，返回空字典）
+            
+        异常:
+            ServiceException: 如果所有简历均筛选失败
+            ScreeningInterrupted: 如果筛选因 should_stop 中断
+            ScreeningCancelled: 如果筛选任务被取消
         """
-        from .report_service import ReportService
+        from ..models import ScreeningCheckpoint
         
         results = {}
+        failures = []
+        succeeded = 0
         
+        def emit(resume: Dict, candidate_name: str, result: Dict):
+            nonlocal succeeded
+            succeeded += 1
+            if on_result:
+                on_result(resume, candidate_name, result)
+            else:
+                results[candidate_name] = result
+        
+        total = len(resumes_data)
+        max_workers = max_workers or get_screening_setting('RESUME_CONCURRENCY', 3)
+        max_workers = max(1, min(max_workers, total or 1))
+        
+        tracker = ScreeningProgressTracker(task, total)
+        task.error_message = None
+        
+        completed = {}
+        if checkpoint:
+            completed = {
+                cp.resume_index: cp
+                for cp in ScreeningCheckpoint.objects.filter(task=task)
+            }
+            if completed:
+                logger.info(f"Task {task.id} resuming from checkpoint: {len(completed)}/{total} resumes done")
+        
+        use_cache = run_chat and not force_rescreen and ScreeningCacheService.is_enabled()
+        to_screen = deque()
         for idx, resume in enumerate(resumes_data):
-            try:
+            if idx in completed:
+                succeeded += 1
+                if not on_result:
+                    results[completed[idx].candidate_name] = completed[idx].result
+                tracker.mark_finished(idx, completed[idx].candidate_name, completed[idx].result)
+                continue
+            cached = ScreeningCacheService.get(resume['content'], position_data) if use_cache else None
+            if cached:
                 candidate_name = extract_name_from_filename(resume['name'])
-                resume_text = resume['content']
-                
-                # 更新任务进度
-                task.current_step = idx + 1
-                task.progress = int((idx + 1) / len(resumes_data) * 50)  # 前50%用于处理
-                task.save()
-                
-                if run_chat:
-                    # 运行代理筛选
-                    agent_manager = ScreeningAgentManager(position_data)
-                    agent_manager.set_task(task)
-                    agent_manager.setup()
-                    messages = agent_manager.run_screening(candidate_name, resume_text)
-                    
-                    # 提取并保存结果
-                    extracted = cls.extract_scores_and_comments(messages)
+                emit(resume, candidate_name, cached)
+                tracker.mark_finished(idx, candidate_name, cached)
+            else:
+                to_screen.append((idx, resume))
+        tracker.flush(force=True)
+        
+        interrupted = False
+        cancel_event = threading.Event()
+        scheduler = get_screening_scheduler()
+        scheduler_key = str(task.id)
+        wakeup = threading.Event()
+        requested = False
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='screening') as executor:
+            futures = {}
+            
+            def on_done(future):
+                scheduler.release()
+                wakeup.set()
+            
+            # 每份简历先向进程内调度器申请名额，名额按任务优先级和轮转顺序分配；
+            # 由当前线程统一写入进度，工作线程只负责LLM对话
+            try:
+                while to_screen or futures:
+                    if not cancel_event.is_set() and is_cancelled and is_cancelled():
+                        cancel_event.set()
+                        logger.info(f"Task {task.id} cancelled, stopping {len(futures)} resume(s) in progress")
+                    if not interrupted and should_stop and should_stop():
+                        interrupted = True
+                        logger.info(f"Task {task.id} stop requested, waiting for {len(futures)} resume(s) in progress")
+                    stopping = interrupted or cancel_event.is_set()
                     
-                    # 生成并保存报告
-                    md_content = ReportService.generate_md_report(
-                        candidate_name, 
-                        messages, 
-                        extracted
-                    )
-                    json_content = ReportService.generate_json_report(
-                        candidate_name,
-                        extracted,
-                        messages
-                    )
+                    while to_screen and not stopping and len(futures) < max_workers:
+                        if scheduler.take(scheduler_key):
+                            requested = False
+                            idx, resume = to_screen.popleft()
+                            future = executor.submit(
+                                cls.screen_resume,
+                                position_data,
+                                resume,
+                                run_chat,
+                                tracker.speaker_callback(idx),
+                                cancel_event.is_set
+                            )
+                            futures[future] = (idx, resume)
+                            future.add_done_callback(on_done)
+                        elif not requested:
+                            requested = True
+                            scheduler.request(scheduler_key, task.priority, wakeup)
+                        else:
+                            break
+                    if not futures and (stopping or not to_screen):
+                        break
                     
-                    results[candidate_name] = {
-                        'md_content': md_content,
-                        'json_content': json_content,
-                        'scores': extracted['scores'],
-                        'summary': extracted['final_recommendation']['reasons'][:500]
-                    }
-                else:
-                    # 测试用模拟结果
-                    results[candidate_name] = {
-                        'md_content': f"# {candidate_name} 简历初筛结果\n\n暂无评审结果",
-                        'json_content': '{}',
-                        'scores': {},
-                        'summary': ''
-                    }
-                
-            except Exception as e:
-                logger.error(f"Error screening {resume.get('name')}: {e}")
-                raise ServiceException(f"简历筛选失败: {str(e)}")
+                    wakeup.wait(cls.PROGRESS_FLUSH_INTERVAL)
+                    wakeup.clear()
+                    for future in [f for f in futures if f.done()]:
+                        idx, resume = futures.pop(future)
+                        try:
+                            candidate_name, result = future.result()
+                        except AgentRunCancelled:
+                            tracker.mark_finished(idx)
+                        except Exception as e:
+                            logger.error(f"Error screening {resume.get('name')}: {e}", exc_info=True)
+                            failures.append(f"{resume.get('name')}: {e}")
+                            tracker.mark_finished(idx, extract_name_from_filename(resume['name']), error=str(e))
+                        else:
+                            emit(resume, candidate_name, result)
+                            if checkpoint:
+                                ScreeningCheckpoint.objects.update_or_create(
+                                    task=task,
+                                    resume_index=idx,
+                                    defaults={
+                                        'candidate_name': candidate_name,
+                                        'result': {'scores': result.get('scores', {})} if on_result else result
+                                    }
+                                )
+                            if run_chat:
+                                cls._store_cached_result(resume, position_data, result)
+                            tracker.mark_finished(idx, candidate_name, result)
+                    tracker.flush()
+            finally:
+                scheduler.withdraw(scheduler_key)
+                tracker.flush(force=True)
+        
+        if cancel_event.is_set():
+            raise ScreeningCancelled(f"筛选任务已取消，已完成 {succeeded}/{total} 份简历")
+        if interrupted:
+            raise ScreeningInterrupted(f"筛选已中断，已完成 {succeeded}/{total} 份简历")
+        
+        if failures:
+            if not succeeded:
+                raise ServiceException(f"简历筛选失败: {'; '.join(failures)}")
+            task.error_message = f"部分简历筛选失败: {'; '.join(failures)}"
+            task.save(update_fields=['error_message'])
         
         return results
     
+    @classmethod
+    def _store_cached_result(cls, resume: Dict, position_data: Dict, result: Dict):
+        """写入筛选结果缓存，缓存写入失败不影响筛选结果。"""
+        try:
+            ScreeningCacheService.store(resume['content'], position_data, result)
+        except Exception as e:
+            logger.warning(f"Failed to cache screening result for {resume.get('name')}: {e}")
+    
+    @classmethod
+    def screen_resume(
+        cls,
+        position_data: Dict,
+        resume: Dict,
+        run_chat: bool = True,
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+        cancel_check: Optional[Callable[[], bool]] = None
+    ) -> Tuple[str, Dict]:
+        """
+        筛选单份简历（不访问数据库，可在工作线程中执行）。
+        
+        参数:
+            position_data: 岗位/职位信息
+            resume: 简历数据
+            run_chat: 是否运行实际的LLM对话
+            progress_callback: 发言进度回调 callback(speaker_name, step)
+            cancel_check: 取消检查函数，每次发言前调用
+            
+        返回:
+            元组 (candidate_name, result)
+            
+        异常:
+            AgentRunCancelled: 如果筛选被取消
+        """
+        from .report_service import ReportService
+        
+        candidate_name = extract_name_from_filename(resume['name'])
+        resume_text = resume['content']
+        
+        if not run_chat:
+            # 测试用模拟结果
+            return candidate_name, {
+                'md_content': f"# {candidate_name} 简历初筛结果\n\n暂无评审结果",
+                'json_content': '{}',
+                'scores': {},
+                'summary': ''
+            }
+        
+        # 运行代理筛选
+        agent_manager = ScreeningAgentManager(
+            position_data,
+            mode=get_screening_setting('MODE', SCREENING_MODE_GROUP_CHAT),
+            isolate_context=get_screening_setting('ISOLATE_CONTEXT', False),
+            lean=get_screening_setting('LEAN', False),
+            early_exit_threshold=get_screening_setting('EARLY_EXIT_THRESHOLD'),
+            weights=cls.WEIGHTS
+        )
+        agent_manager.set_progress_callback(progress_callback)
+        agent_manager.set_cancel_check(cancel_check)
+        agent_manager.setup()
+        messages = agent_manager.run_screening(candidate_name, resume_text)
+        metrics = agent_manager.get_token_metrics()
+        metrics['early_exit'] = agent_manager.early_exited
+        logger.info(
+            f"Screening token usage for {candidate_name}: input={metrics['input_tokens']}, "
+            f"saved={metrics['input_tokens_saved']}"
+        )
+        
+        # 提取并保存结果
+        extracted = cls.extract_scores_and_comments(messages)
+        
+        # 生成并保存报告
+        md_content = ReportService.generate_md_report(
+            candidate_name, 
+            messages, 
+            extracted
+        )
+        json_content = ReportService.generate_json_report(
+            candidate_name,
+            extracted,
+            messages,
+            metrics=metrics
+        )
+        
+        return candidate_name, {
+            'md_content': md_content,
+            'json_content': json_content,
+            'scores': extracted['scores'],
+            'summary': extracted['final_recommendation']['reasons'][:500],
+            'metrics': metrics
+        }
+    
     @classmethod
     def extract_scores_and_comments(cls, conversation_history: List[Dict]) -> Dict:
         """
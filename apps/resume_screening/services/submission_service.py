@@ -0,0 +1,118 @@
+"""
+筛选任务提交去重服务模块。
+"""
+import logging
+import uuid
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.utils import timezone
+
+from apps.common.utils import generate_hash, dict_to_sorted_json
+from ..models import ResumeScreeningTask, ScreeningSubmission
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionDedupService:
+    """
+    筛选任务提交去重服务类。
+    
+    去重窗口内重复提交同一批简历（前端重试、重复点击）时返回已有任务，不再启动新的代理对话。
+    请求带 Idempotency-Key 头时按该键去重，否则按 (岗位信息, 排序后的简历内容哈希) 去重。
+    键到任务ID的映射保存在 screening_submissions 表中：键有唯一约束，新键通过 get_or_create 占用；
+    已有任务失败、取消或过期后，通过比较任务ID的条件UPDATE接管，并发的重复请求只有一个会创建任务，
+    不依赖缓存后端的原子性。
+    """
+    
+    KEY_PREFIX = 'screening_submission'
+    
+    # 已失败或已取消的任务不再拦截重复提交
+    RETRYABLE_STATUSES = ('failed', 'cancelled')
+    
+    # 占用后任务尚未写入数据库的宽限时间（秒）：期间视为正在创建，超过后视为已删除
+    CREATE_GRACE = 30
+    
+    @classmethod
+    def get_window(cls) -> int:
+        """去重窗口（秒），为0时关闭去重。"""
+        from .screening_service import get_screening_setting
+        return int(get_screening_setting('IDEMPOTENCY_WINDOW', 600))
+    
+    @classmethod
+    def get_key(cls, idempotency_key: Optional[str], position_data: Dict, resumes_data: List[Dict]) -> str:
+        """
+        计算提交去重键。
+        
+        参数:
+            idempotency_key: 客户端提供的幂等键（Idempotency-Key 请求头）
+            position_data: 岗位信息
+            resumes_data: 解析后的简历数据列表
+        
+        返回:
+            去重键
+        """
+        if idempotency_key:
+            return f"{cls.KEY_PREFIX}:key:{generate_hash(idempotency_key)}"
+        request_hash = generate_hash(dict_to_sorted_json({
+            'position': position_data,
+            'resumes': sorted(generate_hash(resume['content']) for resume in resumes_data),
+        }))
+        return f"{cls.KEY_PREFIX}:hash:{request_hash}"
+    
+    @classmethod
+    def claim(cls, key: str) -> Tuple[str, bool]:
+        """
+        占用去重键。
+        
+        参数:
+            key: get_key() 计算的去重键
+        
+        返回:
+            (任务ID, 是否为新提交)；新提交时任务ID是预先分配的ID，调用方应以该ID创建任务，
+            重复提交时为已有任务（或并发接管成功的任务）的ID
+        """
+        window = cls.get_window()
+        task_id = str(uuid.uuid4())
+        if window <= 0:
+            return task_id, True
+        
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=window)
+        ScreeningSubmission.objects.filter(expires_at__lte=now).delete()
+        
+        while True:
+            submission, created = ScreeningSubmission.objects.get_or_create(
+                key=key, defaults={'task_id': task_id, 'created_at': now, 'expires_at': expires_at}
+            )
+            if created:
+                return task_id, True
+            if submission.expires_at > now and not cls._is_retryable(submission):
+                return submission.task_id, False
+            
+            # 已有任务失败、取消、已删除或记录过期，只有仍指向该任务时才能接管
+            if ScreeningSubmission.objects.filter(key=key, task_id=submission.task_id).update(
+                task_id=task_id, created_at=now, expires_at=expires_at
+            ):
+                return task_id, True
+            
+            winner = ScreeningSubmission.objects.filter(key=key).values_list('task_id', flat=True).first()
+            if winner:
+                # 并发的重复提交已先接管
+                return winner, False
+            # 记录在此期间被释放，重新占用
+    
+    @classmethod
+    def release(cls, key: str, task_id: str):
+        """任务创建失败时释放去重键（只释放仍指向该任务的键）。"""
+        ScreeningSubmission.objects.filter(key=key, task_id=task_id).delete()
+    
+    @classmethod
+    def _is_retryable(cls, submission: ScreeningSubmission) -> bool:
+        """已有任务是否允许重新提交（已失败、已取消，或超过创建宽限时间仍不存在即已删除）。"""
+        status = ResumeScreeningTask.objects.filter(
+            id=submission.task_id
+        ).values_list('status', flat=True).first()
+        if status is None:
+            return submission.created_at <= timezone.now() - timedelta(seconds=cls.CREATE_GRACE)
+        return status in cls.RETRYABLE_STATUSES
@@ -0,0 +1,352 @@
+"""
+简历筛选后台任务模块。
+
+每份简历完成后写入检查点，工作进程停止或崩溃后任务从断点继续，不会重复调用LLM。
+"""
+import logging
+from typing import Dict, List
+
+from apps.common.progress import TaskProgressStore
+from apps.common.utils import extract_name_from_filename
+from apps.task_queue.models import BackgroundJob
+from apps.task_queue.services import JobInterrupted, TaskQueueService
+from apps.task_queue.webhooks import WebhookService
+
+logger = logging.getLogger(__name__)
+
+SCREENING_JOB_HANDLER = 'apps.resume_screening.tasks.run_screening_job'
+
+# 筛选任务在实时进度存储中的类型名（与 ScreeningProgressTracker.PROGRESS_KIND 一致）
+PROGRESS_KIND = 'screening'
+
+
+def publish_progress(task, **extra):
+    """将筛选任务的当前状态（及 extra 中的附加字段）发布到实时进度存储。"""
+    TaskProgressStore.publish(
+        PROGRESS_KIND,
+        task.id,
+        status=task.status,
+        progress=task.progress,
+        current_step=task.current_step,
+        total_steps=task.total_steps,
+        current_speaker=task.current_speaker,
+        **extra
+    )
+
+
+def get_live_progress(task) -> Dict:
+    """
+    获取筛选任务的实时进度。
+
+    等待中或进行中的任务以实时进度存储为准（数据库按节流间隔写入，可能落后），
+    已结束的任务以数据库为准。version 为进度快照版本号，没有快照时为0。
+    """
+    state = {
+        'status': task.status,
+        'progress': task.progress,
+        'current_step': task.current_step,
+        'current_speaker': task.current_speaker,
+        'version': 0,
+    }
+    snapshot = TaskProgressStore.get(PROGRESS_KIND, task.id)
+    if snapshot:
+        state['version'] = snapshot.get('version', 0)
+        if task.status in ('pending', 'running'):
+            for field in ('status', 'progress', 'current_step', 'current_speaker'):
+                if field in snapshot:
+                    state[field] = snapshot[field]
+    return state
+
+
+def get_task_results(task_id) -> List[Dict]:
+    """获取任务各候选人的最终评分（不含简历全文）。"""
+    from .models import ResumeData
+
+    return [
+        {
+            'id': str(item['id']),
+            'candidate_name': item['candidate_name'],
+            'screening_score': item['screening_score'],
+            'screening_summary': item['screening_summary'],
+        }
+        for item in ResumeData.objects.filter(task_id=task_id).values(
+            'id', 'candidate_name', 'screening_score', 'screening_summary'
+        )
+    ]
+
+
+def enqueue_screening_task(task, resumes_data: List[Dict], force_rescreen: bool = False, callback_url: str = None):
+    """
+    将简历筛选任务写入后台队列。
+
+    参数:
+        task: ResumeScreeningTask实例
+        resumes_data: 解析后的简历数据列表
+        force_rescreen: 是否忽略筛选结果缓存强制重新筛选
+        callback_url: 任务结束后推送回调的地址
+
+    返回:
+        BackgroundJob实例
+    """
+    return TaskQueueService.enqueue(
+        SCREENING_JOB_HANDLER,
+        payload={
+            'task_id': str(task.id),
+            'resumes': resumes_data,
+            'force_rescreen': force_rescreen,
+            'callback_url': callback_url,
+        },
+        reference_id=str(task.id),
+        priority=task.priority,
+    )
+
+
+def get_queue_position(task):
+    """
+    获取等待中的筛选任务在后台队列中的位置（从1开始）。
+
+    返回:
+        队列位置，任务不在等待状态时返回None
+    """
+    job = TaskQueueService.get_latest_job(task.id, SCREENING_JOB_HANDLER)
+    if job is None:
+        return None
+    return TaskQueueService.get_queue_position(job)
+
+
+def _check_forced_error():
+    """检查是否设置了强制错误标志（测试钩子）。"""
+    from django.core.cache import cache
+    from apps.common.exceptions import ValidationException, ServiceException
+
+    error_config = cache.get('test_force_screening_error')
+    if not error_config or not error_config.get('active', False):
+        return
+
+    error_message = error_config.get('message', '测试：强制触发的简历筛选任务失败')
+    error_type = error_config.get('type', 'runtime')
+
+    logger.info(f"Force error trigger: {error_message} (type: {error_type})")
+
+    if error_type == 'validation':
+        raise ValidationException(error_message)
+    elif error_type == 'service':
+        raise ServiceException(error_message)
+    else:  # runtime
+        raise RuntimeError(error_message)
+
+
+def run_screening_job(job):
+    """
+    执行简历筛选任务。
+
+    失败时若仍有重试机会，任务回到等待状态并重新抛出异常交由队列退避重试；
+    最后一次尝试失败则将任务标记为失败。工作进程停止时保存进行中简历的结果后中断，
+    任务回到等待状态并重新排队。
+    """
+    from .models import ResumeScreeningTask
+    from apps.resume_library.services import LibraryService
+    from .services import ScreeningService, ReportService, ScreeningInterrupted, ScreeningCancelled
+
+    payload = job.payload
+    task = ResumeScreeningTask.objects.filter(id=payload.get('task_id')).first()
+    if task is None:
+        logger.warning(f"Screening task {payload.get('task_id')} no longer exists, skipping")
+        return
+
+    if task.cancel_requested:
+        _mark_cancelled(task)
+        _notify_finished(job, task.id)
+        return
+
+    position_data = task.position_data or {}
+    resumes_data = payload.get('resumes', [])
+
+    # 测试钩子触发的错误不重试，直接标记失败
+    try:
+        _check_forced_error()
+    except Exception as e:
+        logger.error(f"Screening failed: {e}")
+        task.status = 'failed'
+        task.error_message = str(e)
+        task.current_speaker = None
+        task.save(update_fields=['status', 'error_message', 'current_speaker'])
+        publish_progress(task)
+        _notify_finished(job, task.id)
+        return
+
+    # 只写入变更的字段，避免覆盖取消接口并发写入的 cancel_requested
+    try:
+        task.status = 'running'
+        task.save(update_fields=['status'])
+        publish_progress(task)
+
+        # 每份简历得到结果后立即写入简历数据（状态接口可看到已完成的部分结果），跟踪重复简历
+        counts = {'new': 0, 'duplicate': 0}
+        saved_names = set()
+
+        def save_result(resume, candidate_name, result):
+            _, is_new = ReportService.save_or_update_resume_data(
+                task=task,
+                position_data=position_data,
+                candidate_name=candidate_name,
+                resume_content=resume['content'],
+                screening_result=result
+            )
+            counts['new' if is_new else 'duplicate'] += 1
+            saved_names.add(candidate_name)
+
+        ScreeningService.run_screening(
+            task=task,
+            position_data=position_data,
+            resumes_data=resumes_data,
+            run_chat=True,
+            force_rescreen=payload.get('force_rescreen', False),
+            checkpoint=True,
+            should_stop=TaskQueueService.is_draining,
+            # 任务被取消或删除后都停止筛选
+            is_cancelled=lambda: not ResumeScreeningTask.objects.filter(id=task.id, cancel_requested=False).exists(),
+            on_result=save_result
+        )
+
+        # 没有本次结果的简历（筛选失败或已在之前的尝试中保存）也要确保简历数据存在
+        missing = [
+            {'candidate_name': extract_name_from_filename(resume['name']), 'resume_content': resume['content']}
+            for resume in resumes_data
+        ]
+        ReportService.bulk_save_resume_data(
+            task, position_data, [entry for entry in missing if entry['candidate_name'] not in saved_names]
+        )
+
+        # 记录统计信息
+        if counts['duplicate'] > 0:
+            logger.info(f"筛选完成: {counts['new']} 份新简历, {counts['duplicate']} 份重复简历已跳过")
+
+        # 引用简历库的简历批量标记为已筛选
+        library_ids = [resume['library_id'] for resume in resumes_data if resume.get('library_id')]
+        if library_ids:
+            LibraryService.batch_mark_as_screened(library_ids)
+
+        task.status = 'completed'
+        task.progress = 100
+        task.current_step = task.total_steps
+        task.current_speaker = None
+        task.save(update_fields=['status', 'progress', 'current_step', 'current_speaker'])
+        publish_progress(task)
+        task.checkpoints.all().delete()
+        _notify_finished(job, task.id)
+
+    except ScreeningCancelled as e:
+        logger.info(f"Screening task {task.id} cancelled: {e}")
+        _mark_cancelled(task)
+        _notify_finished(job, task.id)
+
+    except ScreeningInterrupted as e:
+        logger.info(f"Screening task {task.id} interrupted: {e}")
+        task.status = 'pending'
+        task.current_speaker = None
+        task.save(update_fields=['status', 'current_speaker'])
+        publish_progress(task)
+        raise JobInterrupted(str(e)) from e
+
+    except Exception as e:
+        logger.error(f"Screening failed (attempt {job.attempts}/{job.max_attempts}): {e}", exc_info=True)
+        task.status = 'failed' if job.is_final_attempt else 'pending'
+        task.error_message = str(e)
+        task.current_speaker = None
+        task.save(update_fields=['status', 'error_message', 'current_speaker'])
+        publish_progress(task)
+        raise
+
+
+def _mark_cancelled(task):
+    """将筛选任务标记为已取消并清理检查点（任务可能已被删除）。"""
+    from .models import ResumeScreeningTask, ScreeningCheckpoint
+
+    ResumeScreeningTask.objects.filter(id=task.id).update(status='cancelled', current_speaker=None)
+    ScreeningCheckpoint.objects.filter(task_id=task.id).delete()
+    TaskProgressStore.publish(PROGRESS_KIND, task.id, status='cancelled', current_speaker=None)
+
+
+def mark_screening_failed(job, error: str):
+    """队列最终失败回调：将关联的筛选任务标记为失败。"""
+    from .models import ResumeScreeningTask, ScreeningCheckpoint
+
+    updated = ResumeScreeningTask.objects.filter(id=job.reference_id).exclude(
+        status__in=['completed', 'cancelled']
+    ).update(
+        status='failed',
+        error_message=error,
+        current_speaker=None,
+    )
+    if updated:
+        TaskProgressStore.publish(PROGRESS_KIND, job.reference_id, status='failed', current_speaker=None)
+        _notify_finished(job, job.reference_id)
+    ScreeningCheckpoint.objects.filter(task_id=job.reference_id).delete()
+
+
+run_screening_job.on_failure = mark_screening_failed
+
+
+def _notify_finished(job, task_id):
+    """任务结束后推送回调（提交时未指定回调地址或任务已删除时跳过）。"""
+    from .models import ResumeScreeningTask
+
+    callback_url = job.payload.get('callback_url')
+    if not callback_url:
+        return
+    task = ResumeScreeningTask.objects.filter(id=task_id).first()
+    if task is None:
+        return
+
+    data = {'task_id': str(task.id), 'status': task.status}
+    if task.status == ResumeScreeningTask.Status.COMPLETED:
+        data['results'] = get_task_results(task.id)
+    if task.error_message:
+        data['error_message'] = task.error_message
+    WebhookService.notify(callback_url, f"screening.{task.status}", data, reference_id=str(task.id))
+
+
+def recover_screening_tasks() -> int:
+    """
+    工作进程启动时恢复孤立的筛选任务。
+
+    状态为进行中、但队列中已没有对应的等待或执行中任务的筛选任务（例如旧版本进程内线程
+    执行时进程退出）：能找到原始任务参数时重新入队并从检查点继续，否则标记为失败。
+    多个工作进程同时启动时，每个任务先以带条件的UPDATE从进行中改为等待中，只有改成功的进程继续处理，
+    避免重复入队。
+
+    返回:
+        处理的任务数量
+    """
+    from .models import ResumeScreeningTask
+
+    recovered = 0
+    for task in ResumeScreeningTask.objects.filter(status=ResumeScreeningTask.Status.RUNNING):
+        job = TaskQueueService.get_latest_job(task.id, SCREENING_JOB_HANDLER)
+        if job and job.status in (BackgroundJob.Status.PENDING, BackgroundJob.Status.RUNNING):
+            continue
+
+        claimed = ResumeScreeningTask.objects.filter(
+            id=task.id, status=ResumeScreeningTask.Status.RUNNING
+        ).update(status=ResumeScreeningTask.Status.PENDING, current_speaker=None)
+        if claimed != 1:
+            continue
+        task.status = ResumeScreeningTask.Status.PENDING
+        task.current_speaker = None
+
+        if job and job.status != BackgroundJob.Status.FAILED and job.payload.get('resumes'):
+            TaskQueueService.enqueue(
+                SCREENING_JOB_HANDLER, payload=job.payload, reference_id=str(task.id), priority=task.priority
+            )
+            publish_progress(task)
+            logger.warning(f"Re-enqueued orphaned screening task {task.id}")
+        else:
+            task.status = ResumeScreeningTask.Status.FAILED
+            task.error_message = job.last_error if job and job.last_error else "任务执行中断且无法恢复，请重新提交"
+            task.save(update_fields=['status', 'error_message'])
+            publish_progress(task)
+            logger.warning(f"Marked orphaned screening task {task.id} as failed")
+        recovered += 1
+
+    return recovered
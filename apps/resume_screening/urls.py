@@ -8,6 +8,7 @@ from django.urls import path
 from .views import (
     ResumeScreeningView,
     ScreeningTaskStatusView,
+    ScreeningTaskEventsView,
     ResumeDataView,
     ResumeDataDetailView,
     ResumeGroupListView,
@@ -18,6 +19,7 @@ from .views import (
     SetGroupStatusView,
     TaskHistoryView,
     TaskDeleteView,
+    TaskCancelView,
     ReportDownloadView,
     LinkResumeVideoView,
     UnlinkResumeVideoView,
@@ -41,6 +43,12 @@ urlpatterns = [
     # 任务状态 - GET获取任务实时状态
     path('tasks/<uuid:task_id>/status/', ScreeningTaskStatusView.as_view(), name='task-status'),
     
+    # 任务事件流 - GET以Server-Sent Events推送任务进度
+    path('tasks/<uuid:task_id>/events/', ScreeningTaskEventsView.as_view(), name='task-events'),
+    
+    # 取消任务 - POST取消等待中或进行中的任务
+    path('tasks/<uuid:task_id>/cancel/', TaskCancelView.as_view(), name='task-cancel'),
+    
     # 报告 - GET获取报告详情
     path('reports/<uuid:report_id>/', ResumeDataDetailView.as_view(), name='report'),
     
@@ -1,4 +1,4 @@
-from .screening import ResumeScreeningView, ScreeningTaskStatusView
+from .screening import ResumeScreeningView, ScreeningTaskStatusView, ScreeningTaskEventsView
 from .resume_data import ResumeDataView, ResumeDataDetailView
 from .resume_group import (
     ResumeGroupListView, 
@@ -8,7 +8,7 @@ from .resume_group import (
     RemoveResumeFromGroupView,
     SetGroupStatusView
 )
-from .task import TaskHistoryView, TaskDeleteView, ReportDownloadView
+from .task import TaskHistoryView, TaskDeleteView, TaskCancelView, ReportDownloadView
 from .link import LinkResumeVideoView, UnlinkResumeVideoView
 from .dev_tools import GenerateRandomResumesView, ForceScreeningErrorView, ResetScreeningTestStateView
 
@@ -24,6 +24,7 @@ from apps.resume_library.views import (
 __all__ = [
     'ResumeScreeningView',
     'ScreeningTaskStatusView',
+    'ScreeningTaskEventsView',
     'ResumeDataView',
     'ResumeDataDetailView',
     'ResumeGroupListView',
@@ -34,6 +35,7 @@ __all__ = [
     'SetGroupStatusView',
     'TaskHistoryView',
     'TaskDeleteView',
+    'TaskCancelView',
     'ReportDownloadView',
     'LinkResumeVideoView',
     'UnlinkResumeVideoView',
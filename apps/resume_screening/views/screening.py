@@ -2,15 +2,19 @@
 简历筛选API视图模块 - 与原版 RecruitmentSystemAPI 返回格式保持一致。
 """
 import logging
-from django.conf import settings
+import uuid
 
-from apps.common.mixins import SafeAPIView
-from apps.common.response import ApiResponse
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.admission import AdmissionController
+from apps.common.mixins import SafeAPIView, LongPollMixin
+from apps.common.response import ApiResponse, EventStreamRenderer
 from apps.common.exceptions import ValidationException
 
 from ..models import ResumeScreeningTask, ScreeningReport, ResumeData
-from ..services import ScreeningService, ReportService
+from ..services import ScreeningService, ReportService, ScreeningEventService, SubmissionDedupService
 from ..serializers import ResumeScreeningInputSerializer
+from ..tasks import PROGRESS_KIND, enqueue_screening_task, get_queue_position, get_live_progress, get_task_results
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +22,14 @@ logger = logging.getLogger(__name__)
 class ResumeScreeningView(SafeAPIView):
     """
     简历初筛API
-    POST: 提交简历筛选任务
+    POST: 提交简历筛选任务（force_rescreen=true 时忽略筛选结果缓存，priority 越大越先筛选）
+    
+    简历可以只传 {"library_id": ...} 引用简历库中的简历，无需上传全文；任务完成后这些简历被标记为已筛选。
+    
+    请求头 Idempotency-Key 相同、或（未带该请求头时）岗位信息和简历内容相同的重复提交，在去重窗口内
+    返回已有任务的 task_id（status 为 duplicate），不会重复筛选；已失败或已取消的任务不拦截重新提交。
+    后台队列已满（LLM用量接近上限时队列上限更低）时返回429，Retry-After 和 estimated_wait 为预计等待时间（秒）。
+    指定 callback_url 时，任务结束后向该地址推送签名的 screening.completed / failed / cancelled 事件。
     """
     
     def handle_post(self, request):
@@ -35,29 +46,26 @@ class ResumeScreeningView(SafeAPIView):
             # 解析输入数据
             position_data, resumes_data = ScreeningService.parse_input_data(request.data)
             
-            # 创建任务
-            task = ResumeScreeningTask.objects.create(
-                status='pending',
-                progress=0,
-                total_steps=len(resumes_data),
-                current_step=0,
-                position_data=position_data
-            )
-            
-            # 立即保存简历数据，确保即使任务失败也能获取简历内容
-            from apps.common.utils import extract_name_from_filename
-            for resume in resumes_data:
-                candidate_name = extract_name_from_filename(resume['name'])
-                ReportService.save_or_update_resume_data(
-                    task=task,
-                    position_data=position_data,
-                    candidate_name=candidate_name,
-                    resume_content=resume['content'],
-                    screening_result=None  # 初始时没有筛选结果
-                )
+            # 去重窗口内的重复提交直接返回已有任务（强制重新筛选时只按 Idempotency-Key 去重）
+            idempotency_key = request.headers.get('Idempotency-Key')
+            force_rescreen = serializer.validated_data.get('force_rescreen', False)
+            dedup_key = None
+            task_id = None
+            if idempotency_key or not force_rescreen:
+                dedup_key = SubmissionDedupService.get_key(idempotency_key, position_data, resumes_data)
+                task_id, is_new = SubmissionDedupService.claim(dedup_key)
+                if not is_new:
+                    return ApiResponse.accepted(
+                        data={"status": "duplicate", "task_id": task_id},
+                        message="重复提交，返回已有的筛选任务"
+                    )
             
-            # 启动异步任务（使用Celery或线程）
-            self._start_screening_task(task, position_data, resumes_data)
+            try:
+                task = self._create_task(serializer, position_data, resumes_data, task_id, force_rescreen)
+            except Exception:
+                if dedup_key:
+                    SubmissionDedupService.release(dedup_key, task_id)
+                raise
             
             # 返回与原版一致的格式
             return ApiResponse.accepted(
@@ -74,112 +82,110 @@ class ResumeScreeningView(SafeAPIView):
                 message=e.message
             )
     
-    def _start_screening_task(self, task, position_data, resumes_data):
-        """在后台启动筛选任务（使用线程）。"""
-        import threading
-        thread = threading.Thread(
-            target=self._run_screening_sync,
-            args=(task, position_data, resumes_data)
-        )
-        thread.daemon = True
-        thread.start()
-        logger.info(f"Started thread for screening task {task.id}")
-    
-    def _run_screening_sync(self, task, position_data, resumes_data):
-        """同步运行筛选（用于线程回退）。"""
+    def _create_task(self, serializer, position_data, resumes_data, task_id, force_rescreen):
+        """创建筛选任务、保存简历数据并写入后台队列（队列已满时拒绝）。"""
         from apps.common.utils import extract_name_from_filename
-        from django.core.cache import cache
         
-        try:
-            # 检查是否设置了强制错误标志（测试钩子）
-            error_config = cache.get('test_force_screening_error')
-            if error_config and error_config.get('active', False):
-                error_message = error_config.get('message', '测试：强制触发的简历筛选任务失败')
-                error_type = error_config.get('type', 'runtime')
-                
-                logger.info(f"Force error trigger: {error_message} (type: {error_type})")
-                
-                if error_type == 'validation':
-                    from apps.common.exceptions import ValidationException
-                    raise ValidationException(error_message)
-                elif error_type == 'service':
-                    from apps.common.exceptions import ServiceException
-                    raise ServiceException(error_message)
-                else:  # runtime
-                    raise RuntimeError(error_message)
-            
-            task.status = 'running'
-            task.save()
-            
-            results = ScreeningService.run_screening(
-                task=task,
-                position_data=position_data,
-                resumes_data=resumes_data,
-                run_chat=True
-            )
-            
-            # 保存结果，跟踪重复简历
-            new_count = 0
-            duplicate_count = 0
-            
-            for resume in resumes_data:
-                candidate_name = extract_name_from_filename(resume['name'])
-                result = results.get(candidate_name, {})
-                
-                # 更新或创建简历数据（即使没有结果也要确保简历数据存在）
-                resume_data, is_new = ReportService.save_or_update_resume_data(
-                    task=task,
-                    position_data=position_data,
-                    candidate_name=candidate_name,
-                    resume_content=resume['content'],
-                    screening_result=result if result else None
-                )
-                
-                if is_new:
-                    new_count += 1
-                else:
-                    duplicate_count += 1
-            
-            # 记录统计信息
-            if duplicate_count > 0:
-                logger.info(f"筛选完成: {new_count} 份新简历, {duplicate_count} 份重复简历已跳过")
-            
-            task.status = 'completed'
-            task.progress = 100
-            task.current_step = task.total_steps
-            task.current_speaker = None
-            task.save()
-            
-        except Exception as e:
-            logger.error(f"Screening failed: {e}", exc_info=True)
-            task.status = 'failed'
-            task.error_message = str(e)
-            task.current_speaker = None
-            task.save()
+        AdmissionController.admit_job()
+        task = ResumeScreeningTask.objects.create(
+            id=task_id or uuid.uuid4(),
+            status='pending',
+            progress=0,
+            total_steps=len(resumes_data),
+            current_step=0,
+            position_data=position_data,
+            priority=serializer.validated_data.get('priority', 0)
+        )
+        
+        # 立即批量保存简历数据，确保即使任务失败也能获取简历内容（初始时没有筛选结果）
+        ReportService.bulk_save_resume_data(task, position_data, [
+            {'candidate_name': extract_name_from_filename(resume['name']), 'resume_content': resume['content']}
+            for resume in resumes_data
+        ])
+        
+        enqueue_screening_task(
+            task,
+            resumes_data,
+            force_rescreen=force_rescreen,
+            callback_url=serializer.validated_data.get('callback_url')
+        )
+        return task
+
+
+class ScreeningTaskEventsView(SafeAPIView):
+    """
+    筛选任务进度事件流API
+    GET: 以 Server-Sent Events（text/event-stream）推送任务进度，替代轮询状态接口
+    
+    事件类型：progress（状态、进度、当前发言人变化）、resume（单份简历筛选结束及评分）、
+    completed / failed / cancelled（任务结束，completed 附带最终评分，随后关闭连接）。
+    需以 ASGI 方式部署，事件流由事件循环驱动，等待期间不占用工作线程和数据库连接。
+    """
+    
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+    
+    def handle_get(self, request, task_id):
+        """建立任务进度事件流。"""
+        task = self.get_object_or_404(ResumeScreeningTask, id=task_id)
+        state = get_live_progress(task)
+        state['total_steps'] = task.total_steps
+        return ApiResponse.event_stream(ScreeningEventService.stream(task.id, state))
 
 
-class ScreeningTaskStatusView(SafeAPIView):
+class ScreeningTaskStatusView(LongPollMixin, SafeAPIView):
     """
     查询筛选任务状态API
-    GET: 获取任务状态和结果
+    GET: 获取任务状态和结果，等待中的任务返回队列位置 queue_position
+    
+    进行中任务的进度从实时进度存储读取，version 为进度版本号（进度变化时递增），
+    results 为已完成简历的评分（不含简历全文）。
+    传入 since_version 和 wait（秒，最长60）时为长轮询：进度版本号仍等于 since_version 的
+    未结束任务，在版本号变化或等待超时后才返回。
     """
     
+    progress_kind = PROGRESS_KIND
+    FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+    
     def handle_get(self, request, task_id):
         """获取任务状态。"""
         task = self.get_object_or_404(ResumeScreeningTask, id=task_id)
+        live = get_live_progress(task)
         
+        if live['status'] not in self.FINISHED_STATUSES:
+            response = self.long_poll_response(
+                request, task.id, live['version'],
+                lambda: self._build_status(self.get_object_or_404(ResumeScreeningTask, id=task_id))
+            )
+            if response is not None:
+                return response
+        
+        # 返回与原版一致的格式
+        return ApiResponse.success(data=self._build_status(task, live))
+    
+    def _build_status(self, task, live=None):
+        """生成任务状态数据。"""
+        live = live or get_live_progress(task)
         response_data = {
             "task_id": str(task.id),
-            "status": task.status,
-            "progress": task.progress,
-            "current_step": task.current_step,
+            "status": live['status'],
+            "progress": live['progress'],
+            "current_step": live['current_step'],
             "total_steps": task.total_steps,
+            "priority": task.priority,
+            "version": live['version'],
             "created_at": task.created_at.isoformat()
         }
         
+        if task.status == 'pending':
+            response_data['queue_position'] = get_queue_position(task)
+        
+        # 进行中的任务返回已完成简历的评分（每份简历完成后立即写入数据库）
+        if live['status'] == 'running':
+            response_data['results'] = [item for item in get_task_results(task.id) if item['screening_score']]
+        
         # 如果正在运行则添加当前发言者
-        if task.status == 'running' and task.current_speaker:
-            response_data['current_speaker'] = task.current_speaker
+        if live['status'] == 'running' and live['current_speaker']:
+            response_data['current_speaker'] = live['current_speaker']
         
             # 无论任务状态如何，都获取简历数据
             response_data['resume_data'] = self._get_resume_data(task)
@@ -192,8 +198,7 @@ class ScreeningTaskStatusView(SafeAPIView):
         if task.status == 'failed' and task.error_message:
             response_data['error_message'] = task.error_message
         
-        # 返回与原版一致的格式
-        return ApiResponse.success(data=response_data)
+        return response_data
     
     def _get_reports(self, task):
         """获取任务的报告。"""
@@ -7,8 +7,10 @@ from django.http import FileResponse
 from apps.common.mixins import SafeAPIView
 from apps.common.response import ApiResponse
 from apps.common.pagination import paginate_queryset
+from apps.common.progress import TaskProgressStore
 
 from ..models import ResumeScreeningTask, ScreeningReport, ResumeData
+from ..tasks import PROGRESS_KIND
 
 logger = logging.getLogger(__name__)
 
@@ -145,6 +147,44 @@ class TaskDeleteView(SafeAPIView):
         )
 
 
+class TaskCancelView(SafeAPIView):
+    """
+    取消任务API
+    POST: 取消等待中或进行中的筛选任务
+    
+    等待中的任务直接标记为已取消；进行中的任务设置取消标志，后台筛选在下一次发言前停止，
+    不再调用LLM，随后任务状态变为已取消。
+    """
+    
+    FINISHED_STATUSES = ['completed', 'failed', 'cancelled']
+    
+    def handle_post(self, request, task_id):
+        """取消指定任务。"""
+        task = self.get_object_or_404(ResumeScreeningTask, id=task_id)
+        
+        # 条件更新，避免与后台任务的状态写入竞争
+        if ResumeScreeningTask.objects.filter(id=task.id, status='pending').update(
+            status='cancelled', cancel_requested=True
+        ):
+            TaskProgressStore.publish(PROGRESS_KIND, task.id, status='cancelled')
+            logger.info(f"Cancelled pending task {task.id}")
+            return ApiResponse.success(
+                data={"task_id": str(task.id), "status": "cancelled"},
+                message="任务已取消"
+            )
+        
+        if not ResumeScreeningTask.objects.filter(id=task.id).exclude(
+            status__in=self.FINISHED_STATUSES
+        ).update(cancel_requested=True):
+            return ApiResponse.error(code=400, message="任务已结束，无法取消")
+        
+        logger.info(f"Cancellation requested for running task {task.id}")
+        return ApiResponse.success(
+            data={"task_id": str(task.id), "status": "cancelling"},
+            message="任务取消请求已提交"
+        )
+
+
 class ReportDownloadView(SafeAPIView):
     """
     报告下载API
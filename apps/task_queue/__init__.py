@@ -0,0 +1,8 @@
+"""
+后台任务队列模块。
+
+简历筛选、视频分析、综合分析和任务完成回调等耗时操作不在请求中执行：Web 进程把任务写入持久化队列
+（background_jobs 表）后立即返回，由 `python manage.py run_workers` 启动的工作进程以租约方式领取执行，
+失败时按指数退避重试。各业务模块的 tasks.py 提供入队函数和处理函数。
+"""
+default_app_config = 'apps.task_queue.apps.TaskQueueConfig'
@@ -0,0 +1,13 @@
+"""
+Admin configuration for task queue module.
+"""
+from django.contrib import admin
+from .models import BackgroundJob
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'handler', 'reference_id', 'status', 'attempts', 'locked_by', 'created_at']
+    list_filter = ['status', 'handler', 'created_at']
+    search_fields = ['reference_id', 'handler', 'locked_by']
+    readonly_fields = ['id', 'created_at', 'updated_at']
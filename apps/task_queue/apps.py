@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class TaskQueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.task_queue'
+    verbose_name = '后台任务队列'
@@ -0,0 +1,72 @@
+"""
+后台任务工作进程启动命令。
+
+用法:
+    python manage.py run_workers                    # 使用配置中的并发数
+    python manage.py run_workers --concurrency 8    # 指定并发数
+    python manage.py run_workers --burst            # 处理完当前队列后退出
+
+吞吐量可通过在任意节点上启动更多工作进程来横向扩展。
+"""
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.task_queue.worker import JobWorker
+
+
+class Command(BaseCommand):
+    help = '启动后台任务工作进程，领取并执行简历筛选、视频分析、综合分析等任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='单个进程内并发执行的任务数',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=None,
+            help='队列为空时的轮询间隔（秒）',
+        )
+        parser.add_argument(
+            '--lease-seconds',
+            type=int,
+            default=None,
+            help='任务租约时长（秒），超时未续约的任务会被重新领取',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='依次执行当前所有可执行任务后退出',
+        )
+
+    def handle(self, *args, **options):
+        worker = JobWorker(
+            concurrency=options.get('concurrency'),
+            poll_interval=options.get('poll_interval'),
+            lease_seconds=options.get('lease_seconds'),
+        )
+
+        if options.get('burst'):
+            worker.recover()
+            count = 0
+            while worker.run_once():
+                count += 1
+            self.stdout.write(self.style.SUCCESS(f'✅ 已处理 {count} 个任务'))
+            return
+
+        def handle_signal(signum, frame):
+            self.stdout.write(self.style.WARNING('\n⚠️  收到停止信号，等待执行中的任务保存进度...'))
+            worker.stop()
+
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🚀 工作进程 {worker.worker_id} 已启动（并发数: {worker.concurrency}）'
+        ))
+        worker.run_forever()
+        self.stdout.write(self.style.SUCCESS('✅ 工作进程已退出'))
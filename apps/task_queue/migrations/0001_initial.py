@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:30
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('handler', models.CharField(max_length=255, verbose_name='处理函数路径')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='任务参数')),
+                ('reference_id', models.CharField(blank=True, default='', max_length=64, verbose_name='关联业务对象ID')),
+                ('priority', models.IntegerField(default=0, verbose_name='优先级')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '执行中'), ('completed', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('attempts', models.IntegerField(default=0, verbose_name='已尝试次数')),
+                ('max_attempts', models.IntegerField(default=3, verbose_name='最大尝试次数')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='最早执行时间')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='最近错误信息')),
+                ('locked_by', models.CharField(blank=True, max_length=255, null=True, verbose_name='持有者')),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True, verbose_name='租约到期时间')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='最近心跳时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+            ],
+            options={
+                'verbose_name': '后台任务',
+                'verbose_name_plural': '后台任务',
+                'db_table': 'background_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='background__status_ff06b6_idx'), models.Index(fields=['status', 'lease_expires_at'], name='background__status_f87926_idx'), models.Index(fields=['reference_id'], name='background__referen_334b33_idx')],
+            },
+        ),
+    ]
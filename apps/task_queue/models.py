@@ -0,0 +1,74 @@
+"""
+后台任务队列数据模型模块。
+"""
+from django.db import models
+from django.utils import timezone
+import uuid
+
+
+class BackgroundJob(models.Model):
+    """
+    持久化后台任务模型。
+
+    Web进程只负责写入任务行，由 `manage.py run_workers` 启动的工作进程
+    以租约方式领取执行，工作进程崩溃后租约过期，任务会被其他进程重新领取。
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', '等待中'
+        RUNNING = 'running', '执行中'
+        COMPLETED = 'completed', '已完成'
+        FAILED = 'failed', '失败'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="创建时间")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    # 任务定义
+    handler = models.CharField(max_length=255, verbose_name="处理函数路径")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="任务参数")
+    reference_id = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        verbose_name="关联业务对象ID"
+    )
+    priority = models.IntegerField(default=0, verbose_name="优先级")
+
+    # 状态
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="状态"
+    )
+    attempts = models.IntegerField(default=0, verbose_name="已尝试次数")
+    max_attempts = models.IntegerField(default=3, verbose_name="最大尝试次数")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="最早执行时间")
+    last_error = models.TextField(blank=True, null=True, verbose_name="最近错误信息")
+
+    # 租约
+    locked_by = models.CharField(max_length=255, blank=True, null=True, verbose_name="持有者")
+    lease_expires_at = models.DateTimeField(null=True, blank=True, verbose_name="租约到期时间")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="最近心跳时间")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="开始时间")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="结束时间")
+
+    class Meta:
+        db_table = 'background_jobs'
+        ordering = ['-created_at']
+        verbose_name = "后台任务"
+        verbose_name_plural = "后台任务"
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['status', 'lease_expires_at']),
+            models.Index(fields=['reference_id']),
+        ]
+
+    @property
+    def is_final_attempt(self) -> bool:
+        """当前是否为最后一次尝试。"""
+        return self.attempts >= self.max_attempts
+
+    def __str__(self):
+        return f"{self.handler} ({self.status})"
@@ -0,0 +1,369 @@
+"""
+后台任务队列服务层模块。
+
+提供任务入队、租约领取、心跳续约、完成/失败（指数退避重试）等操作。
+领取任务使用带条件的UPDATE实现乐观锁，在SQLite/MySQL/PostgreSQL上行为一致。
+
+处理函数可以通过 on_failure 属性注册最终失败回调 on_failure(job, error)，
+任务彻底失败时（包括租约过期后被重新领取但已超出尝试次数、处理函数未被调用的情况）
+由队列调用，用于将关联的业务对象标记为失败。
+
+工作进程收到停止信号时进入排空状态（is_draining），长任务可以在保存进度后抛出
+JobInterrupted，任务立即回到队列且本次尝试不计入次数。工作进程启动时通过 recover()
+释放本机已退出进程遗留的任务，并调用各业务模块注册的恢复回调。
+"""
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+
+def get_queue_setting(key: str, default: Any = None) -> Any:
+    """读取 settings.TASK_QUEUE 中的配置项。"""
+    return getattr(settings, 'TASK_QUEUE', {}).get(key, default)
+
+
+class JobInterrupted(Exception):
+    """处理函数因工作进程停止而主动中断（进度已保存），任务应重新排队。"""
+
+
+class TaskQueueService:
+    """持久化任务队列服务类。"""
+
+    # 每次领取时预取的候选任务数量
+    CLAIM_BATCH_SIZE = 10
+
+    _drain_event = threading.Event()
+    _recovery_hooks: List[Callable[[], Any]] = []
+
+    @classmethod
+    def enqueue(
+        cls,
+        handler: str,
+        payload: Dict[str, Any] = None,
+        reference_id: str = '',
+        priority: int = 0,
+        max_attempts: int = None,
+        delay: float = 0
+    ) -> BackgroundJob:
+        """
+        将任务写入队列。
+
+        参数:
+            handler: 处理函数的点分路径，函数签名为 handler(job)
+            payload: 任务参数（需可JSON序列化）
+            reference_id: 关联业务对象ID，便于按业务对象查询任务
+            priority: 优先级，数值越大越先执行
+            max_attempts: 最大尝试次数，默认读取配置
+            delay: 延迟执行秒数
+
+        返回:
+            BackgroundJob实例
+        """
+        job = BackgroundJob.objects.create(
+            handler=handler,
+            payload=payload or {},
+            reference_id=str(reference_id or ''),
+            priority=priority,
+            max_attempts=max_attempts or get_queue_setting('MAX_ATTEMPTS', 3),
+            run_after=timezone.now() + timedelta(seconds=delay),
+        )
+        logger.info(f"Enqueued job {job.id} ({handler}) ref={job.reference_id}")
+        return job
+
+    @classmethod
+    def _claimable_filter(cls, now) -> Q:
+        """可领取任务的条件：到期的等待任务，或租约已过期的执行中任务。"""
+        return (
+            Q(status=BackgroundJob.Status.PENDING, run_after__lte=now) |
+            Q(status=BackgroundJob.Status.RUNNING, lease_expires_at__lt=now)
+        )
+
+    @classmethod
+    def claim_next(cls, worker_id: str, lease_seconds: int = None) -> Optional[BackgroundJob]:
+        """
+        领取下一个可执行任务并加上租约。
+
+        参数:
+            worker_id: 工作线程标识
+            lease_seconds: 租约时长（秒）
+
+        返回:
+            领取成功的BackgroundJob实例，没有可执行任务时返回None
+        """
+        lease_seconds = lease_seconds or get_queue_setting('LEASE_SECONDS', 300)
+        now = timezone.now()
+
+        candidate_ids = list(
+            BackgroundJob.objects.filter(cls._claimable_filter(now))
+            .order_by('-priority', 'created_at')
+            .values_list('id', flat=True)[:cls.CLAIM_BATCH_SIZE]
+        )
+
+        for job_id in candidate_ids:
+            # 条件更新：只有仍满足可领取条件时才会更新成功，避免多进程重复领取
+            claimed = BackgroundJob.objects.filter(id=job_id).filter(
+                cls._claimable_filter(now)
+            ).update(
+                status=BackgroundJob.Status.RUNNING,
+                locked_by=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                started_at=now,
+                attempts=F('attempts') + 1,
+                updated_at=now,
+            )
+            if claimed:
+                return BackgroundJob.objects.get(id=job_id)
+
+        return None
+
+    @classmethod
+    def heartbeat(cls, job_ids: Iterable, worker_id: str, lease_seconds: int = None) -> int:
+        """
+        为工作线程持有的任务续约。
+
+        返回:
+            续约成功的任务数量
+        """
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        lease_seconds = lease_seconds or get_queue_setting('LEASE_SECONDS', 300)
+        now = timezone.now()
+        return BackgroundJob.objects.filter(
+            id__in=job_ids,
+            locked_by=worker_id,
+            status=BackgroundJob.Status.RUNNING,
+        ).update(
+            heartbeat_at=now,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            updated_at=now,
+        )
+
+    @classmethod
+    def mark_completed(cls, job: BackgroundJob) -> None:
+        """标记任务完成（仅当租约仍由当前持有者持有时生效）。"""
+        now = timezone.now()
+        BackgroundJob.objects.filter(id=job.id, locked_by=job.locked_by).update(
+            status=BackgroundJob.Status.COMPLETED,
+            lease_expires_at=None,
+            finished_at=now,
+            updated_at=now,
+        )
+
+    @classmethod
+    def mark_failed(cls, job: BackgroundJob, error: str) -> None:
+        """
+        记录任务失败。未达到最大尝试次数时按指数退避重新排队，否则标记为失败。
+        """
+        now = timezone.now()
+        queryset = BackgroundJob.objects.filter(id=job.id, locked_by=job.locked_by)
+
+        if job.is_final_attempt:
+            queryset.update(
+                status=BackgroundJob.Status.FAILED,
+                last_error=error,
+                lease_expires_at=None,
+                finished_at=now,
+                updated_at=now,
+            )
+            logger.error(f"Job {job.id} failed permanently after {job.attempts} attempts: {error}")
+            cls.run_failure_hook(job, error)
+            return
+
+        delay = cls.get_retry_delay(job.attempts)
+        queryset.update(
+            status=BackgroundJob.Status.PENDING,
+            last_error=error,
+            locked_by=None,
+            lease_expires_at=None,
+            run_after=now + timedelta(seconds=delay),
+            updated_at=now,
+        )
+        logger.warning(f"Job {job.id} attempt {job.attempts} failed, retrying in {delay:.1f}s: {error}")
+
+    @classmethod
+    def run_failure_hook(cls, job: BackgroundJob, error: str) -> None:
+        """调用处理函数注册的最终失败回调（回调异常只记录日志）。"""
+        try:
+            hook = getattr(import_string(job.handler), 'on_failure', None)
+            if hook:
+                hook(job, error)
+        except Exception as e:
+            logger.error(f"Failure hook for job {job.id} ({job.handler}) raised: {e}", exc_info=True)
+    
+    @classmethod
+    def get_retry_delay(cls, attempts: int) -> float:
+        """计算带抖动的指数退避时长（秒）。"""
+        base = get_queue_setting('RETRY_BACKOFF_BASE', 10)
+        maximum = get_queue_setting('RETRY_BACKOFF_MAX', 600)
+        delay = min(base * (2 ** max(attempts - 1, 0)), maximum)
+        return delay * random.uniform(0.5, 1.0)
+
+    @classmethod
+    def execute(cls, job: BackgroundJob) -> bool:
+        """
+        执行已领取的任务并记录结果。
+
+        返回:
+            任务是否执行成功
+        """
+        # 租约过期后被重新领取的任务可能已超出尝试次数
+        if job.attempts > job.max_attempts:
+            cls.mark_failed(job, job.last_error or "超出最大尝试次数")
+            return False
+
+        try:
+            handler = import_string(job.handler)
+            handler(job)
+        except JobInterrupted as e:
+            logger.info(f"Job {job.id} ({job.handler}) interrupted: {e}")
+            cls.release(job, str(e))
+            return False
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.handler}) raised: {e}", exc_info=True)
+            cls.mark_failed(job, str(e))
+            return False
+
+        cls.mark_completed(job)
+        return True
+
+    @classmethod
+    def release(cls, job: BackgroundJob, reason: str = '') -> None:
+        """将被中断的任务放回队列供立即重新领取，本次尝试不计入次数。"""
+        now = timezone.now()
+        BackgroundJob.objects.filter(id=job.id, locked_by=job.locked_by).update(
+            status=BackgroundJob.Status.PENDING,
+            last_error=reason or None,
+            locked_by=None,
+            lease_expires_at=None,
+            run_after=now,
+            attempts=F('attempts') - 1,
+            updated_at=now,
+        )
+
+    @classmethod
+    def request_drain(cls) -> None:
+        """进入排空状态：通知执行中的长任务尽快保存进度并中断。"""
+        cls._drain_event.set()
+
+    @classmethod
+    def reset_drain(cls) -> None:
+        """退出排空状态（工作进程启动时调用）。"""
+        cls._drain_event.clear()
+
+    @classmethod
+    def is_draining(cls) -> bool:
+        """当前进程是否正在排空。"""
+        return cls._drain_event.is_set()
+
+    @classmethod
+    def register_recovery_hook(cls, hook: Callable[[], Any]) -> None:
+        """注册工作进程启动时调用的业务恢复回调 hook()。"""
+        if hook not in cls._recovery_hooks:
+            cls._recovery_hooks.append(hook)
+
+    @classmethod
+    def recover(cls) -> int:
+        """
+        工作进程启动时的恢复流程：释放本机已退出进程持有的任务，然后调用各业务恢复回调。
+
+        返回:
+            释放的任务数量
+        """
+        released = cls.release_dead_local_jobs()
+        for hook in list(cls._recovery_hooks):
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Recovery hook {hook.__name__} raised: {e}", exc_info=True)
+        return released
+
+    @classmethod
+    def release_dead_local_jobs(cls) -> int:
+        """
+        释放本机已退出的工作进程持有的任务，使其立即可被领取而不必等待租约过期。
+
+        持有者标识为 主机名:进程号:随机串，进程已不存在的任务重新排队（尝试次数照常计入，
+        避免导致进程崩溃的任务无限重试）。
+
+        返回:
+            释放的任务数量
+        """
+        hostname = socket.gethostname()
+        now = timezone.now()
+        released = 0
+        running = BackgroundJob.objects.filter(
+            status=BackgroundJob.Status.RUNNING,
+            locked_by__startswith=f"{hostname}:",
+        ).values_list('id', 'locked_by')
+        for job_id, locked_by in running:
+            try:
+                pid = int(locked_by.split(':')[1])
+            except (IndexError, ValueError):
+                continue
+            if _pid_alive(pid):
+                continue
+            released += BackgroundJob.objects.filter(
+                id=job_id, locked_by=locked_by, status=BackgroundJob.Status.RUNNING
+            ).update(
+                status=BackgroundJob.Status.PENDING,
+                last_error="工作进程已退出",
+                locked_by=None,
+                lease_expires_at=None,
+                run_after=now,
+                updated_at=now,
+            )
+        if released:
+            logger.warning(f"Released {released} job(s) held by exited workers on {hostname}")
+        return released
+
+    @classmethod
+    def get_queue_position(cls, job: BackgroundJob) -> Optional[int]:
+        """
+        获取等待中任务的队列位置（从1开始），排序与领取顺序一致（优先级降序、提交时间升序）。
+
+        返回:
+            队列位置，任务不在等待状态时返回None
+        """
+        if job.status != BackgroundJob.Status.PENDING:
+            return None
+        ahead = BackgroundJob.objects.filter(status=BackgroundJob.Status.PENDING).filter(
+            Q(priority__gt=job.priority) |
+            Q(priority=job.priority, created_at__lt=job.created_at)
+        ).count()
+        return ahead + 1
+
+    @classmethod
+    def get_latest_job(cls, reference_id: str, handler: str = None) -> Optional[BackgroundJob]:
+        """获取业务对象最近一次提交的任务。"""
+        queryset = BackgroundJob.objects.filter(reference_id=str(reference_id))
+        if handler:
+            queryset = queryset.filter(handler=handler)
+        return queryset.order_by('-created_at').first()
+
+
+def _pid_alive(pid: int) -> bool:
+    """判断本机进程是否仍在运行。"""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,196 @@
+"""
+任务完成回调（Webhook）模块。
+
+客户端提交任务时可指定 callback_url，任务结束（完成、失败或取消）后由后台队列以 POST 方式
+推送JSON事件。推送作为独立的队列任务执行，失败时按队列的指数退避策略重试。
+
+为防止服务端请求伪造（SSRF），回调主机不在 WEBHOOK_ALLOWED_HOSTS 中时，解析到内网、回环、
+链路本地或保留地址（如云服务元数据地址 169.254.169.254）的回调地址会被拒绝。推送时重新解析并校验，
+并直接连接校验过的IP地址，防止提交后通过DNS重绑定指向内网。
+
+请求头:
+    X-Webhook-Id: 事件ID（重试时不变，可用于去重）
+    X-Webhook-Event: 事件类型，如 screening.completed
+    X-Webhook-Timestamp: 签名时间戳（秒）
+    X-Webhook-Signature: sha256=HMAC-SHA256(WEBHOOK_SECRET, "{timestamp}.{body}") 的十六进制值
+"""
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import socket
+import time
+import uuid
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+from django.conf import settings
+from django.utils import timezone
+
+from apps.common.exceptions import ValidationException
+from .services import TaskQueueService
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_JOB_HANDLER = 'apps.task_queue.webhooks.deliver_webhook_job'
+
+
+def get_webhook_setting(key: str, default: Any = None) -> Any:
+    """读取 settings.WEBHOOK 中的配置项。"""
+    return getattr(settings, 'WEBHOOK', {}).get(key, default)
+
+
+class WebhookService:
+    """任务完成回调服务类。"""
+
+    @classmethod
+    def validate_callback_url(cls, url: Optional[str]) -> Optional[str]:
+        """
+        校验客户端提交的回调地址。
+
+        参数:
+            url: 回调地址，为空表示不需要回调
+
+        返回:
+            校验通过的回调地址或None
+
+        异常:
+            ValidationException: 未配置签名密钥、地址格式错误、主机不在白名单中，
+                或主机不在白名单中且解析到非公网地址
+        """
+        if not url:
+            return None
+        if not get_webhook_setting('SECRET'):
+            raise ValidationException("服务端未配置 WEBHOOK_SECRET，暂不支持回调")
+
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            raise ValidationException("callback_url 必须是有效的 http(s) 地址")
+
+        allowed_hosts = get_webhook_setting('ALLOWED_HOSTS') or []
+        if allowed_hosts and parsed.hostname not in allowed_hosts:
+            raise ValidationException(f"回调地址主机 {parsed.hostname} 不在允许列表中")
+        cls.resolve_public_address(parsed.hostname, parsed.port or (443 if parsed.scheme == 'https' else 80))
+        return url
+
+    @classmethod
+    def resolve_public_address(cls, hostname: str, port: int) -> Optional[str]:
+        """
+        解析回调主机并确认只指向公网地址。
+
+        参数:
+            hostname: 回调地址主机
+            port: 端口
+
+        返回:
+            用于连接的IP地址；主机在 ALLOWED_HOSTS 中时不检查，返回None（按主机名连接）
+
+        异常:
+            ValidationException: 主机无法解析，或任一解析结果为内网、回环、链路本地、保留等非公网地址
+        """
+        if hostname in (get_webhook_setting('ALLOWED_HOSTS') or []):
+            return None
+        try:
+            addresses = [info[4][0] for info in socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)]
+        except (socket.gaierror, UnicodeError):
+            raise ValidationException(f"无法解析回调地址主机 {hostname}")
+
+        for address in addresses:
+            ip = ipaddress.ip_address(address.split('%')[0])
+            if ip.version == 6 and ip.ipv4_mapped:
+                ip = ip.ipv4_mapped
+            if (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved
+                    or ip.is_multicast or ip.is_unspecified):
+                raise ValidationException(f"回调地址主机 {hostname} 解析到非公网地址 {ip}")
+        return addresses[0]
+
+    @classmethod
+    def sign(cls, timestamp: int, body: bytes) -> str:
+        """计算请求体签名。"""
+        secret = get_webhook_setting('SECRET', '').encode('utf-8')
+        message = f"{timestamp}.".encode('utf-8') + body
+        return 'sha256=' + hmac.new(secret, message, hashlib.sha256).hexdigest()
+
+    @classmethod
+    def notify(cls, callback_url: Optional[str], event: str, data: Dict[str, Any], reference_id: str = ''):
+        """
+        将回调事件写入后台队列（callback_url 为空时不做任何事）。
+
+        参数:
+            callback_url: 回调地址
+            event: 事件类型
+            data: 事件数据（需可JSON序列化）
+            reference_id: 关联业务对象ID
+
+        返回:
+            BackgroundJob实例，未指定回调地址时返回None
+        """
+        if not callback_url:
+            return None
+        return TaskQueueService.enqueue(
+            WEBHOOK_JOB_HANDLER,
+            payload={
+                'url': callback_url,
+                'body': {
+                    'id': uuid.uuid4().hex,
+                    'event': event,
+                    'created_at': timezone.now().isoformat(),
+                    'data': data,
+                },
+            },
+            reference_id=reference_id,
+            max_attempts=get_webhook_setting('MAX_ATTEMPTS', 6),
+        )
+
+    @classmethod
+    def deliver(cls, url: str, body: Dict[str, Any]) -> int:
+        """
+        推送一次回调事件，对方返回非2xx状态码时抛出异常。
+
+        推送前重新解析主机并校验（DNS记录可能在提交后被改为内网地址），然后直接连接校验过的IP地址，
+        Host 请求头和TLS的SNI仍使用原主机名；不跟随重定向。
+
+        返回:
+            HTTP状态码
+
+        异常:
+            ValidationException: 主机解析到非公网地址
+        """
+        content = json.dumps(body, ensure_ascii=False, default=str).encode('utf-8')
+        timestamp = int(time.time())
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'HRM2-Webhook/1.0',
+            'X-Webhook-Id': body['id'],
+            'X-Webhook-Event': body['event'],
+            'X-Webhook-Timestamp': str(timestamp),
+            'X-Webhook-Signature': cls.sign(timestamp, content),
+        }
+        target = httpx.URL(url)
+        address = cls.resolve_public_address(target.host, target.port or (443 if target.scheme == 'https' else 80))
+        extensions = {}
+        if address:
+            headers['Host'] = target.netloc.decode('ascii')
+            extensions['sni_hostname'] = target.host
+            target = target.copy_with(host=address)
+
+        with httpx.Client(timeout=get_webhook_setting('TIMEOUT', 10)) as client:
+            response = client.post(target, content=content, headers=headers, extensions=extensions)
+        response.raise_for_status()
+        return response.status_code
+
+
+def deliver_webhook_job(job):
+    """执行回调推送任务，失败时由队列退避重试。"""
+    status_code = WebhookService.deliver(job.payload['url'], job.payload['body'])
+    logger.info(f"Webhook {job.payload['body']['event']} delivered to {job.payload['url']} ({status_code})")
+
+
+def log_webhook_failed(job, error: str):
+    """队列最终失败回调：记录放弃推送的回调事件。"""
+    logger.error(f"Webhook {job.payload['body']['event']} to {job.payload['url']} abandoned: {error}")
+
+
+deliver_webhook_job.on_failure = log_webhook_failed
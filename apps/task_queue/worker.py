@@ -0,0 +1,147 @@
+"""
+后台任务工作进程模块。
+
+每个工作进程使用固定大小的线程池并发执行任务，后台心跳线程定期为持有的任务续约。
+启动时先执行恢复流程，停止时进入排空状态，长任务保存进度后重新排队。
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+from .services import TaskQueueService, get_queue_setting
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """持久化任务队列的工作进程。"""
+
+    def __init__(
+        self,
+        concurrency: int = None,
+        poll_interval: float = None,
+        lease_seconds: int = None,
+        heartbeat_interval: float = None
+    ):
+        self.concurrency = concurrency or get_queue_setting('CONCURRENCY', 4)
+        self.poll_interval = poll_interval or get_queue_setting('POLL_INTERVAL', 1.0)
+        self.lease_seconds = lease_seconds or get_queue_setting('LEASE_SECONDS', 300)
+        self.heartbeat_interval = heartbeat_interval or get_queue_setting(
+            'HEARTBEAT_INTERVAL', max(self.lease_seconds / 3, 1)
+        )
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._active = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._heartbeat_stop = threading.Event()
+
+    def stop(self):
+        """请求停止：不再领取新任务，通知执行中的任务保存进度后中断，并等待其结束。"""
+        self._stop_event.set()
+        TaskQueueService.request_drain()
+
+    def recover(self) -> int:
+        """执行启动恢复流程（恢复失败不影响工作进程启动）。"""
+        try:
+            return TaskQueueService.recover()
+        except Exception as e:
+            logger.error(f"Recovery failed: {e}", exc_info=True)
+            return 0
+        finally:
+            close_old_connections()
+
+    @property
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def run_once(self) -> bool:
+        """
+        同步领取并执行一个任务（用于 --burst 模式、测试和调试）。
+
+        返回:
+            是否领取到任务
+        """
+        job = TaskQueueService.claim_next(self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+
+        # 执行期间同样需要心跳续约，否则长任务的租约会过期并被其他进程重复执行
+        with self._lock:
+            self._active[job.id] = job
+        self._heartbeat_stop.clear()
+        heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat_thread.start()
+        try:
+            TaskQueueService.execute(job)
+        finally:
+            with self._lock:
+                self._active.pop(job.id, None)
+            self._heartbeat_stop.set()
+            heartbeat_thread.join()
+        return True
+
+    def run_forever(self):
+        """持续领取任务直到收到停止请求。"""
+        logger.info(f"Worker {self.worker_id} started (concurrency={self.concurrency})")
+
+        TaskQueueService.reset_drain()
+        self.recover()
+        self._heartbeat_stop.clear()
+        heartbeat_thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat_thread.start()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='job-worker') as executor:
+            while not self._stop_event.is_set():
+                if self.active_count >= self.concurrency:
+                    self._stop_event.wait(self.poll_interval)
+                    continue
+
+                try:
+                    job = TaskQueueService.claim_next(self.worker_id, self.lease_seconds)
+                except Exception as e:
+                    logger.error(f"Failed to claim job: {e}", exc_info=True)
+                    close_old_connections()
+                    job = None
+
+                if job is None:
+                    self._stop_event.wait(self.poll_interval)
+                    continue
+
+                with self._lock:
+                    self._active[job.id] = job
+                executor.submit(self._execute, job)
+
+        # 线程池退出时已等待所有执行中的任务结束
+        self._heartbeat_stop.set()
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def _execute(self, job):
+        """在线程池中执行任务。"""
+        close_old_connections()
+        try:
+            TaskQueueService.execute(job)
+        finally:
+            with self._lock:
+                self._active.pop(job.id, None)
+            close_old_connections()
+
+    def _heartbeat_loop(self):
+        """定期为持有的任务续约，防止长任务被其他进程抢占。"""
+        while not self._heartbeat_stop.wait(self.heartbeat_interval):
+            with self._lock:
+                job_ids = list(self._active.keys())
+            if not job_ids:
+                continue
+            try:
+                TaskQueueService.heartbeat(job_ids, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed: {e}")
+            finally:
+                close_old_connections()
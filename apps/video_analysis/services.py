@@ -5,6 +5,8 @@ import logging
 import random
 from typing import Dict, Any, Optional
 
+from .tasks import publish_progress
+
 logger = logging.getLogger(__name__)
 
 
@@ -12,12 +14,13 @@ class VideoAnalysisService:
     """视频分析操作服务类。"""
     
     @classmethod
-    def analyze_video(cls, video_analysis_id: str) -> Dict[str, Any]:
+    def analyze_video(cls, video_analysis_id: str, final_attempt: bool = True) -> Dict[str, Any]:
         """
         分析视频并更新结果。
         
         参数:
             video_analysis_id: VideoAnalysis记录的UUID
+            final_attempt: 是否为队列的最后一次尝试；不是时分析失败后状态回到等待中，由队列重试
             
         返回:
             分析结果字典
@@ -30,6 +33,7 @@ class VideoAnalysisService:
             # 更新状态为处理中
             video_analysis.status = 'processing'
             video_analysis.save()
+            publish_progress(video_analysis)
             
             # 执行分析（当前为模拟）
             results = cls._simulate_analysis()
@@ -45,6 +49,7 @@ class VideoAnalysisService:
             video_analysis.summary = results['summary']
             video_analysis.status = 'completed'
             video_analysis.save()
+            publish_progress(video_analysis)
             
             return results
             
@@ -56,9 +61,10 @@ class VideoAnalysisService:
             
             try:
                 video_analysis = VideoAnalysis.objects.get(id=video_analysis_id)
-                video_analysis.status = 'failed'
+                video_analysis.status = 'failed' if final_attempt else 'pending'
                 video_analysis.error_message = str(e)
                 video_analysis.save()
+                publish_progress(video_analysis)
             except Exception:
                 pass
             
@@ -139,4 +145,5 @@ class VideoAnalysisService:
             video_analysis.status = 'completed'
         
         video_analysis.save()
+        publish_progress(video_analysis)
         return video_analysis
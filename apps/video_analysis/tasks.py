@@ -0,0 +1,98 @@
+"""
+视频分析后台任务模块。
+
+分析出错时由队列重试，最后一次尝试仍失败时 mark_video_analysis_failed 将记录标记为失败并推送回调。
+"""
+import logging
+
+from apps.common.progress import TaskProgressStore
+from apps.task_queue.services import TaskQueueService
+from apps.task_queue.webhooks import WebhookService
+
+logger = logging.getLogger(__name__)
+
+VIDEO_ANALYSIS_JOB_HANDLER = 'apps.video_analysis.tasks.run_video_analysis_job'
+
+# 视频分析在实时进度存储中的类型名
+PROGRESS_KIND = 'video'
+
+
+def publish_progress(video_analysis):
+    """将视频分析的当前状态发布到实时进度存储（状态接口的长轮询据此判断是否变化）。"""
+    TaskProgressStore.publish(PROGRESS_KIND, video_analysis.id, status=video_analysis.status)
+
+
+def get_progress_version(video_analysis_id) -> int:
+    """获取视频分析的进度版本号，没有快照时为0。"""
+    snapshot = TaskProgressStore.get(PROGRESS_KIND, video_analysis_id)
+    return snapshot.get('version', 0) if snapshot else 0
+
+
+def enqueue_video_analysis(video_analysis, callback_url: str = None):
+    """
+    将视频分析任务写入后台队列。
+
+    参数:
+        video_analysis: VideoAnalysis实例
+        callback_url: 分析结束后推送回调的地址
+
+    返回:
+        BackgroundJob实例
+    """
+    return TaskQueueService.enqueue(
+        VIDEO_ANALYSIS_JOB_HANDLER,
+        payload={'video_analysis_id': str(video_analysis.id), 'callback_url': callback_url},
+        reference_id=str(video_analysis.id),
+    )
+
+
+def run_video_analysis_job(job):
+    """执行视频分析任务。"""
+    from .services import VideoAnalysisService
+
+    if VideoAnalysisService.analyze_video(job.payload['video_analysis_id'], final_attempt=job.is_final_attempt):
+        _notify_finished(job)
+
+
+def mark_video_analysis_failed(job, error: str):
+    """队列最终失败回调：将关联的视频分析标记为失败。"""
+    from .models import VideoAnalysis
+
+    if VideoAnalysis.objects.filter(id=job.reference_id).exclude(status='completed').update(
+        status='failed',
+        error_message=error,
+    ):
+        TaskProgressStore.publish(PROGRESS_KIND, job.reference_id, status='failed')
+        _notify_finished(job)
+
+
+run_video_analysis_job.on_failure = mark_video_analysis_failed
+
+
+def _notify_finished(job):
+    """分析结束后推送回调（提交时未指定回调地址或记录已删除时跳过）。"""
+    from .models import VideoAnalysis
+
+    callback_url = job.payload.get('callback_url')
+    if not callback_url:
+        return
+    video_analysis = VideoAnalysis.objects.filter(id=job.payload['video_analysis_id']).first()
+    if video_analysis is None:
+        return
+
+    data = {
+        'id': str(video_analysis.id),
+        'candidate_name': video_analysis.candidate_name,
+        'status': video_analysis.status,
+    }
+    if video_analysis.status == VideoAnalysis.Status.COMPLETED:
+        data.update({
+            'analysis_result': video_analysis.analysis_result,
+            'summary': video_analysis.summary,
+            'confidence_score': video_analysis.confidence_score,
+        })
+    elif video_analysis.error_message:
+        data['error_message'] = video_analysis.error_message
+    WebhookService.notify(
+        callback_url, f"video_analysis.{video_analysis.status}", data, reference_id=str(video_analysis.id)
+    )
@@ -3,13 +3,15 @@
 """
 import logging
 
-from apps.common.mixins import SafeAPIView
+from apps.common.mixins import SafeAPIView, LongPollMixin
 from apps.common.response import ApiResponse
 from apps.common.pagination import paginate_queryset
 from apps.common.exceptions import ValidationException, NotFoundException
+from apps.task_queue.webhooks import WebhookService
 
 from .models import VideoAnalysis
 from .services import VideoAnalysisService
+from .tasks import PROGRESS_KIND, enqueue_video_analysis, get_progress_version
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +19,7 @@ logger = logging.getLogger(__name__)
 class VideoAnalysisView(SafeAPIView):
     """
     视频分析API
-    POST: 上传视频并开始分析
+    POST: 上传视频并开始分析（指定 callback_url 时，分析结束后推送签名的回调事件）
     """
     
     def handle_post(self, request):
@@ -27,6 +29,7 @@ class VideoAnalysisView(SafeAPIView):
         position_applied = self.get_param(request, 'position_applied', required=True)
         resume_data_id = self.get_param(request, 'resume_data_id')
         video_name = self.get_param(request, 'video_name') or (video_file.name if video_file else None)
+        callback_url = WebhookService.validate_callback_url(self.get_param(request, 'callback_url'))
         
         if not video_file:
             raise ValidationException("缺少参数: video_file")
@@ -58,8 +61,7 @@ class VideoAnalysisView(SafeAPIView):
             resume_data.video_analysis = video_analysis
             resume_data.save()
         
-        # 开始分析
-        self._start_analysis(video_analysis)
+        enqueue_video_analysis(video_analysis, callback_url=callback_url)
         
         response_data = {
             "id": str(video_analysis.id),
@@ -78,38 +80,44 @@ class VideoAnalysisView(SafeAPIView):
             data=response_data,
             message="视频数据接收成功，分析已在后台开始"
         )
-    
-    def _start_analysis(self, video_analysis):
-        """在后台启动视频分析（使用线程）。"""
-        import threading
-        import time
-        
-        def run_analysis():
-            time.sleep(1)  # 短暂延迟确保响应先返回
-            VideoAnalysisService.analyze_video(str(video_analysis.id))
-        
-        thread = threading.Thread(target=run_analysis)
-        thread.daemon = True
-        thread.start()
-        logger.info(f"Started thread for video analysis {video_analysis.id}")
 
 
-class VideoAnalysisStatusView(SafeAPIView):
+class VideoAnalysisStatusView(LongPollMixin, SafeAPIView):
     """
     视频分析状态API
     GET: 获取视频分析状态和结果
+    
+    version 为进度版本号（状态变化时递增）。传入 since_version 和 wait（秒，最长60）时为长轮询：
+    版本号仍等于 since_version 的未结束分析，在版本号变化或等待超时后才返回。
     """
     
+    progress_kind = PROGRESS_KIND
+    FINISHED_STATUSES = ('completed', 'failed')
+    
     def handle_get(self, request, video_id):
         """获取视频分析状态。"""
         video_analysis = self.get_object_or_404(VideoAnalysis, id=video_id)
         
+        if video_analysis.status not in self.FINISHED_STATUSES:
+            response = self.long_poll_response(
+                request, video_analysis.id, get_progress_version(video_analysis.id),
+                lambda: self._build_status(self.get_object_or_404(VideoAnalysis, id=video_id))
+            )
+            if response is not None:
+                return response
+        
+        # 返回与原版一致的格式
+        return ApiResponse.success(data=self._build_status(video_analysis))
+    
+    def _build_status(self, video_analysis):
+        """生成视频分析状态数据。"""
         response_data = {
             "id": str(video_analysis.id),
             "video_name": video_analysis.video_name,
             "candidate_name": video_analysis.candidate_name,
             "position_applied": video_analysis.position_applied,
             "status": video_analysis.status,
+            "version": get_progress_version(video_analysis.id),
             "created_at": video_analysis.created_at.isoformat()
         }
         
@@ -123,8 +131,7 @@ class VideoAnalysisStatusView(SafeAPIView):
         if video_analysis.status == 'failed' and video_analysis.error_message:
             response_data["error_message"] = video_analysis.error_message
         
-        # 返回与原版一致的格式
-        return ApiResponse.success(data=response_data)
+        return response_data
 
 
 class VideoAnalysisUpdateView(SafeAPIView):
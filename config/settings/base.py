@@ -42,6 +42,7 @@ LOCAL_APPS = [
     'apps.video_analysis',
     'apps.interview_assist',
     'apps.final_recommend',
+    'apps.task_queue',  # 后台任务队列（run_workers）
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -165,6 +166,66 @@ SPECTACULAR_SETTINGS = {
     'SORT_OPERATIONS': False,
 }
 
+# 缓存配置：任务实时进度保存在缓存中，Web进程与工作进程必须共享同一缓存后端
+# 配置 REDIS_URL 时使用 Redis（需安装 redis 包），否则使用本机文件缓存（单机多进程共享）
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'data' / 'django_cache',
+        }
+    }
+
+# 后台任务队列配置（python manage.py run_workers）
+TASK_QUEUE = {
+    'CONCURRENCY': int(os.getenv('TASK_QUEUE_CONCURRENCY', '4')),  # 单个工作进程的并发任务数
+    'POLL_INTERVAL': float(os.getenv('TASK_QUEUE_POLL_INTERVAL', '1')),  # 空队列轮询间隔（秒）
+    'LEASE_SECONDS': int(os.getenv('TASK_QUEUE_LEASE_SECONDS', '300')),  # 任务租约时长（秒）
+    'HEARTBEAT_INTERVAL': float(os.getenv('TASK_QUEUE_HEARTBEAT_INTERVAL', '60')),  # 心跳续约间隔（秒）
+    'MAX_ATTEMPTS': int(os.getenv('TASK_QUEUE_MAX_ATTEMPTS', '3')),  # 最大尝试次数
+    'RETRY_BACKOFF_BASE': float(os.getenv('TASK_QUEUE_RETRY_BACKOFF_BASE', '10')),  # 重试退避基数（秒）
+    'RETRY_BACKOFF_MAX': float(os.getenv('TASK_QUEUE_RETRY_BACKOFF_MAX', '600')),  # 重试退避上限（秒）
+}
+
+# 任务完成回调配置（提交任务时指定 callback_url）
+WEBHOOK = {
+    'SECRET': os.getenv('WEBHOOK_SECRET', ''),  # 回调签名密钥，未配置时不接受 callback_url
+    'TIMEOUT': float(os.getenv('WEBHOOK_TIMEOUT', '10')),  # 单次推送超时（秒）
+    'MAX_ATTEMPTS': int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '6')),  # 最大推送次数，按队列退避策略重试
+    'ALLOWED_HOSTS': [h.strip() for h in os.getenv('WEBHOOK_ALLOWED_HOSTS', '').split(',') if h.strip()],  # 允许回调的主机，留空不限制（不在列表中的主机禁止解析到内网等非公网地址）
+}
+
+# LLM密集型接口的准入控制（过载时返回429/503和Retry-After，0表示不限制）
+ADMISSION = {
+    'MAX_QUEUE_DEPTH': int(os.getenv('ADMISSION_MAX_QUEUE_DEPTH', '100')),  # 等待中的后台任务数上限，达到后筛选和综合分析提交返回429
+    'LLM_SATURATION_THRESHOLD': float(os.getenv('ADMISSION_LLM_SATURATION_THRESHOLD', '0.9')),  # 所有进程的LLM用量达到额度的该比例时视为饱和（0关闭）
+    'SATURATED_QUEUE_DEPTH': int(os.getenv('ADMISSION_SATURATED_QUEUE_DEPTH', '10')),  # LLM饱和时等待中的后台任务数上限
+    'MAX_INTERACTIVE_IN_FLIGHT': int(os.getenv('ADMISSION_MAX_INTERACTIVE_IN_FLIGHT', '16')),  # 同时进行中的面试辅助请求数上限，达到后返回503
+    'DEFAULT_JOB_SECONDS': float(os.getenv('ADMISSION_DEFAULT_JOB_SECONDS', '60')),  # 没有历史数据时估算等待时间使用的任务耗时（秒）
+    'DEFAULT_INTERACTIVE_SECONDS': float(os.getenv('ADMISSION_DEFAULT_INTERACTIVE_SECONDS', '10')),  # 没有历史数据时交互请求的预计耗时（秒）
+}
+
+# 简历筛选配置
+RESUME_SCREENING = {
+    'RESUME_CONCURRENCY': int(os.getenv('SCREENING_RESUME_CONCURRENCY', '3')),  # 单个筛选任务内并发筛选的简历数
+    'MAX_CONCURRENT_RESUMES': int(os.getenv('SCREENING_MAX_CONCURRENT_RESUMES', '6')),  # 单个工作进程内所有任务共享的简历名额（按优先级轮转分配）
+    'MODE': os.getenv('SCREENING_MODE', 'group_chat'),  # 执行模式：group_chat / sequential / parallel
+    'ISOLATE_CONTEXT': os.getenv('SCREENING_ISOLATE_CONTEXT', 'False').lower() in ('1', 'true', 'yes'),  # 专家上下文隔离（同时跳过Assistant发言）
+    'LEAN': os.getenv('SCREENING_LEAN', 'False').lower() in ('1', 'true', 'yes'),  # 跳过Assistant发言
+    # 提前淘汰阈值：HR评分和技术评分均低于该值时跳过项目经理专家并直接判定不匹配（留空则关闭）
+    'EARLY_EXIT_THRESHOLD': float(os.getenv('SCREENING_EARLY_EXIT_THRESHOLD')) if os.getenv('SCREENING_EARLY_EXIT_THRESHOLD') else None,
+    'RESULT_CACHE': os.getenv('SCREENING_RESULT_CACHE', 'True').lower() in ('1', 'true', 'yes'),  # 复用相同简历和岗位标准的筛选结果
+    'PROGRESS_DB_FLUSH_INTERVAL': float(os.getenv('SCREENING_PROGRESS_DB_FLUSH_INTERVAL', '5')),  # 实时进度写入数据库的最短间隔（秒），实时进度保存在缓存中
+    'IDEMPOTENCY_WINDOW': int(os.getenv('SCREENING_IDEMPOTENCY_WINDOW', '600')),  # 重复提交去重窗口（秒），窗口内重复提交返回已有任务，0表示关闭
+}
+
 # CORS跨域配置
 CORS_ALLOW_ALL_ORIGINS = True  # 生产环境中需要修改
 CORS_ALLOW_CREDENTIALS = True
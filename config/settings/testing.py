@@ -13,6 +13,13 @@ DATABASES = {
     }
 }
 
+# 测试使用进程内缓存
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # 使用更快的密码哈希器进行测试
 PASSWORD_HASHERS = [
     'django.contrib.auth.hashers.MD5PasswordHasher',
@@ -1,12 +1,35 @@
-from .screening_agents import create_screening_agents, ScreeningAgentManager
+from .screening_agents import (
+    create_screening_agents,
+    ScreeningAgentManager,
+    SCREENING_MODES,
+    SCREENING_MODE_GROUP_CHAT,
+    SCREENING_MODE_SEQUENTIAL,
+    SCREENING_MODE_PARALLEL,
+    SCREENING_PROMPT_VERSION,
+    SCREENING_ROLES,
+)
 from .evaluation_agents import (
     CandidateComprehensiveAnalyzer,
     RUBRIC_SCALES,
     EVALUATION_DIMENSIONS,
     RECOMMENDATION_LEVELS
 )
-from .base import BaseAgentManager
-from .llm_config import get_llm_config, get_config_list, get_embedding_config, validate_llm_config, get_llm_status
+from .base import BaseAgentManager, AgentRunCancelled
+from .llm_config import (
+    get_llm_config,
+    get_config_list,
+    get_embedding_config,
+    validate_llm_config,
+    get_llm_status,
+    get_role_model,
+    get_role_tiers,
+    LLM_ROLES,
+)
+from .llm_cache import LLMResponseCache, get_llm_cache, cached_chat_completion
+from .llm_client import get_openai_client, get_http_client, get_llm_metrics
+from .llm_router import get_routed_client, rank_endpoints
+from .llm_usage import LLMUsageStats, get_llm_usage_stats
+from .llm_limiter import EndpointRateLimiter, llm_lane, LANE_BULK, LANE_INTERACTIVE
 from .position_ai_service import PositionAIService, get_position_ai_service
 from .dev_tools_service import DevToolsService, get_dev_tools_service
 from .interview_assist_agent import InterviewAssistAgent, get_interview_assist_agent
@@ -15,7 +38,14 @@ __all__ = [
     # 代理相关
     'create_screening_agents',
     'BaseAgentManager',
+    'AgentRunCancelled',
     'ScreeningAgentManager',
+    'SCREENING_MODES',
+    'SCREENING_MODE_GROUP_CHAT',
+    'SCREENING_MODE_SEQUENTIAL',
+    'SCREENING_MODE_PARALLEL',
+    'SCREENING_PROMPT_VERSION',
+    'SCREENING_ROLES',
     # 综合分析评估
     'CandidateComprehensiveAnalyzer',
     'RUBRIC_SCALES',
@@ -27,6 +57,28 @@ __all__ = [
     'get_embedding_config',
     'validate_llm_config',
     'get_llm_status',
+    # 分角色模型层级与用量统计
+    'get_role_model',
+    'get_role_tiers',
+    'LLM_ROLES',
+    'LLMUsageStats',
+    'get_llm_usage_stats',
+    # LLM响应缓存
+    'LLMResponseCache',
+    'get_llm_cache',
+    'cached_chat_completion',
+    # 共享LLM客户端
+    'get_openai_client',
+    'get_http_client',
+    'get_llm_metrics',
+    # 多端点路由
+    'get_routed_client',
+    'rank_endpoints',
+    # LLM请求限流
+    'EndpointRateLimiter',
+    'llm_lane',
+    'LANE_BULK',
+    'LANE_INTERACTIVE',
     # 岗位AI服务
     'PositionAIService',
     'get_position_ai_service',
@@ -7,6 +7,10 @@ from typing import List, Dict, Any, Callable, Optional
 from .llm_config import get_llm_config
 
 
+class AgentRunCancelled(Exception):
+    """对话在发言之间被取消。"""
+
+
 class BaseAgentManager:
     """管理autogen代理的基类。"""
     
@@ -17,6 +21,9 @@ class BaseAgentManager:
         self.group_chat = None
         self.manager = None
         self.current_task = None
+        self.progress_callback = None
+        self.cancel_check = None
+        self.cancelled = False
         self.messages = []
         self.speakers = []
     
@@ -24,6 +31,30 @@ class BaseAgentManager:
         """设置当前任务以便进度跟踪。"""
         self.current_task = task
     
+    def set_progress_callback(self, callback: Callable[[str, int], None]):
+        """
+        设置发言进度回调，设置后发言人变化不再直接写入任务，而是交给回调处理。
+        
+        参数:
+            callback: 回调函数 callback(speaker_name, step)
+        """
+        self.progress_callback = callback
+    
+    def set_cancel_check(self, check: Callable[[], bool]):
+        """
+        设置取消检查函数，返回True后在下一次发言前停止对话，不再调用LLM。
+        
+        参数:
+            check: 检查函数 check() -> bool
+        """
+        self.cancel_check = check
+    
+    def is_cancelled(self) -> bool:
+        """检查对话是否已被取消。"""
+        if not self.cancelled and self.cancel_check and self.cancel_check():
+            self.cancelled = True
+        return self.cancelled
+    
     def create_group_chat(
         self,
         agents: List[autogen.Agent],
@@ -57,6 +88,17 @@ class BaseAgentManager:
         )
         return self.manager
     
+    @staticmethod
+    def estimate_tokens(text: Any) -> int:
+        """
+        粗略估算文本的token数：中日韩字符按1个token计，其余字符按4个字符1个token计。
+        """
+        if not text:
+            return 0
+        text = str(text)
+        cjk = sum(1 for ch in text if '\u4e00' <= ch <= '\u9fff' or '\u3000' <= ch <= '\u303f' or '\uff00' <= ch <= '\uffef')
+        return cjk + (len(text) - cjk + 3) // 4
+    
     @staticmethod
     def default_termination_checker(content: Any) -> bool:
         """默认终止条件检查器。"""
@@ -76,13 +118,18 @@ class BaseAgentManager:
             speaker_name: 当前发言的agent名称
             step: 当前步骤数（1-6），会自动转换为百分比进度
         """
+        if self.progress_callback:
+            self.progress_callback(speaker_name, step)
+            return
+        
         if self.current_task:
             self.current_task.current_speaker = speaker_name
             if step is not None:
                 # 按agent总数计算百分比进度（0-100）
                 progress_percent = int((step / self.TOTAL_AGENTS) * 100)
                 self.current_task.progress = min(progress_percent, 99)  # 保留最后1%给完成状态
-            self.current_task.save()
+            # 只写入变更的字段，避免覆盖其他进程并发写入的状态
+            self.current_task.save(update_fields=['current_speaker', 'progress'])
     
     def run_chat(self, initiator: autogen.Agent, message: str):
         """运行代理聊天。"""
@@ -91,4 +138,6 @@ class BaseAgentManager:
         
         initiator.initiate_chat(self.manager, message=message)
         self.messages = self.group_chat.messages if self.group_chat else []
+        if self.cancelled:
+            raise AgentRunCancelled("对话已取消")
         return self.messages
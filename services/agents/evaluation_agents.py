@@ -13,8 +13,9 @@
 import json
 import logging
 from typing import Dict, Any, List, Optional
-from openai import OpenAI
-from .llm_config import get_config_list
+from .llm_config import ROLE_EVALUATION_DIMENSION, ROLE_EVALUATION_REPORT, get_config_list, get_role_model
+from .llm_cache import cached_chat_completion
+from .llm_router import get_routed_client
 
 logger = logging.getLogger(__name__)
 
@@ -119,14 +120,13 @@ class CandidateComprehensiveAnalyzer:
         self.api_key = llm_config.get('api_key', '')
         self.base_url = llm_config.get('base_url', 'https://api.openai.com/v1')
         self.model = llm_config.get('model', 'gpt-4')
+        # 维度评估与综合报告可分别指定模型层级（见 LLM_ROLE_TIERS）
+        self.dimension_model = get_role_model(ROLE_EVALUATION_DIMENSION)
+        self.report_model = get_role_model(ROLE_EVALUATION_REPORT)
         self.timeout = 120
         
-        # 初始化 OpenAI 客户端
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-            timeout=self.timeout
-        )
+        # 获取共享的 OpenAI 客户端（按请求在多个端点间路由）
+        self.client = get_routed_client(self.timeout)
     
     def analyze(
         self,
@@ -356,16 +356,17 @@ class CandidateComprehensiveAnalyzer:
 请严格按照 Rubric 量表给出评分和分析。"""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = cached_chat_completion(
+                self.client,
+                'evaluation',
+                model=self.dimension_model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                temperature=0.3
-            )
-            
-            content = response.choices[0].message.content.strip()
+                temperature=0.3,
+                role=ROLE_EVALUATION_DIMENSION,
+            ).strip()
             
             # 清理 markdown 代码块
             if content.startswith("```json"):
@@ -478,16 +479,17 @@ class CandidateComprehensiveAnalyzer:
 4. 最终建议"""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return cached_chat_completion(
+                self.client,
+                'evaluation',
+                model=self.report_model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                temperature=0.4
-            )
-            
-            return response.choices[0].message.content.strip()
+                temperature=0.4,
+                role=ROLE_EVALUATION_REPORT,
+            ).strip()
             
         except Exception as e:
             logger.error(f"生成综合报告失败: {e}")
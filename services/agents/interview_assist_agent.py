@@ -5,9 +5,12 @@
 import json
 import logging
 from typing import Dict, List, Any, Optional
-from openai import OpenAI
 
-from .llm_config import get_config_list
+from .llm_config import (
+    ROLE_INTERVIEW_QUESTIONS, ROLE_INTERVIEW_EVALUATION, ROLE_INTERVIEW_REPORT, get_config_list, get_role_model
+)
+from .llm_cache import cached_chat_completion
+from .llm_router import get_routed_client
 
 logger = logging.getLogger(__name__)
 
@@ -355,15 +358,22 @@ class InterviewAssistAgent:
         self.model = llm_config.get('model', 'gpt-3.5-turbo')
         self.temperature = llm_config.get('temperature', 0.7)
         self.timeout = 120
+        # 各阶段可分别指定模型层级（见 LLM_ROLE_TIERS）
+        self.role_models = {
+            role: get_role_model(role)
+            for role in (ROLE_INTERVIEW_QUESTIONS, ROLE_INTERVIEW_EVALUATION, ROLE_INTERVIEW_REPORT)
+        }
         
-        # 初始化OpenAI客户端
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-            timeout=self.timeout
-        )
+        # 获取共享的OpenAI客户端（按请求在多个端点间路由）
+        self.client = get_routed_client(self.timeout)
     
-    def _call_llm(self, system_prompt: str, user_prompt: str, temperature: float = None) -> Dict:
+    def _call_llm(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = None,
+        role: str = ROLE_INTERVIEW_QUESTIONS
+    ) -> Dict:
         """
         调用LLM并返回解析后的JSON结果。
         
@@ -371,25 +381,25 @@ class InterviewAssistAgent:
             system_prompt: 系统提示词
             user_prompt: 用户提示词
             temperature: 温度参数（可选）
+            role: 调用角色，决定使用的模型层级
             
         返回:
             解析后的JSON字典
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            content = cached_chat_completion(
+                self.client,
+                'interview_assist',
+                model=self.role_models.get(role, self.model),
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=temperature if temperature is not None else self.temperature,
+                role=role,
             )
             
             # 检查响应是否有效
-            if not response or not response.choices:
-                raise ValueError("LLM 返回空响应")
-            
-            content = response.choices[0].message.content
             if content is None:
                 raise ValueError("LLM 返回内容为空")
             
@@ -456,7 +466,7 @@ class InterviewAssistAgent:
         )
         
         try:
-            result = self._call_llm(system_prompt, user_prompt, temperature=0.7)
+            result = self._call_llm(system_prompt, user_prompt, temperature=0.7, role=ROLE_INTERVIEW_QUESTIONS)
             
             # 处理返回的问题
             questions = []
@@ -573,7 +583,7 @@ class InterviewAssistAgent:
         )
         
         try:
-            result = self._call_llm(system_prompt, user_prompt, temperature=0.7)
+            result = self._call_llm(system_prompt, user_prompt, temperature=0.7, role=ROLE_INTERVIEW_QUESTIONS)
             
             questions = []
             for q in result.get('questions', [])[:count]:
@@ -659,7 +669,7 @@ class InterviewAssistAgent:
         )
         
         try:
-            result = self._call_llm(system_prompt, user_prompt, temperature=0.3)
+            result = self._call_llm(system_prompt, user_prompt, temperature=0.3, role=ROLE_INTERVIEW_EVALUATION)
             
             # 确保返回的数据结构完整
             evaluation = {
@@ -761,7 +771,7 @@ class InterviewAssistAgent:
         )
         
         try:
-            result = self._call_llm(system_prompt, user_prompt, temperature=0.6)
+            result = self._call_llm(system_prompt, user_prompt, temperature=0.6, role=ROLE_INTERVIEW_QUESTIONS)
             
             return {
                 "followup_suggestions": result.get("followup_suggestions", []),
@@ -822,7 +832,7 @@ class InterviewAssistAgent:
         )
         
         try:
-            result = self._call_llm(system_prompt, user_prompt, temperature=0.4)
+            result = self._call_llm(system_prompt, user_prompt, temperature=0.4, role=ROLE_INTERVIEW_REPORT)
             
             # 确保返回完整的报告结构
             report = {
@@ -921,7 +931,7 @@ class InterviewAssistAgent:
         )
         
         try:
-            result = self._call_llm(system_prompt, user_prompt, temperature=0.7)
+            result = self._call_llm(system_prompt, user_prompt, temperature=0.7, role=ROLE_INTERVIEW_QUESTIONS)
             
             questions = []
             for q in result.get('candidate_questions', [])[:total_count]:
@@ -0,0 +1,255 @@
+"""
+LLM响应缓存模块。
+
+以 (模型, 消息, 温度, seed) 的内容哈希为键，将LLM回复缓存在本地SQLite文件中，
+支持过期时间、条目上限和按最近访问时间淘汰（LRU）。缓存文件可被多个进程共享。
+
+缓存按调用点显式开启（LLM_CACHE_SITES），未开启的调用点行为与直接调用LLM完全一致。
+各调用点的命中/未命中次数持久化在同一缓存文件中，可通过 `python manage.py llm_cache` 查看。
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional
+
+from .llm_config import ROLE_HEADER, get_llm_cache_config
+
+logger = logging.getLogger(__name__)
+
+# 依赖随机性的调用点（如生成随机测试简历），不受 LLM_CACHE_SITES=* 影响，只能显式开启
+NON_DETERMINISTIC_SITES = {'dev_tools'}
+
+
+class LLMResponseCache:
+    """基于SQLite的LLM响应缓存。"""
+
+    def __init__(self, path: str, ttl: int = 7 * 24 * 3600, max_entries: int = 10000):
+        """
+        初始化缓存。
+
+        参数:
+            path: SQLite缓存文件路径
+            ttl: 缓存有效期（秒），0表示永不过期
+            max_entries: 最大条目数，超出后淘汰最久未访问的条目
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hit_count INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses (last_access)")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache_stats (
+                    call_site TEXT PRIMARY KEY,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: Optional[float] = None, seed: Optional[int] = None) -> str:
+        """根据请求内容生成缓存键。"""
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "seed": seed},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存内容，不存在或已过期时返回None。"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT content, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            content, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE llm_responses SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (now, key)
+            )
+            return content
+
+    def set(self, key: str, model: str, content: str) -> None:
+        """写入缓存内容，并在超出条目上限时淘汰最久未访问的条目。"""
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO llm_responses (key, model, content, created_at, last_access, hit_count)
+                VALUES (?, ?, ?, ?, ?, 0)""",
+                (key, model, content, now, now)
+            )
+            if self.ttl:
+                conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl,))
+            if self.max_entries:
+                conn.execute(
+                    """DELETE FROM llm_responses WHERE key IN (
+                        SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )""",
+                    (self.max_entries,)
+                )
+
+    def clear(self) -> int:
+        """清空缓存条目和命中统计，返回删除的条目数。"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM llm_cache_stats")
+            return conn.execute("DELETE FROM llm_responses").rowcount
+
+    def record(self, call_site: str, hit: bool) -> None:
+        """记录调用点的命中/未命中次数（持久化，多进程累计）。"""
+        column = "hits" if hit else "misses"
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"""INSERT INTO llm_cache_stats (call_site, {column}) VALUES (?, 1)
+                ON CONFLICT(call_site) DO UPDATE SET {column} = {column} + 1""",
+                (call_site,)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计。
+
+        返回:
+            包含条目数、累计命中次数和各调用点命中/未命中计数的字典
+        """
+        with closing(self._connect()) as conn:
+            entries, total_hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hit_count), 0) FROM llm_responses"
+            ).fetchone()
+            counters = {
+                site: {"hits": hits, "misses": misses}
+                for site, hits, misses in conn.execute(
+                    "SELECT call_site, hits, misses FROM llm_cache_stats ORDER BY call_site"
+                )
+            }
+        return {
+            "path": self.path,
+            "entries": entries,
+            "total_hits": total_hits,
+            "call_sites": counters,
+        }
+
+
+_cache_instance: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """获取LLM响应缓存单例。"""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                config = get_llm_cache_config()
+                _cache_instance = LLMResponseCache(
+                    path=config["path"],
+                    ttl=config["ttl"],
+                    max_entries=config["max_entries"],
+                )
+    return _cache_instance
+
+
+def is_cache_enabled(call_site: str) -> bool:
+    """判断调用点是否开启了响应缓存（'*' 不包含依赖随机性的调用点）。"""
+    sites = get_llm_cache_config()["sites"]
+    if call_site in sites:
+        return True
+    return '*' in sites and call_site not in NON_DETERMINISTIC_SITES
+
+
+def cached_chat_completion(
+    client,
+    call_site: str,
+    model: str,
+    messages: List[Dict],
+    temperature: Optional[float] = None,
+    seed: Optional[int] = None,
+    role: Optional[str] = None,
+) -> Optional[str]:
+    """
+    调用 chat.completions.create 并返回回复文本，调用点开启缓存时优先读取缓存。
+
+    参数:
+        client: OpenAI客户端
+        call_site: 调用点名称（用于按调用点开启缓存和统计命中率）
+        model: 模型名称
+        messages: 消息列表
+        temperature: 温度参数
+        seed: 随机种子
+        role: 调用角色（按角色统计用量，模型由调用方按 get_role_model(role) 选择）
+
+    返回:
+        回复文本，LLM返回空响应时为None
+    """
+    params = {"model": model, "messages": messages}
+    if temperature is not None:
+        params["temperature"] = temperature
+    if seed is not None:
+        params["seed"] = seed
+    if role:
+        params["extra_headers"] = {ROLE_HEADER: role}
+
+    if not is_cache_enabled(call_site):
+        return _extract_content(client.chat.completions.create(**params))
+
+    cache = get_llm_cache()
+    key = cache.make_key(model, messages, temperature, seed)
+    try:
+        cached = cache.get(key)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache read failed ({call_site}): {e}")
+        cached = None
+    if cached is not None:
+        _record(cache, call_site, hit=True)
+        return cached
+
+    _record(cache, call_site, hit=False)
+    content = _extract_content(client.chat.completions.create(**params))
+    if content:
+        try:
+            cache.set(key, model, content)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed ({call_site}): {e}")
+    return content
+
+
+def _record(cache: LLMResponseCache, call_site: str, hit: bool) -> None:
+    """记录命中统计，统计写入失败不影响调用。"""
+    try:
+        cache.record(call_site, hit)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM cache stats update failed ({call_site}): {e}")
+
+
+def _extract_content(response) -> Optional[str]:
+    """从LLM响应中取出回复文本。"""
+    if not response or not response.choices:
+        return None
+    return response.choices[0].message.content
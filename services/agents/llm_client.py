@@ -0,0 +1,199 @@
+"""
+LLM客户端注册表模块。
+
+进程内按 (base_url, api_key) 共享 OpenAI 客户端和 HTTP 客户端，同一服务地址的 HTTP 客户端
+共用一个带 keep-alive 的连接池，避免每次请求都重新建立连接和TLS握手。autogen 代理通过
+get_llm_config() 中的 http_client 复用同一连接池。
+
+每个共享HTTP客户端对应一个调用端点（服务地址 + API密钥），挂有该端点的限流器（见 llm_limiter），
+经过它的所有请求都受并发数与RPM/TPM限制；限流器之外是容错层（见 llm_resilience），负责重试、熔断和对冲请求，
+OpenAI SDK 自身的重试因此关闭，避免重试次数叠加。带 X-LLM-Role 请求头的请求按角色统计用量
+（见 llm_usage）。
+
+在 fork 出的子进程（如 gunicorn --preload 的工作进程）中注册表会被清空并重新创建，
+不会与父进程共用套接字。
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import OpenAI
+
+from .llm_config import ROLE_HEADER, get_rate_limit_config, get_resilience_config
+from .llm_limiter import EndpointRateLimiter, estimate_request_tokens, response_total_tokens
+from .llm_resilience import ResilientSender, reset_executor
+from .llm_usage import record_role_usage
+
+
+class SharedHttpClient(httpx.Client):
+    """
+    进程内共享的HTTP客户端。
+
+    autogen 会深拷贝 llm_config，拷贝时返回自身以保证所有代理共用同一连接池。
+    请求经过容错层（重试、熔断、对冲），每次实际发出前先向限流器排队获取额度，
+    响应返回后按实际token用量修正预算；带角色请求头的请求结束后记录该角色的用量。
+    """
+    
+    limiter: Optional[EndpointRateLimiter] = None
+    resilience: Optional[ResilientSender] = None
+    
+    def send(self, request, **kwargs):
+        role = request.headers.pop(ROLE_HEADER, None)
+        if role is None:
+            return self._send_resilient(request, **kwargs)
+        started = time.monotonic()
+        try:
+            response = self._send_resilient(request, **kwargs)
+        except Exception:
+            record_role_usage(role, request, None, time.monotonic() - started)
+            raise
+        record_role_usage(role, request, response, time.monotonic() - started)
+        return response
+    
+    def _send_resilient(self, request, **kwargs):
+        if self.resilience is None:
+            return self._send_limited(request, **kwargs)
+        return self.resilience.send(
+            lambda: self._send_limited(request, **kwargs),
+            hedgeable=not kwargs.get('stream')
+        )
+    
+    def _send_limited(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+        estimated = estimate_request_tokens(request.content)
+        with self.limiter.limit(estimated):
+            response = super().send(request, **kwargs)
+        self.limiter.settle(estimated, response_total_tokens(response))
+        return response
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+_lock = threading.RLock()
+_http_clients: Dict[Tuple[str, str], SharedHttpClient] = {}
+_transports: Dict[str, httpx.HTTPTransport] = {}
+_openai_clients: Dict[Tuple[str, str, Optional[float]], OpenAI] = {}
+
+
+def get_http_pool_limits() -> httpx.Limits:
+    """从环境变量读取连接池配置。"""
+    return httpx.Limits(
+        max_connections=int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '100')),
+        max_keepalive_connections=int(os.getenv('LLM_HTTP_MAX_KEEPALIVE', '20')),
+        keepalive_expiry=float(os.getenv('LLM_HTTP_KEEPALIVE_EXPIRY', '60')),
+    )
+
+
+def get_endpoint_id(base_url: str, api_key: str = '') -> str:
+    """
+    调用端点的标识（用于指标和日志）：服务地址，带API密钥时附加密钥摘要的前8位。
+    """
+    base_url = (base_url or '').rstrip('/')
+    if not api_key:
+        return base_url
+    return f"{base_url}#{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:8]}"
+
+
+def get_http_client(base_url: str, api_key: str = '') -> SharedHttpClient:
+    """
+    获取调用端点对应的共享HTTP客户端。
+
+    参数:
+        base_url: LLM服务地址
+        api_key: API密钥（同一服务地址的不同密钥各自限流、熔断，但共用连接池）
+
+    返回:
+        带 keep-alive 连接池、限流器和容错层的HTTP客户端（请求超时由 OpenAI 客户端按请求设置）
+    """
+    base_url = (base_url or '').rstrip('/')
+    key = (base_url, api_key or '')
+    client = _http_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _http_clients.get(key)
+            if client is None:
+                transport = _transports.get(base_url)
+                if transport is None:
+                    transport = _transports[base_url] = httpx.HTTPTransport(limits=get_http_pool_limits())
+                client = SharedHttpClient(transport=transport, follow_redirects=True)
+                endpoint = get_endpoint_id(base_url, api_key)
+                client.limiter = EndpointRateLimiter(endpoint=endpoint, **get_rate_limit_config())
+                client.resilience = ResilientSender(endpoint=endpoint, **get_resilience_config())
+                _http_clients[key] = client
+    return client
+
+
+def get_openai_client(api_key: str, base_url: str, timeout: Optional[float] = None) -> OpenAI:
+    """
+    获取共享的 OpenAI 客户端。
+
+    参数:
+        api_key: API密钥
+        base_url: 服务地址
+        timeout: 请求超时（秒）
+
+    返回:
+        OpenAI客户端实例，相同参数返回同一实例
+    """
+    key = ((base_url or '').rstrip('/'), api_key or '', timeout)
+    client = _openai_clients.get(key)
+    if client is None:
+        http_client = get_http_client(base_url, api_key)
+        with _lock:
+            client = _openai_clients.get(key)
+            if client is None:
+                client = OpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    timeout=timeout,
+                    http_client=http_client,
+                    max_retries=0,
+                )
+                _openai_clients[key] = client
+    return client
+
+
+def reset_clients():
+    """
+    清空客户端注册表。
+
+    fork 后在子进程中调用：父进程的连接不能跨进程复用，直接丢弃引用而不关闭，
+    以免影响父进程仍在使用的套接字。
+    """
+    global _lock
+    _lock = threading.RLock()
+    _http_clients.clear()
+    _transports.clear()
+    _openai_clients.clear()
+    reset_executor()
+
+
+def get_llm_metrics() -> Dict[str, Dict]:
+    """
+    获取进程内各调用端点的LLM请求指标。
+
+    返回:
+        端点标识（见 get_endpoint_id）到指标快照的映射（尝试次数、按结果计数、重试/对冲次数、
+        延迟分位数、错误率、熔断状态、当前并发数）
+    """
+    metrics = {}
+    for client in list(_http_clients.values()):
+        if client.resilience is not None:
+            metrics[client.resilience.endpoint] = dict(
+                client.resilience.metrics.snapshot(),
+                circuit=client.resilience.breaker.state,
+                in_flight=client.limiter.stats()["in_flight"] if client.limiter else 0,
+            )
+    return metrics
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_clients)
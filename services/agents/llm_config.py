@@ -2,46 +2,277 @@
 LLM配置管理模块。
 从环境变量加载API密钥和设置。
 """
+import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from dotenv import load_dotenv
 
 # 加载环境变量
 load_dotenv()
 
+# 调用角色：可通过 LLM_ROLE_TIERS 分别指定模型层级，用量按角色统计（见 llm_usage）
+ROLE_SCREENING_ASSISTANT = 'screening_assistant'    # 简历筛选：协调员
+ROLE_SCREENING_EXPERT = 'screening_expert'          # 简历筛选：HR、技术、项目经理三位专家
+ROLE_SCREENING_CRITIC = 'screening_critic'          # 简历筛选：综合评审
+ROLE_INTERVIEW_QUESTIONS = 'interview_questions'    # 面试辅助：生成问题和追问建议
+ROLE_INTERVIEW_EVALUATION = 'interview_evaluation'  # 面试辅助：评估回答
+ROLE_INTERVIEW_REPORT = 'interview_report'          # 面试辅助：最终面试报告
+ROLE_EVALUATION_DIMENSION = 'evaluation_dimension'  # 综合分析：单维度评估
+ROLE_EVALUATION_REPORT = 'evaluation_report'        # 综合分析：综合报告
+ROLE_POSITION_AI = 'position_ai'                    # 岗位要求生成
+ROLE_DEV_TOOLS = 'dev_tools'                        # 开发测试工具
+
+LLM_ROLES = (
+    ROLE_SCREENING_ASSISTANT,
+    ROLE_SCREENING_EXPERT,
+    ROLE_SCREENING_CRITIC,
+    ROLE_INTERVIEW_QUESTIONS,
+    ROLE_INTERVIEW_EVALUATION,
+    ROLE_INTERVIEW_REPORT,
+    ROLE_EVALUATION_DIMENSION,
+    ROLE_EVALUATION_REPORT,
+    ROLE_POSITION_AI,
+    ROLE_DEV_TOOLS,
+)
+
+# 未指定层级的角色使用的层级（即 LLM_MODEL）
+DEFAULT_TIER = 'default'
+
+# 携带调用角色的请求头，由共享HTTP客户端在发出请求前移除
+ROLE_HEADER = 'X-LLM-Role'
+
+
+def _load_json_env(name: str, expected_type: type) -> Any:
+    """
+    读取JSON格式的环境变量。
+    
+    返回:
+        解析结果，未设置时返回None
+    
+    异常:
+        ValueError: 不是有效的JSON或类型不符
+    """
+    raw = os.getenv(name, '').strip()
+    if not raw:
+        return None
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{name} is not valid JSON: {e}")
+    if not isinstance(value, expected_type):
+        raise ValueError(f"{name} must be a JSON {'array' if expected_type is list else 'object'}")
+    return value
+
 
 def get_config_list() -> List[Dict[str, Any]]:
     """
     从环境变量获取LLM配置列表。
     
+    第一项是 LLM_MODEL、LLM_API_KEY、LLM_BASE_URL 配置的主服务地址，其后依次是
+    LLM_ENDPOINTS（JSON数组）中的备用服务地址，如:
+    
+        LLM_ENDPOINTS=[{"api_key": "sk-2"}, {"base_url": "https://other.example.com/v1", "api_key": "sk-3", "model": "..."}]
+    
+    备用项未填写的字段沿用主服务地址的配置。
+    
     返回:
         LLM配置字典列表。
+    
+    异常:
+        ValueError: LLM_ENDPOINTS 格式错误
+    """
+    primary = {
+        "model": os.getenv('LLM_MODEL', 'deepseek-ai/DeepSeek-V3'),
+        "api_key": os.getenv('LLM_API_KEY', ''),
+        "base_url": os.getenv('LLM_BASE_URL', 'https://api.siliconflow.cn/v1'),
+        "temperature": float(os.getenv('LLM_TEMPERATURE', '0')),
+    }
+    endpoints = _load_json_env('LLM_ENDPOINTS', list)
+    if not endpoints:
+        return [primary]
+    if not all(isinstance(endpoint, dict) for endpoint in endpoints):
+        raise ValueError("LLM_ENDPOINTS must be a JSON array of objects")
+    
+    config_list = [primary]
+    for endpoint in endpoints:
+        config = dict(primary, **{
+            field: endpoint[field] for field in ('model', 'api_key', 'base_url') if endpoint.get(field)
+        })
+        if config not in config_list:
+            config_list.append(config)
+    return config_list
+
+
+def get_model_tiers() -> Dict[str, str]:
+    """
+    获取模型层级配置（LLM_MODEL_TIERS，层级名 -> 模型名），如:
+    
+        LLM_MODEL_TIERS={"fast": "Qwen/Qwen2.5-7B-Instruct", "strong": "deepseek-ai/DeepSeek-V3"}
+    
+    default 层级固定为 LLM_MODEL。
+    
+    异常:
+        ValueError: LLM_MODEL_TIERS 格式错误
+    """
+    tiers = _load_json_env('LLM_MODEL_TIERS', dict) or {}
+    return dict(tiers, **{DEFAULT_TIER: get_config_list()[0]["model"]})
+
+
+def get_role_tiers() -> Dict[str, str]:
+    """
+    获取角色到模型层级的映射（LLM_ROLE_TIERS），未列出的角色使用 default 层级，如:
+    
+        LLM_ROLE_TIERS={"screening_expert": "fast", "screening_critic": "strong", "evaluation_report": "strong"}
+    
+    异常:
+        ValueError: 格式错误、角色未知或层级未在 LLM_MODEL_TIERS 中定义
+    """
+    role_tiers = _load_json_env('LLM_ROLE_TIERS', dict) or {}
+    tiers = get_model_tiers()
+    for role, tier in role_tiers.items():
+        if role not in LLM_ROLES:
+            raise ValueError(f"LLM_ROLE_TIERS: unknown role '{role}', expected one of {', '.join(LLM_ROLES)}")
+        if tier not in tiers:
+            raise ValueError(f"LLM_ROLE_TIERS: tier '{tier}' of role '{role}' is not defined in LLM_MODEL_TIERS")
+    return {role: role_tiers.get(role, DEFAULT_TIER) for role in LLM_ROLES}
+
+
+def get_role_model(role: Optional[str]) -> str:
+    """
+    获取调用角色使用的模型名。
+    
+    参数:
+        role: 调用角色（LLM_ROLES 之一），为None时返回 LLM_MODEL
+    """
+    tiers = get_model_tiers()
+    if role is None:
+        return tiers[DEFAULT_TIER]
+    return tiers[get_role_tiers().get(role, DEFAULT_TIER)]
+
+
+def get_model_prices() -> Dict[str, Tuple[float, float]]:
     """
-    return [
-        {
-            "model": os.getenv('LLM_MODEL', 'deepseek-ai/DeepSeek-V3'),
-            "api_key": os.getenv('LLM_API_KEY', ''),
-            "base_url": os.getenv('LLM_BASE_URL', 'https://api.siliconflow.cn/v1'),
-            "temperature": float(os.getenv('LLM_TEMPERATURE', '0')),
-        }
-    ]
+    获取模型单价（LLM_MODEL_PRICES，模型名 -> [输入单价, 输出单价]，单位为每百万token的费用），如:
+    
+        LLM_MODEL_PRICES={"deepseek-ai/DeepSeek-V3": [2, 8], "Qwen/Qwen2.5-7B-Instruct": [0, 0]}
+    
+    异常:
+        ValueError: LLM_MODEL_PRICES 格式错误
+    """
+    prices = _load_json_env('LLM_MODEL_PRICES', dict) or {}
+    result = {}
+    for model, price in prices.items():
+        if not isinstance(price, list) or len(price) != 2:
+            raise ValueError(f"LLM_MODEL_PRICES: price of '{model}' must be [prompt_price, completion_price]")
+        result[model] = (float(price[0]), float(price[1]))
+    return result
 
 
-def get_llm_config() -> Dict[str, Any]:
+def get_llm_config(role: Optional[str] = None) -> Dict[str, Any]:
     """
     获取autogen代理的LLM配置。
     
+    配置中附带进程内共享的 http_client，所有代理复用同一连接池；
+    重试由 http_client 统一处理（见 llm_resilience），OpenAI 客户端自身不再重试。
+    配置了多个调用端点时，config_list 按当前的延迟、错误率和负载排序（见 llm_router），
+    autogen 调用失败时依次尝试后面的调用端点。
+    
+    参数:
+        role: 调用角色，指定时使用该角色层级的模型，请求按角色统计用量
+    
     返回:
         autogen的配置字典。
     """
+    from .llm_client import get_http_client
+    from .llm_router import rank_endpoints
+    
+    config_list = get_config_list()
+    role_model = get_role_model(role)
+    default_model = config_list[0]["model"]
+    
+    ranked = []
+    for config in rank_endpoints(config_list):
+        config = dict(config, http_client=get_http_client(config["base_url"], config["api_key"]), max_retries=0)
+        if role:
+            # 默认层级沿用各端点配置的模型名
+            if role_model != default_model:
+                config["model"] = role_model
+            config["default_headers"] = {ROLE_HEADER: role}
+        ranked.append(config)
     return {
-        "config_list": get_config_list(),
+        "config_list": ranked,
         "seed": 42,
         "timeout": int(os.getenv('LLM_TIMEOUT', '120')),
         "temperature": float(os.getenv('LLM_TEMPERATURE', '0')),
     }
 
 
+def get_rate_limit_config() -> Dict[str, int]:
+    """
+    获取LLM请求限流配置（每个调用端点独立计算，shared_concurrency 为所有进程合计，其余进程内生效）。
+    
+    返回:
+        包含 max_concurrency、rpm、tpm、reserved、shared_concurrency 的配置字典，0表示不限制
+        （reserved 为交互请求预留的并发额度）。
+    """
+    return {
+        "max_concurrency": int(os.getenv('LLM_MAX_CONCURRENCY', '8')),
+        "rpm": int(os.getenv('LLM_RPM_LIMIT', '0')),
+        "tpm": int(os.getenv('LLM_TPM_LIMIT', '0')),
+        "reserved": int(os.getenv('LLM_INTERACTIVE_RESERVED', '2')),
+        "shared_concurrency": int(os.getenv('LLM_SHARED_MAX_CONCURRENCY', '16')),
+    }
+
+
+def get_resilience_config() -> Dict[str, Any]:
+    """
+    获取LLM请求容错配置（重试、熔断、对冲，每个调用端点独立计算，进程内生效）。
+    
+    返回:
+        ResilientSender 的参数字典。
+    """
+    return {
+        "max_attempts": int(os.getenv('LLM_MAX_ATTEMPTS', '3')),
+        "backoff_base": float(os.getenv('LLM_RETRY_BACKOFF_BASE', '1')),
+        "backoff_max": float(os.getenv('LLM_RETRY_BACKOFF_MAX', '20')),
+        "failure_threshold": int(os.getenv('LLM_CIRCUIT_FAILURE_THRESHOLD', '5')),
+        "reset_timeout": float(os.getenv('LLM_CIRCUIT_RESET_TIMEOUT', '30')),
+        "hedge": os.getenv('LLM_HEDGE', 'False').lower() in ('1', 'true', 'yes'),
+        "hedge_min_samples": int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20')),
+    }
+
+
+def get_llm_cache_config() -> Dict[str, Any]:
+    """
+    获取LLM响应缓存配置。
+    
+    返回:
+        包含 path、ttl、max_entries、sites 的配置字典，sites 为开启缓存的调用点集合（'*' 表示全部）。
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sites = os.getenv('LLM_CACHE_SITES', '')
+    return {
+        "path": os.getenv('LLM_CACHE_PATH') or os.path.join(project_root, 'data', 'llm_cache.sqlite3'),
+        "ttl": int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600))),
+        "max_entries": int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000')),
+        "sites": {site.strip() for site in sites.split(',') if site.strip()},
+    }
+
+
+def get_llm_usage_config() -> Dict[str, Any]:
+    """
+    获取LLM分角色用量统计配置。
+    
+    返回:
+        包含 enabled、path 的配置字典。
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return {
+        "enabled": os.getenv('LLM_USAGE_STATS', 'True').lower() in ('1', 'true', 'yes'),
+        "path": os.getenv('LLM_USAGE_PATH') or os.path.join(project_root, 'data', 'llm_usage.sqlite3'),
+    }
+
+
 def validate_llm_config() -> bool:
     """
     验证LLM配置是否正确设置。
@@ -62,12 +293,14 @@ def get_llm_status() -> Dict[str, Any]:
     返回:
         包含配置信息的状态字典。
     """
-    config = get_config_list()[0]
+    config_list = get_config_list()
+    config = config_list[0]
     return {
         "model": config["model"],
         "base_url": config["base_url"],
         "api_key_configured": bool(config["api_key"]) and config["api_key"] != 'your-api-key-here',
         "temperature": config["temperature"],
+        "endpoint_count": len(config_list),
     }
 
 
@@ -0,0 +1,305 @@
+"""
+LLM请求限流模块。
+
+按调用端点（服务地址 + API密钥）限制进程内同时进行的LLM请求数，并以令牌桶控制每分钟请求数（RPM）
+和每分钟token数（TPM）。注册了跨进程共享计数器（见 set_shared_counter）时，还按端点统计所有进程
+（Web进程与 run_workers 工作进程）进行中的请求数，不超过 shared_concurrency。限流挂在共享HTTP客户端上，autogen 代理、直接调用的 OpenAI
+客户端和 Embedding 请求都会经过同一个限流器。
+
+预算耗尽时调用方按到达顺序排队等待，而不是直接失败。
+
+请求分为批量（bulk，默认，如后台筛选任务）和交互（interactive，如实时面试辅助）两个通道：
+交互请求优先放行，并独占 reserved 个并发额度，批量任务占满其余额度时实时面试不受影响。
+预留同时作用于进程内额度和跨进程共享额度：工作进程中的批量请求合计最多使用 shared_concurrency - reserved
+个额度，剩余额度留给Web进程中的交互请求。当前线程的通道由 llm_lane() 设置。
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LANE_BULK = 'bulk'
+LANE_INTERACTIVE = 'interactive'
+
+_current_lane = contextvars.ContextVar('llm_lane', default=LANE_BULK)
+
+# 跨进程共享计数的有效期（秒），进程异常退出未归还的计数在无人使用后清零
+SHARED_COUNTER_TTL = 600
+# 共享额度已满时重新检查的间隔（秒）
+SHARED_POLL_INTERVAL = 0.5
+
+_shared_counter = None
+
+
+def set_shared_counter(counter) -> None:
+    """
+    注册跨进程共享计数器（由应用层在启动时注册，None 表示只在进程内限流）。
+
+    参数:
+        counter: 提供 acquire(key, limit, ttl, refresh) 与 release(key) 的对象，
+            acquire 在计数未达上限时原子加1并返回新值，已达上限时返回None
+    """
+    global _shared_counter
+    _shared_counter = counter
+
+
+def get_shared_in_flight_key(endpoint: str) -> str:
+    """调用端点进行中请求数的共享计数键。"""
+    return f"llm:{endpoint}:in_flight"
+
+
+def get_shared_rpm_key(endpoint: str) -> str:
+    """调用端点本分钟请求数的共享计数键（一分钟固定窗口）。"""
+    return f"llm:{endpoint}:rpm"
+
+
+@contextmanager
+def llm_lane(lane: str):
+    """在指定通道内发起LLM请求（作用于当前线程/协程的上下文）。"""
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def get_current_lane() -> str:
+    """获取当前上下文的LLM请求通道。"""
+    return _current_lane.get()
+
+
+class TokenBucket:
+    """按分钟速率匀速补充的令牌桶，容量为一分钟的配额。"""
+
+    def __init__(self, per_minute: int, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """返回获得 amount 个令牌还需等待的秒数（超过容量的请求按容量计算）。"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """扣除令牌，允许透支（实际用量超出预估时），负数表示退还。"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class EndpointRateLimiter:
+    """
+    单个调用端点的并发数与RPM/TPM限流器。
+
+    同一通道内的等待者严格按先来先到放行；交互通道的等待者优先于批量通道，
+    批量请求最多使用 max_concurrency - reserved 个并发额度，跨进程共享额度同理。
+    """
+
+    def __init__(self, max_concurrency: int = 0, rpm: int = 0, tpm: int = 0, reserved: int = 0,
+                 shared_concurrency: int = 0, endpoint: str = '',
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化限流器。
+
+        参数:
+            max_concurrency: 最大并发请求数，0表示不限制
+            rpm: 每分钟请求数上限，0表示不限制
+            tpm: 每分钟token数上限，0表示不限制
+            reserved: 为交互通道预留的并发额度（批量请求至少保留1个额度）
+            shared_concurrency: 所有进程合计的最大并发请求数，0表示不限制（需注册共享计数器）
+            endpoint: 调用端点标识，作为共享计数键
+            clock: 时钟函数（测试时可替换）
+        """
+        self.max_concurrency = max_concurrency
+        self.bulk_concurrency = max(1, max_concurrency - reserved) if max_concurrency else 0
+        self.shared_concurrency = shared_concurrency
+        self.shared_bulk_concurrency = max(1, shared_concurrency - reserved) if shared_concurrency else 0
+        self.endpoint = endpoint
+        self.rpm = rpm
+        self.request_bucket = TokenBucket(rpm, clock) if rpm else None
+        self.token_bucket = TokenBucket(tpm, clock) if tpm else None
+        self._cond = threading.Condition()
+        self._waiters = {LANE_INTERACTIVE: deque(), LANE_BULK: deque()}
+        self._in_flight = 0
+        self._shared_held = 0
+
+    def _admit_delay(self, ticket, lane: str, tokens: float) -> Optional[float]:
+        """
+        计算排队者还需等待多久。
+
+        返回:
+            0表示可以放行；正数表示需等待的秒数；None表示等待其他请求结束或排在前面的请求放行
+        """
+        if self._waiters[lane][0] is not ticket:
+            return None
+        if lane == LANE_INTERACTIVE:
+            limit = self.max_concurrency
+        elif self._waiters[LANE_INTERACTIVE]:
+            return None
+        else:
+            limit = self.bulk_concurrency
+        if limit and self._in_flight >= limit:
+            return None
+        delay = 0.0
+        if self.request_bucket:
+            delay = max(delay, self.request_bucket.wait_time(1))
+        if self.token_bucket:
+            delay = max(delay, self.token_bucket.wait_time(tokens))
+        if delay == 0 and not self._acquire_shared(lane):
+            return SHARED_POLL_INTERVAL
+        return delay
+
+    def _acquire_shared(self, lane: str) -> bool:
+        """
+        申请跨进程共享额度，额度已满时返回False。
+
+        未注册共享计数器、未配置 shared_concurrency 或计数器不可用时只按进程内额度限制。
+        """
+        counter = _shared_counter
+        if counter is None or not self.shared_concurrency or not self.endpoint:
+            return True
+        limit = self.shared_concurrency if lane == LANE_INTERACTIVE else self.shared_bulk_concurrency
+        try:
+            if counter.acquire(get_shared_in_flight_key(self.endpoint), limit, SHARED_COUNTER_TTL) is None:
+                return False
+        except Exception as e:
+            logger.warning(f"Shared LLM counter unavailable ({self.endpoint}): {e}")
+            return True
+        self._shared_held += 1
+        return True
+
+    def _count_shared_request(self):
+        """配置了RPM上限时，累计所有进程本分钟发往该端点的请求数（供准入控制判断用量）。"""
+        counter = _shared_counter
+        if counter is None or not self.rpm or not self.endpoint:
+            return
+        try:
+            counter.acquire(get_shared_rpm_key(self.endpoint), 0, 60, False)
+        except Exception as e:
+            logger.warning(f"Shared LLM counter unavailable ({self.endpoint}): {e}")
+
+    def _release_shared(self):
+        """归还一个跨进程共享额度（计数器不可用时只记录日志，计数到期后自动清零）。"""
+        try:
+            _shared_counter.release(get_shared_in_flight_key(self.endpoint))
+        except Exception as e:
+            logger.warning(f"Shared LLM counter release failed ({self.endpoint}): {e}")
+
+    def acquire(self, tokens: float = 0):
+        """
+        排队获取一次请求额度（通道取自当前上下文），额度不足时阻塞等待。
+
+        参数:
+            tokens: 预估消耗的token数
+        """
+        ticket = object()
+        lane = LANE_INTERACTIVE if get_current_lane() == LANE_INTERACTIVE else LANE_BULK
+        waiters = self._waiters[lane]
+        started = time.monotonic()
+        with self._cond:
+            waiters.append(ticket)
+            try:
+                delay = self._admit_delay(ticket, lane, tokens)
+                while delay != 0:
+                    self._cond.wait(delay)
+                    delay = self._admit_delay(ticket, lane, tokens)
+            except BaseException:
+                waiters.remove(ticket)
+                self._cond.notify_all()
+                raise
+            waiters.popleft()
+            self._in_flight += 1
+            if self.request_bucket:
+                self.request_bucket.consume(1)
+            if self.token_bucket:
+                self.token_bucket.consume(tokens)
+            self._cond.notify_all()
+        self._count_shared_request()
+        waited = time.monotonic() - started
+        if waited > 1:
+            logger.info(f"LLM request waited {waited:.1f}s for rate limit")
+
+    def release(self):
+        """请求结束，归还并发额度。"""
+        with self._cond:
+            shared = self._shared_held > 0
+            if shared:
+                self._shared_held -= 1
+        if shared:
+            self._release_shared()
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def settle(self, estimated: float, actual: Optional[float]):
+        """按实际token用量修正TPM预算（多退少补）。"""
+        if not self.token_bucket or actual is None:
+            return
+        with self._cond:
+            self.token_bucket.consume(actual - estimated)
+            self._cond.notify_all()
+
+    @contextmanager
+    def limit(self, tokens: float = 0):
+        """在限流额度内执行一次请求。"""
+        self.acquire(tokens)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, int]:
+        """获取当前并发数和排队数。"""
+        with self._cond:
+            return {"in_flight": self._in_flight, "queued": sum(len(w) for w in self._waiters.values())}
+
+
+def estimate_request_tokens(body: bytes) -> int:
+    """
+    根据请求体估算本次请求消耗的token数（输入消息 + max_tokens）。
+
+    参数:
+        body: OpenAI 兼容接口的JSON请求体
+    """
+    from .base import BaseAgentManager
+
+    try:
+        payload = json.loads(body or b'{}')
+    except ValueError:
+        return 0
+    if not isinstance(payload, dict):
+        return 0
+    tokens = sum(
+        BaseAgentManager.estimate_tokens(message.get('content'))
+        for message in payload.get('messages') or []
+        if isinstance(message, dict)
+    )
+    tokens += BaseAgentManager.estimate_tokens(payload.get('input'))
+    tokens += int(payload.get('max_tokens') or 0)
+    return tokens
+
+
+def response_total_tokens(response) -> Optional[int]:
+    """从非流式响应中读取实际token用量，无法读取时返回None。"""
+    try:
+        usage = response.json().get('usage') or {}
+    except Exception:
+        return None
+    total = usage.get('total_tokens')
+    return int(total) if total is not None else None
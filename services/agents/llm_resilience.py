@@ -0,0 +1,345 @@
+"""
+LLM请求容错模块。
+
+挂在共享HTTP客户端上（见 llm_client），autogen 代理和直接调用的 OpenAI 客户端的每次请求都经过：
+
+- 重试：超时、连接错误和可重试状态码（408/429/5xx）按带随机抖动的指数退避重试，
+  429/503 响应带 Retry-After 时按其等待；
+- 熔断：调用端点连续失败达到阈值后熔断，熔断期间请求立即失败（调用方走降级逻辑），
+  冷却时间过后放行一个探测请求，成功则恢复；
+- 对冲：开启后，请求耗时超过近期 p95 延迟仍未返回时再发出一个相同请求，取先成功的结果，
+  以少量额外调用换取更低的长尾延迟（只用于非流式请求）；
+- 指标：每一次实际发出的请求（含重试和对冲）都按结果计数并记录延迟，见 get_llm_metrics()。
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(httpx.TransportError):
+    """服务地址处于熔断状态，请求未发出。"""
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器（线程安全）。"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        初始化熔断器。
+
+        参数:
+            failure_threshold: 触发熔断的连续失败次数，0表示不熔断
+            reset_timeout: 熔断后放行探测请求前的冷却时间（秒）
+            clock: 时钟函数（测试时可替换）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def is_available(self) -> bool:
+        """当前是否会放行请求（只读，不占用半开状态的探测名额）。"""
+        with self._lock:
+            if self._state == self.OPEN:
+                return self.clock() - self._opened_at >= self.reset_timeout
+            return self._state == self.CLOSED or not self._probing
+
+    def allow(self) -> bool:
+        """是否放行请求（半开状态只放行一个探测请求）。"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        """请求成功：清零失败计数并关闭熔断。"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """请求失败：探测失败或连续失败达到阈值时熔断。"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self.failure_threshold and self._failures >= self.failure_threshold
+            ):
+                if self._state != self.OPEN:
+                    logger.warning(f"LLM circuit opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+                self._probing = False
+
+
+class CallMetrics:
+    """单个调用端点的请求指标：按结果计数，保留最近的延迟样本和成败记录（线程安全）。"""
+
+    # 计算错误率时参考的时间窗口（秒），窗口外的失败不再影响路由
+    ERROR_WINDOW = 300
+
+    def __init__(self, window: int = 200, clock: Callable[[], float] = time.monotonic):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._recent = deque(maxlen=window)
+        self.clock = clock
+        self.outcomes: Dict[str, int] = {}
+        self.retries = 0
+        self.hedges = 0
+
+    def record(self, outcome: str, latency: Optional[float] = None):
+        """记录一次请求结果（success、timeout、error、http_<状态码>、circuit_open）。"""
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if latency is not None and outcome == 'success':
+                self._latencies.append(latency)
+            failed = self._is_failure(outcome)
+            if outcome == 'success' or failed:
+                self._recent.append((self.clock(), not failed))
+
+    @staticmethod
+    def _is_failure(outcome: str) -> bool:
+        """超时、连接错误和可重试状态码计为失败，其余4xx是调用方问题，不影响错误率。"""
+        if outcome in ('timeout', 'error'):
+            return True
+        return outcome.startswith('http_') and int(outcome[5:]) in RETRYABLE_STATUS_CODES
+
+    def error_rate(self) -> float:
+        """最近 ERROR_WINDOW 秒内的请求失败率，没有请求时为0。"""
+        since = self.clock() - self.ERROR_WINDOW
+        with self._lock:
+            results = [ok for at, ok in self._recent if at >= since]
+        if not results:
+            return 0.0
+        return results.count(False) / len(results)
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_hedge(self):
+        with self._lock:
+            self.hedges += 1
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """成功请求延迟的分位数（秒），样本不足时返回None。"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q / 100 * len(samples)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取指标快照。"""
+        with self._lock:
+            outcomes = dict(self.outcomes)
+            retries, hedges = self.retries, self.hedges
+        return {
+            "attempts": sum(count for outcome, count in outcomes.items() if outcome != 'circuit_open'),
+            "outcomes": outcomes,
+            "retries": retries,
+            "hedges": hedges,
+            "latency_p50": self.percentile(50),
+            "latency_p95": self.percentile(95),
+            "error_rate": round(self.error_rate(), 3),
+        }
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """获取执行对冲请求的线程池。"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='llm-hedge')
+    return _executor
+
+
+def reset_executor():
+    """fork 后丢弃父进程的线程池（子进程中线程不存在）。"""
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+def _discard(future):
+    """关闭对冲中落败请求的响应。"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class ResilientSender:
+    """为单个调用端点的请求提供重试、熔断、对冲和指标记录。"""
+
+    def __init__(self, endpoint: str = '', max_attempts: int = 3, backoff_base: float = 1.0,
+                 backoff_max: float = 20.0, failure_threshold: int = 5, reset_timeout: float = 30,
+                 hedge: bool = False, hedge_min_samples: int = 20, sleep: Callable[[float], None] = time.sleep):
+        """
+        初始化。
+
+        参数:
+            endpoint: 调用端点标识（用于指标和日志）
+            max_attempts: 单次调用的最大尝试次数（含首次）
+            backoff_base: 退避基数（秒），第n次重试前最多等待 base * 2^(n-1) 秒
+            backoff_max: 单次退避上限（秒）
+            failure_threshold: 触发熔断的连续失败次数，0表示不熔断
+            reset_timeout: 熔断冷却时间（秒）
+            hedge: 是否开启对冲请求
+            hedge_min_samples: 开始对冲所需的最少延迟样本数
+            sleep: 等待函数（测试时可替换）
+        """
+        self.endpoint = endpoint
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.sleep = sleep
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = CallMetrics()
+
+    def send(self, attempt: Callable[[], httpx.Response], hedgeable: bool = True) -> httpx.Response:
+        """
+        执行一次LLM调用。
+
+        参数:
+            attempt: 发出一次请求并返回响应的函数
+            hedgeable: 是否允许对冲（流式请求不对冲）
+
+        返回:
+            成功响应；重试耗尽时返回最后一次的可重试错误响应
+
+        异常:
+            CircuitOpenError: 调用端点处于熔断状态
+            httpx.TransportError: 重试耗尽后的超时或连接错误
+        """
+        number = 1
+        while True:
+            if not self.breaker.allow():
+                self.metrics.record('circuit_open')
+                raise CircuitOpenError(f"LLM endpoint {self.endpoint} is unavailable (circuit open)")
+            try:
+                if hedgeable and self.hedge:
+                    response = self._send_hedged(attempt)
+                else:
+                    response = self._send_once(attempt)
+            except httpx.TransportError as e:
+                if number >= self.max_attempts:
+                    raise
+                delay = self.get_retry_delay(number)
+                reason = type(e).__name__
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or number >= self.max_attempts:
+                    return response
+                delay = self.get_retry_delay(number, response)
+                reason = f"HTTP {response.status_code}"
+                response.close()
+
+            self.metrics.record_retry()
+            logger.warning(
+                f"LLM request to {self.endpoint} failed ({reason}), "
+                f"retry {number}/{self.max_attempts - 1} in {delay:.1f}s"
+            )
+            self.sleep(delay)
+            number += 1
+
+    def get_retry_delay(self, number: int, response: Optional[httpx.Response] = None) -> float:
+        """第 number 次失败后的等待时间：带随机抖动的指数退避，响应带 Retry-After 时按其等待。"""
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get('Retry-After', ''))
+            except ValueError:
+                retry_after = None
+            if retry_after is not None:
+                return min(max(0.0, retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (number - 1)))
+
+    def _send_once(self, attempt: Callable[[], httpx.Response]) -> httpx.Response:
+        """发出一次请求，记录结果、延迟和熔断状态。"""
+        started = time.monotonic()
+        try:
+            response = attempt()
+        except Exception as e:
+            self.metrics.record('timeout' if isinstance(e, httpx.TimeoutException) else 'error')
+            self.breaker.record_failure()
+            raise
+
+        status_code = response.status_code
+        if status_code < 400:
+            self.metrics.record('success', time.monotonic() - started)
+        else:
+            self.metrics.record(f"http_{status_code}")
+        # 限流（429）说明服务可用，不计入熔断
+        if status_code >= 500 or status_code == 408:
+            self.breaker.record_failure()
+        elif status_code != 429:
+            self.breaker.record_success()
+        return response
+
+    def _send_hedged(self, attempt: Callable[[], httpx.Response]) -> httpx.Response:
+        """发出请求，超过近期 p95 延迟仍未返回时再发出对冲请求，取先成功的结果。"""
+        delay = self.metrics.percentile(95, self.hedge_min_samples)
+        if delay is None:
+            return self._send_once(attempt)
+
+        executor = _get_executor()
+        # 在线程池中保留调用方的上下文（如限流通道）
+        primary = executor.submit(contextvars.copy_context().run, self._send_once, attempt)
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+
+        self.metrics.record_hedge()
+        hedge = executor.submit(contextvars.copy_context().run, self._send_once, attempt)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = done.pop()
+            if not pending or self._is_usable(winner):
+                break
+            # 先返回的请求失败，等待另一个请求
+            _discard(winner)
+        for future in done | pending:
+            future.add_done_callback(_discard)
+        return winner.result()
+
+    @staticmethod
+    def _is_usable(future) -> bool:
+        """已完成的请求是否得到了非可重试的响应。"""
+        return future.exception() is None and future.result().status_code not in RETRYABLE_STATUS_CODES
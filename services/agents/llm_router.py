@@ -0,0 +1,152 @@
+"""
+LLM多端点路由模块。
+
+配置了多个调用端点（服务地址 + API密钥，见 get_config_list 与 LLM_ENDPOINTS）时，
+每次调用前按各端点的实时状态排序：
+
+- 代价 = 近期成功请求的延迟中位数 × (当前并发数 + 1) ÷ (1 - 近期错误率)，代价低的优先，
+  并发升高后流量会自然分散到其他端点；尚无延迟样本的端点按已知的最低延迟计算，
+  以便新端点尽快获得流量、积累样本；
+- 熔断中的端点排在最后（冷却时间已过、可以放行探测请求的除外）；
+- 调用失败（容错层重试耗尽后的超时、连接错误、429/5xx）时依次尝试下一个端点。
+
+各端点的延迟、错误率和熔断状态来自共享HTTP客户端的容错层（见 llm_resilience），进程内生效。
+直接调用通过 get_routed_client() 获取的客户端按请求路由；autogen 代理在创建时按当前排序
+取得 config_list（见 get_llm_config），调用失败时由 autogen 依次尝试后面的端点。
+"""
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import openai
+
+from .llm_client import get_endpoint_id, get_http_client, get_openai_client
+from .llm_config import get_config_list
+from .llm_resilience import RETRYABLE_STATUS_CODES
+
+logger = logging.getLogger(__name__)
+
+# 错误率的下限保护：全部失败的端点代价按20倍计算，而不是无穷大
+MIN_SUCCESS_RATE = 0.05
+
+
+def get_endpoint_cost(config: Dict[str, Any], default_latency: float = 1.0) -> float:
+    """
+    计算调用端点的路由代价（越小越优先）。
+
+    参数:
+        config: get_config_list() 中的一项
+        default_latency: 端点尚无延迟样本时使用的延迟（秒）
+
+    返回:
+        代价值；熔断中的端点返回 inf
+    """
+    client = get_http_client(config["base_url"], config["api_key"])
+    resilience = client.resilience
+    if resilience is None:
+        return 0.0
+    if not resilience.breaker.is_available():
+        return float('inf')
+
+    latency = resilience.metrics.percentile(50)
+    if latency is None:
+        latency = default_latency
+    in_flight = client.limiter.stats()["in_flight"] if client.limiter else 0
+    success_rate = max(MIN_SUCCESS_RATE, 1 - resilience.metrics.error_rate())
+    return latency * (in_flight + 1) / success_rate
+
+
+def get_endpoint_latency(config: Dict[str, Any]) -> Optional[float]:
+    """调用端点近期成功请求的延迟中位数（秒），尚无样本时返回None。"""
+    resilience = get_http_client(config["base_url"], config["api_key"]).resilience
+    return resilience.metrics.percentile(50) if resilience else None
+
+
+def rank_endpoints(config_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    按路由代价对调用端点排序，代价相同时保持配置顺序。
+
+    参数:
+        config_list: get_config_list() 的结果
+
+    返回:
+        排序后的新列表（熔断中的端点仍保留在末尾，作为最后的尝试）
+    """
+    if len(config_list) <= 1:
+        return list(config_list)
+    latencies = [get_endpoint_latency(config) for config in config_list]
+    known = [latency for latency in latencies if latency is not None]
+    default_latency = min(known) if known else 1.0
+    costs = {id(config): get_endpoint_cost(config, default_latency) for config in config_list}
+    return sorted(config_list, key=lambda config: costs[id(config)])
+
+
+def should_failover(error: Exception) -> bool:
+    """调用失败后是否改用下一个端点（超时、连接错误和可重试状态码）。"""
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES
+
+
+class RoutedOpenAIClient:
+    """
+    按请求路由到多个调用端点的 OpenAI 客户端。
+
+    只提供 chat.completions.create()，用法与 OpenAI 客户端相同。请求使用默认模型（主服务地址的
+    LLM_MODEL）时按所选端点配置的模型名替换，指定了其他模型时原样发送。
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        初始化。
+
+        参数:
+            timeout: 请求超时（秒）
+        """
+        self.timeout = timeout
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create_chat_completion))
+
+    def create_chat_completion(self, **params):
+        """
+        发送一次对话补全请求，失败时依次尝试下一个端点。
+
+        异常:
+            openai.OpenAIError: 所有端点均失败时抛出最后一个端点的错误，不可切换的错误直接抛出
+        """
+        config_list = get_config_list()
+        default_model = config_list[0]["model"]
+        endpoints = rank_endpoints(config_list)
+        for index, config in enumerate(endpoints):
+            client = get_openai_client(config["api_key"], config["base_url"], self.timeout)
+            request = dict(params)
+            if request.get("model", default_model) == default_model:
+                request["model"] = config["model"]
+            try:
+                return client.chat.completions.create(**request)
+            except openai.OpenAIError as e:
+                if index == len(endpoints) - 1 or not should_failover(e):
+                    raise
+                endpoint = get_endpoint_id(config["base_url"], config["api_key"])
+                logger.warning(f"LLM endpoint {endpoint} failed ({type(e).__name__}), trying next endpoint")
+
+
+_routed_clients: Dict[Optional[float], RoutedOpenAIClient] = {}
+_routed_lock = threading.Lock()
+
+
+def get_routed_client(timeout: Optional[float] = None) -> RoutedOpenAIClient:
+    """
+    获取按请求路由的共享 OpenAI 客户端。
+
+    参数:
+        timeout: 请求超时（秒）
+
+    返回:
+        RoutedOpenAIClient 实例，相同超时返回同一实例
+    """
+    client = _routed_clients.get(timeout)
+    if client is None:
+        with _routed_lock:
+            client = _routed_clients.setdefault(timeout, RoutedOpenAIClient(timeout))
+    return client
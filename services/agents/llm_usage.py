@@ -0,0 +1,159 @@
+"""
+LLM分角色用量统计模块。
+
+各调用角色（筛选代理、面试辅助和综合分析的各个阶段，见 LLM_ROLES）的请求通过 X-LLM-Role
+请求头标记角色。共享HTTP客户端在请求发出前移除该请求头，请求结束后按 (角色, 模型) 累计
+调用次数、失败次数、token用量和耗时（含容错层的重试等待），用于按阶段权衡模型的速度与质量。
+
+统计持久化在本地SQLite文件中，多进程累计，可通过 `python manage.py llm_usage` 查看；
+费用按 LLM_MODEL_PRICES 中的单价在查看时计算。
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Tuple
+
+from .llm_config import get_llm_usage_config, get_model_prices, get_role_tiers
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsageStats:
+    """基于SQLite的分角色用量统计。"""
+
+    def __init__(self, path: str):
+        """
+        初始化统计存储。
+
+        参数:
+            path: SQLite文件路径
+        """
+        self.path = path
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_role_usage (
+                    role TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    calls INTEGER NOT NULL DEFAULT 0,
+                    errors INTEGER NOT NULL DEFAULT 0,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    latency_total REAL NOT NULL DEFAULT 0,
+                    latency_max REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (role, model)
+                )"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def record(self, role: str, model: str, ok: bool, latency: float,
+               prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        """记录一次调用。"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """INSERT INTO llm_role_usage
+                    (role, model, calls, errors, prompt_tokens, completion_tokens, latency_total, latency_max)
+                VALUES (?, ?, 1, ?, ?, ?, ?, ?)
+                ON CONFLICT(role, model) DO UPDATE SET
+                    calls = calls + 1,
+                    errors = errors + excluded.errors,
+                    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                    completion_tokens = completion_tokens + excluded.completion_tokens,
+                    latency_total = latency_total + excluded.latency_total,
+                    latency_max = MAX(latency_max, excluded.latency_max)""",
+                (role, model, 0 if ok else 1, prompt_tokens, completion_tokens, latency, latency)
+            )
+
+    def clear(self) -> int:
+        """清空统计，返回删除的记录数。"""
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM llm_role_usage").rowcount
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        获取分角色用量统计。
+
+        返回:
+            按角色、模型排序的统计列表，每项包含调用次数、失败次数、token用量、平均/最大耗时（秒）、
+            当前层级和费用（模型未配置单价时费用为None）
+        """
+        prices = get_model_prices()
+        role_tiers = get_role_tiers()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """SELECT role, model, calls, errors, prompt_tokens, completion_tokens, latency_total, latency_max
+                FROM llm_role_usage ORDER BY role, model"""
+            ).fetchall()
+
+        result = []
+        for role, model, calls, errors, prompt_tokens, completion_tokens, latency_total, latency_max in rows:
+            price = prices.get(model)
+            result.append({
+                "role": role,
+                "tier": role_tiers.get(role),
+                "model": model,
+                "calls": calls,
+                "errors": errors,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "latency_avg": latency_total / calls if calls else 0.0,
+                "latency_max": latency_max,
+                "cost": (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000 if price else None,
+            })
+        return result
+
+
+_stats_instance: Optional[LLMUsageStats] = None
+_stats_lock = threading.Lock()
+
+
+def get_llm_usage_stats() -> LLMUsageStats:
+    """获取分角色用量统计单例。"""
+    global _stats_instance
+    if _stats_instance is None:
+        with _stats_lock:
+            if _stats_instance is None:
+                _stats_instance = LLMUsageStats(get_llm_usage_config()["path"])
+    return _stats_instance
+
+
+def response_usage(response) -> Tuple[int, int]:
+    """从非流式响应中读取 (输入token数, 输出token数)，无法读取时返回 (0, 0)。"""
+    try:
+        usage = response.json().get('usage') or {}
+    except Exception:
+        return 0, 0
+    return int(usage.get('prompt_tokens') or 0), int(usage.get('completion_tokens') or 0)
+
+
+def record_role_usage(role: str, request, response, latency: float) -> None:
+    """
+    记录一次带角色标记的请求，统计写入失败不影响调用。
+
+    参数:
+        role: 调用角色
+        request: httpx 请求
+        response: httpx 响应，请求异常时为None
+        latency: 耗时（秒）
+    """
+    if not get_llm_usage_config()["enabled"]:
+        return
+    try:
+        model = json.loads(request.content or b'{}').get('model') or ''
+    except (ValueError, AttributeError):
+        model = ''
+    ok = response is not None and response.status_code < 400
+    prompt_tokens, completion_tokens = response_usage(response) if ok else (0, 0)
+    try:
+        get_llm_usage_stats().record(role, model, ok, latency, prompt_tokens, completion_tokens)
+    except sqlite3.Error as e:
+        logger.warning(f"LLM usage stats update failed ({role}): {e}")
@@ -5,9 +5,11 @@
 import json
 import logging
 from typing import Dict, Any, List, Optional
-from openai import OpenAI
 
-from .llm_config import get_config_list, get_embedding_config
+from .llm_config import ROLE_POSITION_AI, get_config_list, get_embedding_config, get_role_model
+from .llm_cache import cached_chat_completion
+from .llm_client import get_openai_client
+from .llm_router import get_routed_client
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +40,7 @@ class PositionAIService:
         llm_config = get_config_list()[0]
         self.api_key = llm_config.get('api_key', '')
         self.base_url = llm_config.get('base_url', 'https://api.openai.com/v1')
-        self.model = llm_config.get('model', 'gpt-3.5-turbo')
+        self.model = get_role_model(ROLE_POSITION_AI)
         self.temperature = llm_config.get('temperature', 0.7)
         self.timeout = 120
         
@@ -48,11 +50,7 @@ class PositionAIService:
         self.embedding_base_url = embedding_config.get('base_url', '')
         self.embedding_model = embedding_config.get('model', '')
         
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-            timeout=self.timeout
-        )
+        self.client = get_routed_client(self.timeout)
     
     def generate_position_requirements(
         self, 
@@ -110,16 +108,17 @@ class PositionAIService:
 请直接输出JSON格式的岗位要求，不要包含任何其他内容。"""
 
         try:
-            response = self.client.chat.completions.create(
+            result_text = cached_chat_completion(
+                self.client,
+                'position_ai',
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_message}
                 ],
                 temperature=self.temperature,
-            )
-            
-            result_text = response.choices[0].message.content.strip()
+                role=ROLE_POSITION_AI,
+            ).strip()
             
             # 清理可能的markdown代码块标记
             if result_text.startswith("```json"):
@@ -197,11 +196,7 @@ class PositionAIService:
             return []
         
         try:
-            embedding_client = OpenAI(
-                api_key=self.embedding_api_key,
-                base_url=self.embedding_base_url,
-                timeout=self.timeout
-            )
+            embedding_client = get_openai_client(self.embedding_api_key, self.embedding_base_url, self.timeout)
             
             response = embedding_client.embeddings.create(
                 model=self.embedding_model,
@@ -1,11 +1,54 @@
 """
 简历评估的筛选代理模块。
 """
+import re
+import threading
 import autogen
+from concurrent.futures import ThreadPoolExecutor
 from autogen import AssistantAgent, UserProxyAgent, GroupChat
-from typing import Dict, Any, List, Tuple, Callable
-from .llm_config import get_llm_config
-from .base import BaseAgentManager
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from .llm_config import get_llm_config, ROLE_SCREENING_ASSISTANT, ROLE_SCREENING_EXPERT, ROLE_SCREENING_CRITIC
+from .base import BaseAgentManager, AgentRunCancelled
+
+
+# 筛选提示词/代理版本：修改代理系统提示或评分规则时需递增，使旧的筛选结果缓存失效
+SCREENING_PROMPT_VERSION = '1'
+
+# 筛选执行模式
+SCREENING_MODE_GROUP_CHAT = 'group_chat'  # autogen群聊，六个角色依次发言
+SCREENING_MODE_SEQUENTIAL = 'sequential'  # 不经过群聊管理器，按相同顺序直接调用各代理
+SCREENING_MODE_PARALLEL = 'parallel'      # 三位专家并发评分，评审专家汇总
+SCREENING_MODES = (SCREENING_MODE_GROUP_CHAT, SCREENING_MODE_SEQUENTIAL, SCREENING_MODE_PARALLEL)
+
+# 筛选代理的调用角色（各自的模型层级见 LLM_ROLE_TIERS）
+SCREENING_ROLES = (ROLE_SCREENING_ASSISTANT, ROLE_SCREENING_EXPERT, ROLE_SCREENING_CRITIC)
+
+# 发言顺序（用于进度计算，步骤数为下标+1）
+SPEAKER_ORDER = [
+    "User_Proxy",
+    "Assistant",
+    "HR_Expert",
+    "Technical_Expert",
+    "Project_Manager_Expert",
+    "Critic",
+]
+
+# 专家评分格式（与各专家系统提示中的评分格式一致）：发言人 -> (权重键, 评分标签)
+EXPERT_SCORE_LABELS = {
+    "HR_Expert": ("hr", "HR评分"),
+    "Technical_Expert": ("technical", "技术评分"),
+    "Project_Manager_Expert": ("manager", "管理评分"),
+}
+
+# 提前淘汰判定依据的专家
+EARLY_EXIT_EXPERTS = ("HR_Expert", "Technical_Expert")
+
+# 专家对应的评分规则维度（见 generate_scoring_rules）
+EXPERT_RULE_KEYS = {
+    "HR_Expert": "hr_dimension",
+    "Technical_Expert": "technical_dimension",
+    "Project_Manager_Expert": "manager_dimension",
+}
 
 
 def create_screening_agents(criteria: Dict[str, Any]) -> Tuple:
@@ -18,7 +61,10 @@ def create_screening_agents(criteria: Dict[str, Any]) -> Tuple:
     返回:
         元组 (user_proxy, assistant, hr_agent, technical_agent, manager_agent, critic)
     """
-    llm_config = get_llm_config()
+    # 协调员、三位专家和评审专家可分别指定模型层级（见 LLM_ROLE_TIERS）
+    assistant_config = get_llm_config(ROLE_SCREENING_ASSISTANT)
+    expert_config = get_llm_config(ROLE_SCREENING_EXPERT)
+    critic_config = get_llm_config(ROLE_SCREENING_CRITIC)
     
     # 根据招聘条件生成评分规则
     scoring_rules = generate_scoring_rules(criteria)
@@ -39,7 +85,7 @@ def create_screening_agents(criteria: Dict[str, Any]) -> Tuple:
     # 2. 助手代理
     assistant = AssistantAgent(
         name="Assistant",
-        llm_config=llm_config,
+        llm_config=assistant_config,
         system_message="""你是招聘系统协调员。你的职责是：
         1. 读取并解析招聘标准文件
         2. 生成量化评分表格
@@ -50,7 +96,7 @@ def create_screening_agents(criteria: Dict[str, Any]) -> Tuple:
     # 3. HR专家代理
     hr_agent = AssistantAgent(
         name="HR_Expert",
-        llm_config=llm_config,
+        llm_config=expert_config,
         system_message=f"""你是企业HR专家，专注于人才的综合素质评估。请根据以下标准进行评分：
         {scoring_rules['hr_dimension']}
 
@@ -69,7 +115,7 @@ def create_screening_agents(criteria: Dict[str, Any]) -> Tuple:
     # 4. 技术专家代理
     technical_agent = AssistantAgent(
         name="Technical_Expert",
-        llm_config=llm_config,
+        llm_config=expert_config,
         system_message=f"""你是技术评审专家，专注于技术能力评估。请根据以下标准进行评分：
         {scoring_rules['technical_dimension']}
 
@@ -88,7 +134,7 @@ def create_screening_agents(criteria: Dict[str, Any]) -> Tuple:
     # 5. 项目经理专家代理
     manager_agent = AssistantAgent(
         name="Project_Manager_Expert",
-        llm_config=llm_config,
+        llm_config=expert_config,
         system_message=f"""你是项目经理专家，专注于项目管理能力评估。请根据以下标准进行评分：
         {scoring_rules['manager_dimension']}
 
@@ -112,7 +158,7 @@ def create_screening_agents(criteria: Dict[str, Any]) -> Tuple:
     
     critic = AssistantAgent(
         name="Critic",
-        llm_config=llm_config,
+        llm_config=critic_config,
         system_message=f"""你是综合评审专家。你的职责是：
         1. 汇总三个专家的评分结果
         2. 计算最终综合评分（满分100分）
@@ -164,21 +210,67 @@ def generate_scoring_rules(criteria: Dict[str, Any]) -> Dict[str, List]:
 
 
 class ScreeningAgentManager(BaseAgentManager):
-    """简历筛选代理管理器。"""
+    """
+    简历筛选代理管理器。
     
-    def __init__(self, criteria: Dict[str, Any]):
+    支持三种执行模式：
+    - group_chat: autogen群聊，User_Proxy → Assistant → 三位专家 → Critic 依次发言
+    - sequential: 相同顺序，但直接调用各代理，不经过群聊管理器
+    - parallel: 三位专家互不依赖，并发评分后由Critic汇总，串行LLM轮次从5轮降为3轮
+    
+    isolate_context 为 True 时每位专家只收到招聘标准、自身评分规则和简历原文，
+    避免群聊中上下文随发言轮次二次增长（群聊模式下会自动改用 sequential 执行）。
+    此时 Assistant 的发言不会被任何代理看到，因此同时跳过 Assistant（等同于 lean）。
+    
+    lean 为 True 时跳过不参与评分的 Assistant 发言，筛选消息直接交给专家，
+    每份简历少一次LLM调用，对话记录和报告格式保持不变。
+    
+    设置 early_exit_threshold 后，若HR评分和技术评分均低于该阈值，则跳过项目经理专家，
+    并以按权重计算的确定性“不匹配”结论代替Critic发言（parallel模式下专家已并发完成，仅代替Critic）。
+    """
+    
+    # 上下文隔离模式下传给Critic的每条专家结论最大字符数
+    COMPACT_VERDICT_CHARS = 300
+    
+    def __init__(
+        self,
+        criteria: Dict[str, Any],
+        mode: str = SCREENING_MODE_GROUP_CHAT,
+        isolate_context: bool = False,
+        lean: bool = False,
+        early_exit_threshold: Optional[float] = None,
+        weights: Optional[Dict[str, float]] = None
+    ):
         super().__init__(criteria)
-        self.weights = {"hr": 0.3, "technical": 0.4, "manager": 0.3}
+        if mode not in SCREENING_MODES:
+            raise ValueError(f"Unknown screening mode: {mode}")
+        if isolate_context and mode == SCREENING_MODE_GROUP_CHAT:
+            # 群聊会向所有代理广播完整记录，无法隔离上下文
+            mode = SCREENING_MODE_SEQUENTIAL
+        self.mode = mode
+        self.isolate_context = isolate_context
+        self.lean = lean
+        self.early_exit_threshold = early_exit_threshold
+        self.early_exited = False
+        self.weights = weights or {"hr": 0.3, "technical": 0.4, "manager": 0.3}
+        self.token_metrics = {"input_tokens": 0, "baseline_input_tokens": 0}
+        self._metrics_lock = threading.Lock()
     
     def setup(self):
         """设置所有筛选代理和群聊。"""
         agents = create_screening_agents(self.criteria)
         self.user_proxy, self.assistant, self.hr_agent, self.technical_agent, self.manager_agent, self.critic = agents
+        self.experts = [self.hr_agent, self.technical_agent, self.manager_agent]
+        self.scoring_rules = generate_scoring_rules(self.criteria)
+        
+        if self.mode != SCREENING_MODE_GROUP_CHAT:
+            # 直接调用模式不需要群聊和管理器
+            return
         
         # 创建发言人选择器
         def speaker_selector(last_speaker: autogen.Agent, groupchat: GroupChat):
             speaker_sequence = {
-                "User_Proxy": "Assistant",
+                "User_Proxy": "HR_Expert" if self.lean else "Assistant",
                 "Assistant": "HR_Expert",
                 "HR_Expert": "Technical_Expert",
                 "Technical_Expert": "Project_Manager_Expert",
@@ -186,8 +278,15 @@ class ScreeningAgentManager(BaseAgentManager):
                 "Critic": None
             }
             
-            if last_speaker is None:
+            if self.is_cancelled():
+                # 返回None结束群聊，由 run_chat 抛出 AgentRunCancelled
+                next_speaker = None
+            elif last_speaker is None:
                 next_speaker = groupchat.agent_by_name("User_Proxy")
+            elif last_speaker.name == "Technical_Expert" and self._should_exit_early(groupchat.messages):
+                # 追加确定性结论后返回None结束群聊
+                groupchat.messages.append(self._build_early_exit_verdict(groupchat.messages))
+                next_speaker = None
             else:
                 next_speaker_name = speaker_sequence.get(last_speaker.name)
                 if next_speaker_name:
@@ -197,14 +296,13 @@ class ScreeningAgentManager(BaseAgentManager):
             
             # 更新任务进度
             if next_speaker:
-                self.speakers.append(next_speaker.name)
-                self.update_task_speaker(next_speaker.name, len(self.speakers))
+                self._report_speaker(next_speaker.name)
             
             return next_speaker
         
         # 创建群聊
         self.create_group_chat(
-            agents=list(agents),
+            agents=[agent for agent in agents if not (self.lean and agent is self.assistant)],
             speaker_selector=speaker_selector,
             max_round=12
         )
@@ -227,24 +325,252 @@ class ScreeningAgentManager(BaseAgentManager):
     
     def run_screening(self, candidate_name: str, resume_text: str) -> List[Dict]:
         """为候选人运行筛选流程。"""
+        message = f"""我们需要对一份求职简历进行综合评审。
+
+招聘标准概述：
+{self._criteria_overview()}
+
+姓名：{candidate_name}
+
+简历内容：
+{resume_text}
+
+请开始评审流程。"""
+        
+        if self.mode == SCREENING_MODE_GROUP_CHAT:
+            return self.run_chat(self.user_proxy, message)
+        return self.run_pipeline(message, candidate_name, resume_text)
+    
+    def run_pipeline(self, message: str, candidate_name: str, resume_text: str) -> List[Dict]:
+        """
+        不经过群聊管理器直接调用各代理，生成与群聊格式一致的对话记录。
+        
+        parallel模式下三位专家基于相同上下文并发评分，Critic最后基于完整记录汇总。
+        开启上下文隔离时，专家只收到招聘标准、自身评分规则和简历原文，
+        Critic只收到三位专家的精简结论，对话记录格式保持不变。
+        """
+        messages = [self._make_message(self.user_proxy.name, message)]
+        self._report_speaker(self.user_proxy.name)
+        
+        # 精简模式或上下文隔离时 Assistant 的输出不会被使用，不再调用
+        if not (self.lean or self.isolate_context):
+            messages.append(self._generate(self.assistant, messages))
+        
+        def expert_context(expert, transcript):
+            if self.isolate_context:
+                return [self._make_message(
+                    self.user_proxy.name,
+                    self._build_expert_prompt(expert, candidate_name, resume_text)
+                )]
+            return transcript
+        
+        if self.mode == SCREENING_MODE_PARALLEL:
+            transcript = list(messages)
+            for expert in self.experts:
+                self._report_speaker(expert.name)
+            with ThreadPoolExecutor(max_workers=len(self.experts)) as executor:
+                replies = list(executor.map(
+                    lambda expert: self._generate(
+                        expert, expert_context(expert, transcript), report=False, baseline=transcript
+                    ),
+                    self.experts
+                ))
+            messages.extend(replies)
+        else:
+            for expert in self.experts:
+                if expert is self.manager_agent and self._should_exit_early(messages):
+                    break
+                transcript = list(messages)
+                messages.append(self._generate(
+                    expert, expert_context(expert, transcript), baseline=transcript
+                ))
+        
+        if self._should_exit_early(messages):
+            messages.append(self._build_early_exit_verdict(messages))
+            self.messages = messages
+            return messages
+        
+        critic_context = messages
+        if self.isolate_context:
+            critic_context = [self._make_message(
+                self.user_proxy.name,
+                self._build_critic_prompt(candidate_name, messages[-len(self.experts):])
+            )]
+        messages.append(self._generate(self.critic, critic_context, baseline=list(messages)))
+        
+        self.messages = messages
+        return messages
+    
+    def _generate(
+        self,
+        agent: autogen.Agent,
+        context: List[Dict],
+        report: bool = True,
+        baseline: List[Dict] = None
+    ) -> Dict:
+        """
+        让代理基于给定上下文生成一次回复。
+        
+        参数:
+            agent: 发言代理
+            context: 实际发送给LLM的上下文
+            report: 是否上报发言进度
+            baseline: 完整对话上下文，用于统计上下文隔离节省的输入token
+            
+        异常:
+            AgentRunCancelled: 如果对话已被取消
+        """
+        if self.is_cancelled():
+            raise AgentRunCancelled("对话已取消")
+        if report:
+            self._report_speaker(agent.name)
+        self._record_input_tokens(agent, context, baseline if baseline is not None else context)
+        reply = agent.generate_reply(messages=[dict(m) for m in context])
+        if isinstance(reply, dict):
+            reply = reply.get('content') or ''
+        return self._make_message(agent.name, reply or '')
+    
+    def _record_input_tokens(self, agent: autogen.Agent, context: List[Dict], baseline: List[Dict]):
+        """累计实际输入token与完整上下文下的输入token估算值。"""
+        system_tokens = self.estimate_tokens(agent.system_message)
+        actual = system_tokens + sum(self.estimate_tokens(m.get('content')) for m in context)
+        full = system_tokens + sum(self.estimate_tokens(m.get('content')) for m in baseline)
+        with self._metrics_lock:
+            self.token_metrics['input_tokens'] += actual
+            self.token_metrics['baseline_input_tokens'] += full
+    
+    def get_token_metrics(self) -> Dict[str, Any]:
+        """
+        获取本次筛选的输入token统计。
+        
+        返回:
+            包含 input_tokens、baseline_input_tokens、input_tokens_saved、reduction_ratio 的字典
+        """
+        actual = self.token_metrics['input_tokens']
+        baseline = self.token_metrics['baseline_input_tokens']
+        saved = baseline - actual
+        return {
+            "input_tokens": actual,
+            "baseline_input_tokens": baseline,
+            "input_tokens_saved": saved,
+            "reduction_ratio": round(saved / baseline, 4) if baseline else 0.0,
+        }
+    
+    def _parse_expert_scores(self, messages: List[Dict]) -> Dict[str, float]:
+        """从对话记录中解析各专家的评分。"""
+        scores = {}
+        for message in messages:
+            label = EXPERT_SCORE_LABELS.get(message.get('name'))
+            if not label:
+                continue
+            match = re.search(rf'{label[1]}[：:]\s*\**([0-9.]+)\**分', message.get('content') or '')
+            if match:
+                try:
+                    scores[message['name']] = float(match.group(1))
+                except ValueError:
+                    continue
+        return scores
+    
+    def _should_exit_early(self, messages: List[Dict]) -> bool:
+        """HR评分和技术评分均已给出且都低于阈值时提前结束。"""
+        if self.early_exit_threshold is None:
+            return False
+        scores = self._parse_expert_scores(messages)
+        if any(name not in scores for name in EARLY_EXIT_EXPERTS):
+            return False
+        return all(scores[name] < self.early_exit_threshold for name in EARLY_EXIT_EXPERTS)
+    
+    def _build_early_exit_verdict(self, messages: List[Dict]) -> Dict:
+        """
+        构造代替Critic发言的确定性“不匹配”结论。
+        
+        综合评分按已完成评估维度的权重加权（未评估的项目管理维度不参与计算）。
+        """
+        scores = self._parse_expert_scores(messages)
+        scored = [
+            (key, label, scores[name])
+            for name, (key, label) in EXPERT_SCORE_LABELS.items() if name in scores
+        ]
+        total_weight = sum(self.weights[key] for key, _, _ in scored)
+        comprehensive = sum(self.weights[key] * score for key, _, score in scored) / total_weight
+        
+        details = "\n".join(f"- {label}：{score:g}分" for _, label, score in scored)
+        spoken = {m.get('name') for m in messages}
+        skipped = "" if self.manager_agent.name in spoken else "，未进行项目管理评估"
+        content = f"""综合评分：{comprehensive:.1f}分
+
+{details}
+
+HR评分与技术评分均低于提前淘汰阈值（{self.early_exit_threshold:g}分）{skipped}，综合评分按已评估维度的权重计算。
+
+招聘建议：不匹配"""
+        
+        self.early_exited = True
+        self._report_speaker(self.critic.name)
+        return self._make_message(self.critic.name, content)
+    
+    def _criteria_overview(self) -> str:
+        """生成招聘标准概述文本。"""
         position = self.criteria.get('position', '未知职位')
         required_skills = ', '.join(self.criteria.get('required_skills', []))
         min_experience = self.criteria.get('min_experience', 2)
         salary_range = self.criteria.get('salary_range', [8000, 20000])
         
-        message = f"""我们需要对一份求职简历进行综合评审。
-
-招聘标准概述：
-- 职位：{position}
+        return f"""- 职位：{position}
 - 必备技能：{required_skills}
 - 最低经验：{min_experience}年
-- 参考月薪资：{salary_range[0]}~{salary_range[1]}元
+- 参考月薪资：{salary_range[0]}~{salary_range[1]}元"""
+    
+    def _build_expert_prompt(self, expert: autogen.Agent, candidate_name: str, resume_text: str) -> str:
+        """构造上下文隔离模式下专家的输入：招聘标准、自身评分规则和简历原文。"""
+        rules = self.scoring_rules[EXPERT_RULE_KEYS[expert.name]]
+        rules_text = "\n".join(
+            f"- {rule['item']}（满分{rule['max_score']}分）：{rule['rule']}" for rule in rules
+        )
+        return f"""请对以下求职简历进行评审。
+
+招聘标准概述：
+{self._criteria_overview()}
+
+你的评分规则：
+{rules_text}
 
 姓名：{candidate_name}
 
 简历内容：
-{resume_text}
+{resume_text}"""
+    
+    def _build_critic_prompt(self, candidate_name: str, expert_messages: List[Dict]) -> str:
+        """构造上下文隔离模式下Critic的输入：三位专家的精简结论。"""
+        verdicts = "\n\n".join(
+            f"【{m['name']}】\n{self._compact_verdict(m.get('content', ''))}" for m in expert_messages
+        )
+        return f"""候选人：{candidate_name}
 
-请开始评审流程。"""
-        
-        return self.run_chat(self.user_proxy, message)
+三位专家的评审结论如下：
+
+{verdicts}
+
+请汇总以上结论给出综合评审。"""
+    
+    @classmethod
+    def _compact_verdict(cls, content: str) -> str:
+        """截取专家结论的开头（评分和主要理由），并保留建议月薪行。"""
+        text = (content or '').strip()
+        if len(text) <= cls.COMPACT_VERDICT_CHARS:
+            return text
+        compact = text[:cls.COMPACT_VERDICT_CHARS] + "……"
+        salary = re.search(r'建议月薪[：:][^\n]*', text)
+        if salary and salary.start() >= cls.COMPACT_VERDICT_CHARS:
+            compact += f"\n{salary.group(0)}"
+        return compact
+    
+    def _report_speaker(self, speaker_name: str):
+        """按标准发言顺序上报进度。"""
+        self.speakers.append(speaker_name)
+        self.update_task_speaker(speaker_name, SPEAKER_ORDER.index(speaker_name) + 1)
+    
+    @staticmethod
+    def _make_message(speaker_name: str, content: str) -> Dict:
+        """构造与群聊记录格式一致的消息。"""
+        return {"content": content, "role": "user", "name": speaker_name}
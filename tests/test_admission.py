@@ -0,0 +1,162 @@
+"""
+LLM密集型接口准入控制的测试。
+"""
+import json
+import os
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.utils import timezone
+
+from apps.common.admission import AdmissionController
+from apps.common.counters import SharedCounterService
+from apps.common.exceptions import OverloadedException
+from apps.task_queue.models import BackgroundJob
+from apps.task_queue.services import TaskQueueService
+from services.agents.llm_limiter import get_current_lane, get_shared_in_flight_key, LANE_BULK, LANE_INTERACTIVE
+
+
+class JobAdmissionTest(TestCase):
+    """批量任务提交准入的测试。"""
+    
+    def setUp(self):
+        cache.clear()
+        self.data = {
+            "position": {"position": "后端工程师"},
+            "resumes": [{"name": "a.txt", "content": "简历A"}]
+        }
+    
+    def test_queue_full_returns_429_with_retry_after(self):
+        """测试等待中的任务数达到上限时拒绝提交，Retry-After 按最近任务耗时估算。"""
+        now = timezone.now()
+        BackgroundJob.objects.create(
+            handler='tests.noop', status=BackgroundJob.Status.COMPLETED,
+            started_at=now - timedelta(seconds=30), finished_at=now
+        )
+        for _ in range(2):
+            TaskQueueService.enqueue('tests.noop')
+        
+        with self.settings(ADMISSION={'MAX_QUEUE_DEPTH': 2}, TASK_QUEUE={'CONCURRENCY': 2}):
+            response = Client().post('/api/screening/', data=json.dumps(self.data), content_type='application/json')
+        
+        self.assertEqual(response.status_code, 429)
+        # 2个任务 × 30秒 ÷ 2个并发
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(response.json()['data'], {'queue_depth': 2, 'llm_saturation': 0, 'estimated_wait': 30})
+        
+        # 释放的去重键不影响队列空闲后重新提交
+        BackgroundJob.objects.filter(handler='tests.noop').delete()
+        response = Client().post('/api/screening/', data=json.dumps(self.data), content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+    
+    def test_llm_saturation_lowers_queue_limit(self):
+        """测试所有进程的LLM用量接近上限时按较低的队列上限拒绝，预计等待时间计入LLM用量。"""
+        now = timezone.now()
+        BackgroundJob.objects.create(
+            handler='tests.noop', status=BackgroundJob.Status.COMPLETED,
+            started_at=now - timedelta(seconds=30), finished_at=now
+        )
+        TaskQueueService.enqueue('tests.noop')
+        settings = {'MAX_QUEUE_DEPTH': 100, 'SATURATED_QUEUE_DEPTH': 1, 'LLM_SATURATION_THRESHOLD': 0.9}
+        env = {'LLM_BASE_URL': 'https://llm.example.com/v1', 'LLM_API_KEY': '', 'LLM_ENDPOINTS': '',
+               'LLM_SHARED_MAX_CONCURRENCY': '3', 'LLM_INTERACTIVE_RESERVED': '1', 'LLM_RPM_LIMIT': '0'}
+        key = get_shared_in_flight_key('https://llm.example.com/v1')
+        
+        with self.settings(ADMISSION=settings, TASK_QUEUE={'CONCURRENCY': 2}), mock.patch.dict(os.environ, env):
+            # 批量额度（3 - 1）尚未用满
+            SharedCounterService.acquire(key)
+            AdmissionController.admit_job()
+            
+            SharedCounterService.acquire(key)
+            with self.assertRaises(OverloadedException) as context:
+                AdmissionController.admit_job()
+        
+        # (1个任务 ÷ 2个并发 + 用量1.0) × 30秒
+        self.assertEqual(context.exception.retry_after, 45)
+        self.assertEqual(context.exception.errors, {'queue_depth': 1, 'llm_saturation': 1.0, 'estimated_wait': 45})
+    
+    def test_webhook_jobs_not_counted(self):
+        """测试回调推送任务不计入队列深度。"""
+        from apps.task_queue.webhooks import WEBHOOK_JOB_HANDLER
+        
+        TaskQueueService.enqueue(WEBHOOK_JOB_HANDLER, payload={})
+        with self.settings(ADMISSION={'MAX_QUEUE_DEPTH': 1}):
+            AdmissionController.admit_job()
+
+
+class InteractiveAdmissionTest(TestCase):
+    """交互接口准入的测试。"""
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_interactive_lane_and_counter(self):
+        """测试交互请求在交互通道内执行，结束后归还计数。"""
+        with self.settings(ADMISSION={'MAX_INTERACTIVE_IN_FLIGHT': 1}):
+            with AdmissionController.interactive():
+                self.assertEqual(get_current_lane(), LANE_INTERACTIVE)
+                with self.assertRaises(OverloadedException):
+                    with AdmissionController.interactive():
+                        pass
+            self.assertEqual(get_current_lane(), LANE_BULK)
+            
+            with AdmissionController.interactive():
+                pass
+    
+    def test_saturated_returns_503(self):
+        """测试进行中的交互请求达到上限时面试辅助接口返回503和Retry-After。"""
+        SharedCounterService.acquire('admission:interactive:in_flight')
+        cache.set('admission:interactive:latency', 4.2)
+        
+        with self.settings(ADMISSION={'MAX_INTERACTIVE_IN_FLIGHT': 1}):
+            response = Client().post(f'/api/interviews/sessions/{uuid.uuid4()}/questions/')
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+        self.assertEqual(response.json()['data'], {'in_flight': 1, 'estimated_wait': 4})
+        self.assertEqual(SharedCounterService.get('admission:interactive:in_flight'), 1)
+
+
+class SharedCounterTest(TestCase):
+    """跨进程共享计数器的测试。"""
+    
+    def test_acquire_respects_limit(self):
+        """测试计数达到上限时不再增加，归还后可再次计数。"""
+        self.assertEqual(SharedCounterService.acquire('k', limit=2), 1)
+        self.assertEqual(SharedCounterService.acquire('k', limit=2), 2)
+        self.assertIsNone(SharedCounterService.acquire('k', limit=2))
+        self.assertEqual(SharedCounterService.get('k'), 2)
+        
+        SharedCounterService.release('k')
+        SharedCounterService.release('k')
+        SharedCounterService.release('k')
+        self.assertEqual(SharedCounterService.get('k'), 0)
+        self.assertEqual(SharedCounterService.acquire('k', limit=2), 1)
+    
+    def test_ttl_refreshed_on_acquire(self):
+        """测试进行中计数每次加1时顺延有效期，过期后从1重新计数。"""
+        start = timezone.now()
+        with mock.patch('apps.common.counters.timezone.now', return_value=start):
+            SharedCounterService.acquire('k', ttl=60)
+        with mock.patch('apps.common.counters.timezone.now', return_value=start + timedelta(seconds=50)):
+            self.assertEqual(SharedCounterService.acquire('k', ttl=60), 2)
+        # 首次计数已超过60秒，但有效期已被第二次计数顺延
+        with mock.patch('apps.common.counters.timezone.now', return_value=start + timedelta(seconds=100)):
+            self.assertEqual(SharedCounterService.get('k'), 2)
+        # 有效期内无人使用，遗留计数清零
+        with mock.patch('apps.common.counters.timezone.now', return_value=start + timedelta(seconds=111)):
+            self.assertEqual(SharedCounterService.get('k'), 0)
+            self.assertEqual(SharedCounterService.acquire('k', ttl=60), 1)
+    
+    def test_fixed_window_not_refreshed(self):
+        """测试固定窗口计数加1时不顺延有效期。"""
+        start = timezone.now()
+        with mock.patch('apps.common.counters.timezone.now', return_value=start):
+            SharedCounterService.acquire('rpm', ttl=60, refresh=False)
+        with mock.patch('apps.common.counters.timezone.now', return_value=start + timedelta(seconds=50)):
+            self.assertEqual(SharedCounterService.acquire('rpm', ttl=60, refresh=False), 2)
+        with mock.patch('apps.common.counters.timezone.now', return_value=start + timedelta(seconds=61)):
+            self.assertEqual(SharedCounterService.acquire('rpm', ttl=60, refresh=False), 1)
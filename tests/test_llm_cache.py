@@ -0,0 +1,86 @@
+"""
+LLM响应缓存的测试。
+"""
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase
+
+from services.agents import llm_cache
+from services.agents.llm_cache import LLMResponseCache, cached_chat_completion
+
+
+def fake_response(content):
+    """构造与OpenAI返回结构一致的响应。"""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class LLMResponseCacheTest(TestCase):
+    """LLMResponseCache的测试。"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite3')
+        self.messages = [{"role": "user", "content": "你好"}]
+    
+    def tearDown(self):
+        llm_cache._cache_instance = None
+        self.tmpdir.cleanup()
+    
+    def test_ttl_and_lru_eviction(self):
+        """测试过期条目失效，超出上限时淘汰最久未访问的条目。"""
+        cache = LLMResponseCache(self.path, ttl=60, max_entries=2)
+        cache.set('a', 'm', 'A')
+        cache.set('b', 'm', 'B')
+        time.sleep(0.01)
+        self.assertEqual(cache.get('a'), 'A')
+        cache.set('c', 'm', 'C')
+        
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'C')
+        
+        cache.ttl = 0.001
+        time.sleep(0.01)
+        self.assertIsNone(cache.get('a'))
+    
+    def test_call_site_opt_in_and_counters(self):
+        """测试只有开启缓存的调用点才会复用响应，并按调用点统计命中次数。"""
+        client = mock.Mock()
+        client.chat.completions.create.return_value = fake_response("回复")
+        
+        env = {'LLM_CACHE_PATH': self.path, 'LLM_CACHE_SITES': 'evaluation'}
+        with mock.patch.dict(os.environ, env):
+            for _ in range(2):
+                self.assertEqual(
+                    cached_chat_completion(client, 'evaluation', 'm', self.messages, temperature=0), "回复"
+                )
+            self.assertEqual(client.chat.completions.create.call_count, 1)
+            
+            # 温度不同视为不同请求
+            cached_chat_completion(client, 'evaluation', 'm', self.messages, temperature=0.5)
+            self.assertEqual(client.chat.completions.create.call_count, 2)
+            
+            # 未开启缓存的调用点每次都调用LLM
+            for _ in range(2):
+                cached_chat_completion(client, 'dev_tools', 'm', self.messages, temperature=0)
+            self.assertEqual(client.chat.completions.create.call_count, 4)
+            
+            stats = llm_cache.get_llm_cache().stats()
+        
+        self.assertEqual(stats['call_sites'], {'evaluation': {'hits': 1, 'misses': 2}})
+        self.assertEqual(stats['entries'], 2)
+        
+        # 统计持久化在缓存文件中，其他进程（如 manage.py llm_cache）可读取
+        reopened = LLMResponseCache(self.path)
+        self.assertEqual(reopened.stats()['call_sites'], {'evaluation': {'hits': 1, 'misses': 2}})
+    
+    def test_wildcard_excludes_random_resume_generation(self):
+        """测试 * 不包含依赖随机性的 dev_tools 调用点，显式列出时才缓存。"""
+        with mock.patch.dict(os.environ, {'LLM_CACHE_PATH': self.path, 'LLM_CACHE_SITES': '*'}):
+            self.assertTrue(llm_cache.is_cache_enabled('interview_assist'))
+            self.assertFalse(llm_cache.is_cache_enabled('dev_tools'))
+        with mock.patch.dict(os.environ, {'LLM_CACHE_PATH': self.path, 'LLM_CACHE_SITES': '*,dev_tools'}):
+            self.assertTrue(llm_cache.is_cache_enabled('dev_tools'))
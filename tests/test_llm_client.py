@@ -0,0 +1,50 @@
+"""
+共享LLM客户端注册表的测试。
+"""
+import copy
+import os
+from unittest import mock
+
+from django.test import TestCase
+
+from services.agents import llm_client
+from services.agents.llm_client import get_openai_client, get_http_client
+
+
+class LLMClientRegistryTest(TestCase):
+    """LLM客户端注册表的测试。"""
+    
+    def tearDown(self):
+        llm_client.reset_clients()
+    
+    def test_clients_are_shared(self):
+        """测试相同配置复用同一客户端，同一服务地址的不同密钥各自限流但共享连接池。"""
+        from services.agents import InterviewAssistAgent, CandidateComprehensiveAnalyzer
+        
+        with mock.patch.dict(os.environ, {'LLM_API_KEY': 'sk-test', 'LLM_BASE_URL': 'https://llm.example.com/v1'}):
+            first = InterviewAssistAgent(job_config={"title": "A"})
+            second = InterviewAssistAgent(job_config={"title": "B"})
+            analyzer = CandidateComprehensiveAnalyzer()
+        
+        self.assertIs(first.client, second.client)
+        self.assertIs(first.client, analyzer.client)
+        
+        client = get_openai_client('sk-test', 'https://llm.example.com/v1', 120)
+        other_key = get_openai_client('sk-other', 'https://llm.example.com/v1', 120)
+        self.assertIsNot(other_key, client)
+        self.assertIsNot(other_key._client, client._client)
+        self.assertIs(other_key._client._transport, client._client._transport)
+    
+    def test_autogen_config_keeps_shared_pool(self):
+        """测试autogen深拷贝llm_config后仍使用共享连接池。"""
+        from services.agents import get_llm_config
+        
+        config = copy.deepcopy(get_llm_config())
+        http_client = config["config_list"][0]["http_client"]
+        self.assertIs(http_client, get_http_client(config["config_list"][0]["base_url"], config["config_list"][0]["api_key"]))
+    
+    def test_reset_after_fork(self):
+        """测试fork后子进程重新创建客户端。"""
+        client = get_openai_client('sk-test', 'https://llm.example.com/v1')
+        llm_client.reset_clients()
+        self.assertIsNot(get_openai_client('sk-test', 'https://llm.example.com/v1'), client)
@@ -0,0 +1,255 @@
+"""
+LLM请求限流器的测试。
+"""
+import json
+import os
+import threading
+import time
+from unittest import mock
+
+import httpx
+from django.test import TestCase
+
+from services.agents import llm_client, llm_limiter
+from services.agents.llm_limiter import (
+    EndpointRateLimiter, TokenBucket, estimate_request_tokens, get_shared_in_flight_key, get_shared_rpm_key,
+    llm_lane, LANE_INTERACTIVE
+)
+
+
+class FakeClock:
+    """可手动推进的时钟。"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class FakeSharedCounter:
+    """进程内模拟的跨进程共享计数器。"""
+    
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+    
+    def acquire(self, key, limit=0, ttl=None, refresh=True):
+        with self.lock:
+            if limit and self.values.get(key, 0) >= limit:
+                return None
+            self.values[key] = self.values.get(key, 0) + 1
+            return self.values[key]
+    
+    def release(self, key):
+        with self.lock:
+            self.values[key] = max(0, self.values.get(key, 0) - 1)
+
+
+class TokenBucketTest(TestCase):
+    """令牌桶的测试。"""
+    
+    def test_refill_and_overdraft(self):
+        """测试令牌按分钟速率补充，透支后需等待补足。"""
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock)
+        self.assertEqual(bucket.wait_time(60), 0)
+        
+        bucket.consume(70)
+        self.assertAlmostEqual(bucket.wait_time(1), 11)
+        
+        clock.now = 11
+        self.assertEqual(bucket.wait_time(1), 0)
+        # 超过容量的请求按容量计算，不会永远等待
+        self.assertAlmostEqual(bucket.wait_time(1000), 59)
+
+
+class EndpointRateLimiterTest(TestCase):
+    """服务地址限流器的测试。"""
+    
+    def test_concurrency_bound(self):
+        """测试同时进行的请求数不超过上限，其余请求排队而不是失败。"""
+        limiter = EndpointRateLimiter(max_concurrency=2)
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+        
+        def call():
+            with limiter.limit():
+                with lock:
+                    state["current"] += 1
+                    state["peak"] = max(state["peak"], state["current"])
+                time.sleep(0.02)
+                with lock:
+                    state["current"] -= 1
+        
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(limiter.stats(), {"in_flight": 0, "queued": 0})
+    
+    def test_waiters_released_in_arrival_order(self):
+        """测试额度释放后按到达顺序放行排队的请求。"""
+        limiter = EndpointRateLimiter(max_concurrency=1)
+        limiter.acquire()
+        order = []
+        
+        def call(index):
+            with limiter.limit():
+                order.append(index)
+        
+        threads = []
+        for index in range(4):
+            thread = threading.Thread(target=call, args=(index,))
+            thread.start()
+            threads.append(thread)
+            while limiter.stats()["queued"] < index + 1:
+                time.sleep(0.001)
+        
+        limiter.release()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(order, [0, 1, 2, 3])
+    
+    def test_interactive_reserved_capacity(self):
+        """测试批量请求不占用预留额度，交互请求优先于排队的批量请求。"""
+        limiter = EndpointRateLimiter(max_concurrency=2, reserved=1)
+        limiter.acquire()
+        order = []
+        
+        def call(lane=None):
+            if lane:
+                with llm_lane(lane), limiter.limit():
+                    order.append(lane)
+            else:
+                with limiter.limit():
+                    order.append("bulk")
+        
+        bulk = threading.Thread(target=call)
+        bulk.start()
+        while limiter.stats()["queued"] < 1:
+            time.sleep(0.001)
+        
+        # 批量请求等待时，交互请求仍可使用预留额度
+        call(LANE_INTERACTIVE)
+        self.assertEqual(order, [LANE_INTERACTIVE])
+        
+        limiter.release()
+        bulk.join(5)
+        self.assertEqual(order, [LANE_INTERACTIVE, "bulk"])
+        self.assertEqual(limiter.stats(), {"in_flight": 0, "queued": 0})
+    
+    def test_shared_capacity_across_processes(self):
+        """测试共享额度按端点跨进程计数，批量请求合计不超过 shared_concurrency - reserved。"""
+        counter = FakeSharedCounter()
+        key = get_shared_in_flight_key('https://llm.example.com/v1')
+        # 两个限流器模拟工作进程和Web进程中同一端点的限流器
+        worker = EndpointRateLimiter(max_concurrency=4, shared_concurrency=2, reserved=1,
+                                     endpoint='https://llm.example.com/v1')
+        web = EndpointRateLimiter(max_concurrency=4, shared_concurrency=2, reserved=1,
+                                  endpoint='https://llm.example.com/v1')
+        order = []
+        
+        with mock.patch.object(llm_limiter, '_shared_counter', counter), \
+                mock.patch.object(llm_limiter, 'SHARED_POLL_INTERVAL', 0.01):
+            worker.acquire()
+            self.assertEqual(counter.values[key], 1)
+            
+            def bulk():
+                with worker.limit():
+                    order.append("bulk")
+            
+            thread = threading.Thread(target=bulk)
+            thread.start()
+            time.sleep(0.05)
+            # 工作进程的批量请求已用完共享的批量额度，进程内额度虽有剩余也要等待
+            self.assertEqual(order, [])
+            
+            # Web进程的交互请求仍可使用预留额度
+            with llm_lane(LANE_INTERACTIVE), web.limit():
+                order.append(LANE_INTERACTIVE)
+                self.assertEqual(counter.values[key], 2)
+            
+            worker.release()
+            thread.join(5)
+        
+        self.assertEqual(order, [LANE_INTERACTIVE, "bulk"])
+        self.assertEqual(counter.values[key], 0)
+    
+    def test_shared_request_count(self):
+        """测试配置了RPM上限时累计所有进程本分钟的请求数。"""
+        counter = FakeSharedCounter()
+        limiter = EndpointRateLimiter(rpm=60, endpoint='https://llm.example.com/v1')
+        
+        with mock.patch.object(llm_limiter, '_shared_counter', counter):
+            for _ in range(2):
+                with limiter.limit():
+                    pass
+        
+        self.assertEqual(counter.values, {get_shared_rpm_key('https://llm.example.com/v1'): 2})
+    
+    def test_shared_counter_unavailable_falls_back_to_local_limit(self):
+        """测试共享计数器不可用时只按进程内额度限流。"""
+        counter = mock.Mock()
+        counter.acquire.side_effect = RuntimeError("database unavailable")
+        limiter = EndpointRateLimiter(max_concurrency=1, shared_concurrency=1, endpoint='https://llm.example.com/v1')
+        
+        with mock.patch.object(llm_limiter, '_shared_counter', counter):
+            with limiter.limit():
+                pass
+        
+        counter.release.assert_not_called()
+        self.assertEqual(limiter.stats(), {"in_flight": 0, "queued": 0})
+    
+    def test_token_budget_settled_with_actual_usage(self):
+        """测试TPM预算按实际用量修正。"""
+        clock = FakeClock()
+        limiter = EndpointRateLimiter(tpm=600, clock=clock)
+        with limiter.limit(100):
+            pass
+        limiter.settle(100, 400)
+        self.assertAlmostEqual(limiter.token_bucket.tokens, 200)
+    
+    def test_estimate_request_tokens(self):
+        """测试按消息内容和max_tokens估算token数。"""
+        body = json.dumps({
+            "model": "m",
+            "messages": [{"role": "user", "content": "你好世界"}, {"role": "assistant", "content": "abcdefgh"}],
+            "max_tokens": 10,
+        }).encode()
+        self.assertEqual(estimate_request_tokens(body), 4 + 2 + 10)
+        self.assertEqual(estimate_request_tokens(b'not json'), 0)
+
+
+class SharedClientLimitTest(TestCase):
+    """共享HTTP客户端接入限流器的测试。"""
+    
+    def tearDown(self):
+        llm_client.reset_clients()
+    
+    def test_openai_requests_go_through_limiter(self):
+        """测试OpenAI客户端的请求经过服务地址的限流器并按实际用量结算。"""
+        def handler(request):
+            return httpx.Response(200, json={
+                "id": "1", "object": "chat.completion", "created": 0, "model": "m",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+                "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+            })
+        
+        with mock.patch.dict(os.environ, {'LLM_MAX_CONCURRENCY': '3', 'LLM_TPM_LIMIT': '6000'}):
+            client = llm_client.get_openai_client('sk-test', 'https://llm.example.com/v1')
+        http_client = client._client
+        http_client._transport = httpx.MockTransport(handler)
+        limiter = http_client.limiter
+        self.assertEqual(limiter.max_concurrency, 3)
+        
+        with mock.patch.object(limiter, 'acquire', wraps=limiter.acquire) as acquire, \
+                mock.patch.object(limiter, 'settle', wraps=limiter.settle) as settle:
+            client.chat.completions.create(model="m", messages=[{"role": "user", "content": "abcdefgh"}])
+        
+        acquire.assert_called_once_with(2)
+        settle.assert_called_once_with(2, 6)
+        self.assertEqual(limiter.stats()["in_flight"], 0)
@@ -0,0 +1,149 @@
+"""
+LLM请求容错层（重试、熔断、对冲）的测试。
+"""
+import os
+import threading
+import time
+from unittest import mock
+
+import httpx
+from django.test import TestCase
+
+from services.agents import llm_client
+from services.agents.llm_resilience import CircuitBreaker, CircuitOpenError, ResilientSender
+
+
+def completion(content="ok"):
+    return httpx.Response(200, json={
+        "id": "1", "object": "chat.completion", "created": 0, "model": "m",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    })
+
+
+class CircuitBreakerTest(TestCase):
+    """熔断器的测试。"""
+    
+    def test_open_half_open_and_close(self):
+        """测试连续失败后熔断，冷却后只放行一个探测请求，探测成功后恢复。"""
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+        
+        now[0] = 10
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        
+        now[0] = 20
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+
+class ResilientSenderTest(TestCase):
+    """容错发送器的测试。"""
+    
+    def test_retries_transient_errors(self):
+        """测试超时和5xx按退避重试，429按Retry-After等待，每次尝试都计入指标。"""
+        delays = []
+        sender = ResilientSender(max_attempts=4, backoff_base=1, backoff_max=8, sleep=delays.append)
+        results = iter([
+            httpx.ReadTimeout("timeout"),
+            httpx.Response(503),
+            httpx.Response(429, headers={'Retry-After': '3'}),
+            httpx.Response(200),
+        ])
+        
+        def attempt():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        
+        self.assertEqual(sender.send(attempt).status_code, 200)
+        self.assertEqual(len(delays), 3)
+        self.assertLessEqual(delays[0], 1)
+        self.assertLessEqual(delays[1], 2)
+        self.assertEqual(delays[2], 3)
+        
+        snapshot = sender.metrics.snapshot()
+        self.assertEqual(snapshot["attempts"], 4)
+        self.assertEqual(snapshot["retries"], 3)
+        self.assertEqual(snapshot["outcomes"], {"timeout": 1, "http_503": 1, "http_429": 1, "success": 1})
+    
+    def test_non_retryable_and_exhausted(self):
+        """测试4xx不重试，重试耗尽时返回最后的错误响应。"""
+        sender = ResilientSender(max_attempts=2, sleep=lambda delay: None)
+        self.assertEqual(sender.send(lambda: httpx.Response(400)).status_code, 400)
+        self.assertEqual(sender.send(lambda: httpx.Response(502)).status_code, 502)
+        self.assertEqual(sender.metrics.snapshot()["attempts"], 3)
+    
+    def test_circuit_open_fails_fast(self):
+        """测试熔断后请求不再发出，直接抛出连接错误。"""
+        sender = ResilientSender(max_attempts=1, failure_threshold=2, sleep=lambda delay: None)
+        calls = []
+        
+        def attempt():
+            calls.append(1)
+            raise httpx.ConnectError("refused")
+        
+        for _ in range(2):
+            with self.assertRaises(httpx.ConnectError):
+                sender.send(attempt)
+        with self.assertRaises(CircuitOpenError):
+            sender.send(attempt)
+        
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sender.metrics.snapshot()["outcomes"]["circuit_open"], 1)
+    
+    def test_hedged_request_after_p95(self):
+        """测试请求超过p95延迟未返回时发出对冲请求，返回先完成的结果。"""
+        sender = ResilientSender(hedge=True, hedge_min_samples=5)
+        for _ in range(5):
+            sender.metrics.record('success', 0.01)
+        
+        release = threading.Event()
+        calls = []
+        
+        def attempt():
+            calls.append(1)
+            if len(calls) == 1:
+                # 第一个请求卡住，直到对冲请求完成
+                release.wait(5)
+                return httpx.Response(200, text="slow")
+            return httpx.Response(200, text="fast")
+        
+        response = sender.send(attempt)
+        release.set()
+        
+        self.assertEqual(response.text, "fast")
+        self.assertEqual(sender.metrics.snapshot()["hedges"], 1)
+
+
+class SharedClientResilienceTest(TestCase):
+    """共享HTTP客户端接入容错层的测试。"""
+    
+    def tearDown(self):
+        llm_client.reset_clients()
+    
+    def test_openai_client_retries_through_shared_client(self):
+        """测试OpenAI客户端的请求由共享客户端重试（SDK自身不重试），指标按调用端点汇总。"""
+        responses = iter([httpx.Response(500), completion("done")])
+        
+        with mock.patch.dict(os.environ, {'LLM_RETRY_BACKOFF_BASE': '0'}):
+            client = llm_client.get_openai_client('sk-test', 'https://llm.example.com/v1')
+        client._client._transport = httpx.MockTransport(lambda request: next(responses))
+        
+        result = client.chat.completions.create(model="m", messages=[{"role": "user", "content": "hi"}])
+        
+        self.assertEqual(result.choices[0].message.content, "done")
+        self.assertEqual(client.max_retries, 0)
+        metrics = llm_client.get_llm_metrics()[llm_client.get_endpoint_id('https://llm.example.com/v1', 'sk-test')]
+        self.assertEqual(metrics["outcomes"], {"http_500": 1, "success": 1})
+        self.assertEqual(metrics["circuit"], "closed")
@@ -0,0 +1,132 @@
+"""
+LLM多端点路由的测试。
+"""
+import os
+from unittest import mock
+
+import httpx
+import openai
+from django.test import TestCase
+
+from services.agents import llm_client
+from services.agents.llm_client import get_http_client
+from services.agents.llm_config import get_config_list, get_llm_config
+from services.agents.llm_router import get_routed_client, rank_endpoints
+
+
+PRIMARY = 'https://primary.example.com/v1'
+BACKUP = 'https://backup.example.com/v1'
+
+ENV = {
+    'LLM_MODEL': 'model-a',
+    'LLM_API_KEY': 'sk-1',
+    'LLM_BASE_URL': PRIMARY,
+    'LLM_ENDPOINTS': f'[{{"api_key": "sk-2"}}, {{"base_url": "{BACKUP}", "api_key": "sk-3", "model": "model-b"}}]',
+    'LLM_MAX_ATTEMPTS': '1',
+}
+
+
+def completion(content="ok"):
+    return httpx.Response(200, json={
+        "id": "1", "object": "chat.completion", "created": 0, "model": "m",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    })
+
+
+class LLMRouterTest(TestCase):
+    """多端点路由的测试。"""
+    
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        llm_client.reset_clients()
+    
+    def tearDown(self):
+        llm_client.reset_clients()
+    
+    def http_client(self, index):
+        config = get_config_list()[index]
+        return get_http_client(config["base_url"], config["api_key"])
+    
+    def test_config_list_from_env(self):
+        """测试备用端点按配置顺序排在主服务地址之后，未填写的字段沿用主服务地址的配置。"""
+        config_list = get_config_list()
+        
+        self.assertEqual(
+            [(config["base_url"], config["api_key"], config["model"]) for config in config_list],
+            [(PRIMARY, 'sk-1', 'model-a'), (PRIMARY, 'sk-2', 'model-a'), (BACKUP, 'sk-3', 'model-b')]
+        )
+        
+        with mock.patch.dict(os.environ, {'LLM_ENDPOINTS': '{"api_key": "sk-2"}'}):
+            with self.assertRaises(ValueError):
+                get_config_list()
+    
+    def test_rank_by_latency_errors_and_load(self):
+        """测试按延迟、错误率和并发数排序，熔断中的端点排在最后。"""
+        config_list = get_config_list()
+        for index, latency in enumerate([2.0, 1.0, 1.5]):
+            self.http_client(index).resilience.metrics.record('success', latency)
+        self.assertEqual([config["api_key"] for config in rank_endpoints(config_list)], ['sk-2', 'sk-3', 'sk-1'])
+        
+        # 错误率升高的端点代价上升
+        self.http_client(1).resilience.metrics.record('http_503')
+        self.http_client(1).resilience.metrics.record('timeout')
+        self.assertEqual(rank_endpoints(config_list)[0]["api_key"], 'sk-3')
+        
+        # 并发请求多的端点代价上升
+        self.http_client(2).limiter.acquire()
+        self.addCleanup(self.http_client(2).limiter.release)
+        self.assertEqual(rank_endpoints(config_list)[0]["api_key"], 'sk-1')
+        
+        # 熔断中的端点排在最后
+        breaker = self.http_client(0).resilience.breaker
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        self.assertEqual(rank_endpoints(config_list)[-1]["api_key"], 'sk-1')
+    
+    def test_routed_client_fails_over(self):
+        """测试端点返回可重试错误时切换到下一个端点，并使用该端点配置的模型名。"""
+        requests = []
+        
+        def handler(status_code):
+            def handle(request):
+                requests.append((str(request.url.host), request.headers['Authorization'], request.read()))
+                return completion("backup") if status_code == 200 else httpx.Response(status_code)
+            return handle
+        
+        self.http_client(0)._transport = httpx.MockTransport(handler(503))
+        self.http_client(1)._transport = httpx.MockTransport(handler(500))
+        self.http_client(2)._transport = httpx.MockTransport(handler(200))
+        
+        result = get_routed_client(30).chat.completions.create(
+            model="model-a", messages=[{"role": "user", "content": "hi"}]
+        )
+        
+        self.assertEqual(result.choices[0].message.content, "backup")
+        self.assertEqual([auth for host, auth, body in requests], ['Bearer sk-1', 'Bearer sk-2', 'Bearer sk-3'])
+        self.assertIn(b'"model-b"', requests[-1][2])
+        
+        # 之后的请求优先发往健康的端点
+        requests.clear()
+        get_routed_client(30).chat.completions.create(model="model-a", messages=[{"role": "user", "content": "hi"}])
+        self.assertEqual(requests[0][0], 'backup.example.com')
+    
+    def test_non_retryable_error_does_not_fail_over(self):
+        """测试请求本身有误（4xx）时不切换端点。"""
+        self.http_client(0)._transport = httpx.MockTransport(lambda request: httpx.Response(400))
+        self.http_client(1)._transport = httpx.MockTransport(lambda request: completion())
+        
+        with self.assertRaises(openai.BadRequestError):
+            get_routed_client(30).chat.completions.create(model="model-a", messages=[{"role": "user", "content": "hi"}])
+    
+    def test_autogen_config_list_is_ranked(self):
+        """测试autogen的config_list按路由代价排序，并附带各端点的共享HTTP客户端。"""
+        self.http_client(0).resilience.metrics.record('success', 3.0)
+        self.http_client(1).resilience.metrics.record('success', 2.0)
+        self.http_client(2).resilience.metrics.record('success', 1.0)
+        
+        config_list = get_llm_config()["config_list"]
+        
+        self.assertEqual([config["api_key"] for config in config_list], ['sk-3', 'sk-2', 'sk-1'])
+        self.assertIs(config_list[0]["http_client"], self.http_client(2))
@@ -0,0 +1,163 @@
+"""
+分角色模型层级与用量统计的测试。
+"""
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+import httpx
+import openai
+from django.core.management import call_command
+from django.test import TestCase
+
+from services.agents import llm_client, llm_usage
+from services.agents.llm_config import (
+    get_llm_config, get_role_model, get_role_tiers,
+    ROLE_SCREENING_ASSISTANT, ROLE_SCREENING_EXPERT, ROLE_SCREENING_CRITIC,
+    ROLE_INTERVIEW_QUESTIONS, ROLE_INTERVIEW_REPORT, ROLE_EVALUATION_REPORT,
+)
+from services.agents.llm_router import get_routed_client
+
+
+TIER_ENV = {
+    'LLM_MODEL': 'model-default',
+    'LLM_API_KEY': 'sk-test',
+    'LLM_BASE_URL': 'https://llm.example.com/v1',
+    'LLM_ENDPOINTS': '',
+    'LLM_MODEL_TIERS': '{"fast": "model-fast", "strong": "model-strong"}',
+    'LLM_ROLE_TIERS': (
+        '{"screening_expert": "fast", "interview_questions": "fast", '
+        '"screening_critic": "strong", "interview_report": "strong", "evaluation_report": "strong"}'
+    ),
+    'LLM_MODEL_PRICES': '{"model-fast": [1, 2], "model-strong": [10, 20]}',
+    'LLM_MAX_ATTEMPTS': '1',
+}
+
+
+class RoleTierConfigTest(TestCase):
+    """角色模型层级配置的测试。"""
+    
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ, TIER_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        llm_client.reset_clients()
+    
+    def test_role_models(self):
+        """测试按层级选择模型，未配置的角色使用 LLM_MODEL。"""
+        self.assertEqual(get_role_model(ROLE_SCREENING_EXPERT), 'model-fast')
+        self.assertEqual(get_role_model(ROLE_SCREENING_CRITIC), 'model-strong')
+        self.assertEqual(get_role_model(ROLE_SCREENING_ASSISTANT), 'model-default')
+        self.assertEqual(get_role_model(None), 'model-default')
+        self.assertEqual(get_role_tiers()[ROLE_SCREENING_ASSISTANT], 'default')
+    
+    def test_invalid_mapping(self):
+        """测试角色未知或层级未定义时报错。"""
+        with mock.patch.dict(os.environ, {'LLM_ROLE_TIERS': '{"unknown_role": "fast"}'}):
+            with self.assertRaises(ValueError):
+                get_role_tiers()
+        with mock.patch.dict(os.environ, {'LLM_ROLE_TIERS': '{"screening_critic": "huge"}'}):
+            with self.assertRaises(ValueError):
+                get_role_model(ROLE_SCREENING_CRITIC)
+    
+    def test_screening_agents_use_role_models(self):
+        """测试筛选代理按角色使用各自层级的模型，并在请求头中标记角色。"""
+        from services.agents import create_screening_agents
+        
+        _, assistant, hr_agent, technical_agent, manager_agent, critic = create_screening_agents({})
+        
+        def model_of(agent):
+            return agent.llm_config["config_list"][0]["model"]
+        
+        self.assertEqual(model_of(assistant), 'model-default')
+        self.assertEqual([model_of(agent) for agent in (hr_agent, technical_agent, manager_agent)], ['model-fast'] * 3)
+        self.assertEqual(model_of(critic), 'model-strong')
+        self.assertEqual(
+            critic.llm_config["config_list"][0]["default_headers"], {'X-LLM-Role': ROLE_SCREENING_CRITIC}
+        )
+        self.assertNotIn("default_headers", get_llm_config()["config_list"][0])
+    
+    def test_direct_callers_use_role_models(self):
+        """测试面试助手和综合分析按调用阶段选择模型。"""
+        from services.agents import InterviewAssistAgent, CandidateComprehensiveAnalyzer
+        
+        agent = InterviewAssistAgent(job_config={"title": "A"})
+        with mock.patch('services.agents.interview_assist_agent.cached_chat_completion', return_value='{}') as call:
+            agent.generate_final_report("张三", [])
+            agent.generate_skill_based_questions("Python", 1)
+        
+        self.assertEqual(
+            [(c.kwargs["model"], c.kwargs["role"]) for c in call.call_args_list],
+            [('model-strong', ROLE_INTERVIEW_REPORT), ('model-fast', ROLE_INTERVIEW_QUESTIONS)]
+        )
+        
+        analyzer = CandidateComprehensiveAnalyzer()
+        self.assertEqual(analyzer.dimension_model, 'model-default')
+        self.assertEqual(analyzer.report_model, 'model-strong')
+
+
+class RoleUsageStatsTest(TestCase):
+    """分角色用量统计的测试。"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        env = dict(TIER_ENV, LLM_USAGE_PATH=os.path.join(self.tmpdir.name, 'usage.sqlite3'))
+        patcher = mock.patch.dict(os.environ, env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def tearDown(self):
+        llm_client.reset_clients()
+        llm_usage._stats_instance = None
+        self.tmpdir.cleanup()
+    
+    def test_records_role_latency_tokens_and_cost(self):
+        """测试带角色的请求按 (角色, 模型) 记录调用、失败、token和费用，角色请求头不发往服务端。"""
+        seen_headers = []
+        responses = iter([
+            httpx.Response(200, json={
+                "id": "1", "object": "chat.completion", "created": 0, "model": "model-strong",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+                "usage": {"prompt_tokens": 1000, "completion_tokens": 500, "total_tokens": 1500},
+            }),
+            httpx.Response(400),
+            httpx.Response(400),
+        ])
+        
+        def handler(request):
+            seen_headers.append(request.headers.get('X-LLM-Role'))
+            return next(responses)
+        
+        llm_client.get_http_client('https://llm.example.com/v1', 'sk-test')._transport = httpx.MockTransport(handler)
+        client = get_routed_client(30)
+        messages = [{"role": "user", "content": "hi"}]
+        client.chat.completions.create(
+            model='model-strong', messages=messages, extra_headers={'X-LLM-Role': ROLE_EVALUATION_REPORT}
+        )
+        with self.assertRaises(openai.BadRequestError):
+            client.chat.completions.create(
+                model='model-strong', messages=messages, extra_headers={'X-LLM-Role': ROLE_EVALUATION_REPORT}
+            )
+        # 未标记角色的请求不计入
+        with self.assertRaises(openai.BadRequestError):
+            client.chat.completions.create(model='model-strong', messages=messages)
+        
+        self.assertEqual(seen_headers, [None, None, None])
+        rows = llm_usage.get_llm_usage_stats().stats()
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual((row["role"], row["tier"], row["model"]), (ROLE_EVALUATION_REPORT, 'strong', 'model-strong'))
+        self.assertEqual((row["calls"], row["errors"]), (2, 1))
+        self.assertEqual((row["prompt_tokens"], row["completion_tokens"]), (1000, 500))
+        self.assertAlmostEqual(row["cost"], (1000 * 10 + 500 * 20) / 1_000_000)
+        self.assertGreaterEqual(row["latency_max"], row["latency_avg"])
+        
+        out = StringIO()
+        call_command('llm_usage', stdout=out)
+        self.assertIn('evaluation_report [strong] model-strong: 调用 2 次（失败 1）', out.getvalue())
+        
+        call_command('llm_usage', '--clear', stdout=StringIO())
+        self.assertEqual(llm_usage.get_llm_usage_stats().stats(), [])
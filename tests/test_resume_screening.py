@@ -2,6 +2,9 @@
 简历筛选模块的测试。
 """
 import json
+import os
+import time
+from unittest import mock
 from django.test import TestCase, Client
 from django.urls import reverse
 
@@ -81,6 +84,916 @@ class ScreeningServiceTest(TestCase):
         self.assertEqual(result['salary_suggestions']['hr_suggestion'], '15000')
 
 
+class ConcurrentScreeningTest(TestCase):
+    """单个任务内并发筛选简历的测试。"""
+    
+    def setUp(self):
+        self.task = ResumeScreeningTask.objects.create(status='running', total_steps=3)
+        self.resumes = [
+            {"name": f"候选人{i}.txt", "content": f"简历内容{i}"}
+            for i in range(3)
+        ]
+    
+    def test_single_failure_does_not_abort_batch(self):
+        """测试单份简历失败不影响其他简历。"""
+        def fake_screen(position_data, resume, run_chat=True, progress_callback=None, cancel_check=None):
+            progress_callback("HR_Expert", 3)
+            if resume['name'] == "候选人1.txt":
+                raise RuntimeError("LLM超时")
+            return resume['name'][:-4], {'scores': {'comprehensive_score': 80}}
+        
+        with mock.patch.object(ScreeningService, 'screen_resume', side_effect=fake_screen):
+            results = ScreeningService.run_screening(
+                self.task, {"position": "开发"}, self.resumes, max_workers=3
+            )
+        
+        self.assertEqual(set(results), {"候选人0", "候选人2"})
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.current_step, 3)
+        self.assertEqual(self.task.progress, 99)
+        self.assertIn("候选人1.txt", self.task.error_message)
+    
+    def test_all_failures_raise(self):
+        """测试全部简历失败时抛出异常。"""
+        from apps.common.exceptions import ServiceException
+        
+        with mock.patch.object(ScreeningService, 'screen_resume', side_effect=RuntimeError("down")):
+            with self.assertRaises(ServiceException):
+                ScreeningService.run_screening(self.task, {}, self.resumes, max_workers=2)
+
+
+class ScreeningCheckpointTest(TestCase):
+    """筛选任务检查点与中断恢复的测试。"""
+    
+    def setUp(self):
+        self.task = ResumeScreeningTask.objects.create(status='running', total_steps=3)
+        self.resumes = [
+            {"name": f"候选人{i}.txt", "content": f"简历内容{i}"}
+            for i in range(3)
+        ]
+        self.calls = []
+    
+    def fake_screen(self, position_data, resume, run_chat=True, progress_callback=None, cancel_check=None):
+        self.calls.append(resume['name'])
+        return resume['name'][:-4], {'scores': {'comprehensive_score': 80}}
+    
+    def test_stop_saves_progress_and_resumes(self):
+        """测试停止时完成进行中的简历并写入检查点，重试时从断点继续。"""
+        from apps.resume_screening.models import ScreeningCheckpoint
+        from apps.resume_screening.services import ScreeningInterrupted
+        
+        with mock.patch.object(ScreeningService, 'screen_resume', side_effect=self.fake_screen):
+            with self.assertRaises(ScreeningInterrupted):
+                ScreeningService.run_screening(
+                    self.task, {}, self.resumes, max_workers=1,
+                    checkpoint=True, should_stop=lambda: len(self.calls) >= 1
+                )
+            self.assertEqual(self.calls, ["候选人0.txt"])
+            self.assertEqual(ScreeningCheckpoint.objects.filter(task=self.task).count(), 1)
+            
+            results = ScreeningService.run_screening(self.task, {}, self.resumes, max_workers=1, checkpoint=True)
+        
+        self.assertEqual(self.calls, ["候选人0.txt", "候选人1.txt", "候选人2.txt"])
+        self.assertEqual(set(results), {"候选人0", "候选人1", "候选人2"})
+    
+    def test_drained_job_requeued_without_attempt(self):
+        """测试工作进程排空时筛选任务回到等待状态并重新排队，不计入尝试次数。"""
+        from apps.task_queue.models import BackgroundJob
+        from apps.task_queue.services import TaskQueueService
+        from apps.resume_screening.tasks import enqueue_screening_task
+        
+        job = enqueue_screening_task(self.task, self.resumes)
+        claimed = TaskQueueService.claim_next('worker-a')
+        
+        def screen_and_drain(*args, **kwargs):
+            TaskQueueService.request_drain()
+            return self.fake_screen(*args, **kwargs)
+        
+        try:
+            with self.settings(RESUME_SCREENING={'RESUME_CONCURRENCY': 1}), \
+                    mock.patch.object(ScreeningService, 'screen_resume', side_effect=screen_and_drain):
+                self.assertFalse(TaskQueueService.execute(claimed))
+        finally:
+            TaskQueueService.reset_drain()
+        
+        job.refresh_from_db()
+        self.task.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.PENDING)
+        self.assertEqual(job.attempts, 0)
+        self.assertEqual(self.task.status, 'pending')
+        self.assertEqual(self.calls, ["候选人0.txt"])
+        self.assertEqual(self.task.checkpoints.count(), 1)
+    
+    def test_recover_orphaned_tasks(self):
+        """测试启动恢复：无队列任务的进行中筛选任务重新入队或标记失败。"""
+        from apps.task_queue.models import BackgroundJob
+        from apps.task_queue.services import TaskQueueService
+        from apps.resume_screening.tasks import enqueue_screening_task, recover_screening_tasks
+        
+        job = enqueue_screening_task(self.task, self.resumes)
+        BackgroundJob.objects.filter(id=job.id).update(status=BackgroundJob.Status.COMPLETED)
+        orphan = ResumeScreeningTask.objects.create(status='running')
+        active = ResumeScreeningTask.objects.create(status='running')
+        enqueue_screening_task(active, self.resumes)
+        
+        self.assertEqual(recover_screening_tasks(), 2)
+        
+        self.task.refresh_from_db()
+        orphan.refresh_from_db()
+        active.refresh_from_db()
+        self.assertEqual(self.task.status, 'pending')
+        self.assertEqual(TaskQueueService.get_latest_job(self.task.id).status, BackgroundJob.Status.PENDING)
+        self.assertEqual(orphan.status, 'failed')
+        self.assertEqual(active.status, 'running')
+    
+    def test_concurrent_recovery_enqueues_once(self):
+        """测试多个工作进程同时启动恢复时，孤立任务只被重新入队一次。"""
+        from apps.task_queue.models import BackgroundJob
+        from apps.task_queue.services import TaskQueueService
+        from apps.resume_screening.tasks import enqueue_screening_task, recover_screening_tasks
+        
+        job = enqueue_screening_task(self.task, self.resumes)
+        BackgroundJob.objects.filter(id=job.id).update(status=BackgroundJob.Status.COMPLETED)
+        
+        calls = []
+        original = TaskQueueService.get_latest_job
+        
+        def other_worker_recovers_first(*args, **kwargs):
+            # 本进程查到队列任务已结束后、占用筛选任务前，另一个进程先完成了恢复
+            latest = original(*args, **kwargs)
+            calls.append(latest)
+            if len(calls) == 1:
+                self.assertEqual(recover_screening_tasks(), 1)
+            return latest
+        
+        with mock.patch.object(TaskQueueService, 'get_latest_job', side_effect=other_worker_recovers_first):
+            self.assertEqual(recover_screening_tasks(), 0)
+        
+        self.assertEqual(BackgroundJob.objects.filter(reference_id=str(self.task.id)).count(), 2)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'pending')
+
+
+class ScreeningIncrementalPersistTest(TestCase):
+    """筛选结果逐份持久化的测试。"""
+    
+    def setUp(self):
+        self.task = ResumeScreeningTask.objects.create(status='running', total_steps=3)
+        self.resumes = [
+            {"name": f"候选人{i}.txt", "content": f"简历内容{i}"}
+            for i in range(3)
+        ]
+    
+    def test_run_screening_emits_each_result(self):
+        """测试指定 on_result 时每份简历完成后立即回调，结果不保留在返回值中。"""
+        emitted = []
+        
+        def fake_screen(position_data, resume, run_chat=True, progress_callback=None, cancel_check=None):
+            # 前一份简历的结果已交给回调（在当前简历开始前）
+            self.assertEqual(len(emitted), int(resume['name'][3]))
+            return resume['name'][:-4], {'scores': {'comprehensive_score': 80}}
+        
+        with mock.patch.object(ScreeningService, 'screen_resume', side_effect=fake_screen):
+            results = ScreeningService.run_screening(
+                self.task, {}, self.resumes, max_workers=1, run_chat=False,
+                on_result=lambda resume, name, result: emitted.append(name)
+            )
+        
+        self.assertEqual(results, {})
+        self.assertEqual(emitted, ["候选人0", "候选人1", "候选人2"])
+    
+    def test_job_saves_results_before_batch_finishes(self):
+        """测试后台任务在整批结束前写入已完成简历的结果，状态接口返回部分结果。"""
+        from apps.task_queue.services import TaskQueueService
+        from apps.resume_screening.services import ReportService
+        from apps.resume_screening.tasks import enqueue_screening_task
+        
+        enqueue_screening_task(self.task, self.resumes)
+        claimed = TaskQueueService.claim_next('worker-a')
+        saved_before = []
+        
+        def fake_screen(position_data, resume, run_chat=True, progress_callback=None, cancel_check=None):
+            saved_before.append(save.call_count)
+            return resume['name'][:-4], {'scores': {'comprehensive_score': 80}, 'summary': '合格'}
+        
+        with self.settings(RESUME_SCREENING={'RESUME_CONCURRENCY': 1}), \
+                mock.patch.object(ScreeningService, 'screen_resume', side_effect=fake_screen), \
+                mock.patch.object(
+                    ReportService, 'save_or_update_resume_data', wraps=ReportService.save_or_update_resume_data
+                ) as save:
+            self.assertTrue(TaskQueueService.execute(claimed))
+        
+        self.assertEqual(saved_before, [0, 1, 2])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'completed')
+        self.assertEqual(ResumeData.objects.filter(task=self.task).exclude(screening_score=None).count(), 3)
+    
+    def test_status_view_returns_partial_results(self):
+        """测试进行中任务的状态接口返回已完成简历的评分。"""
+        ResumeData.objects.create(
+            task=self.task, candidate_name="候选人0", resume_content="简历内容0",
+            resume_file_hash="h0", position_details={}, screening_score={'comprehensive_score': 80}
+        )
+        ResumeData.objects.create(
+            task=self.task, candidate_name="候选人1", resume_content="简历内容1", resume_file_hash="h1", position_details={}
+        )
+        
+        data = Client().get(f'/api/screening/tasks/{self.task.id}/status/').json()['data']
+        
+        self.assertEqual([item['candidate_name'] for item in data['results']], ["候选人0"])
+        self.assertNotIn('resume_content', data['results'][0])
+
+
+class ResumeDataBulkSaveTest(TestCase):
+    """简历数据批量保存的测试。"""
+    
+    def setUp(self):
+        self.task = ResumeScreeningTask.objects.create(status='pending')
+        self.position = {"position": "后端工程师"}
+    
+    def test_query_count_independent_of_batch_size(self):
+        """测试批量保存的查询次数与简历数量无关。"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from apps.resume_screening.services import ReportService
+        
+        entries = [{"candidate_name": f"候选人{i}", "resume_content": f"简历内容{i}"} for i in range(100)]
+        with CaptureQueriesContext(connection) as queries:
+            saved = ReportService.bulk_save_resume_data(self.task, self.position, entries)
+        
+        # 查询已存在简历、批量插入（SQLite按变量数上限分批）和事务保存点
+        self.assertLessEqual(len(queries), 6)
+        
+        self.assertEqual(len(saved), 100)
+        self.assertTrue(all(is_new for _, is_new in saved))
+        self.assertEqual(ResumeData.objects.filter(task=self.task).count(), 100)
+    
+    def test_existing_and_in_batch_duplicates(self):
+        """测试已存在的简历只更新筛选结果，同一批中的重复简历只创建一条。"""
+        from apps.resume_screening.services import ReportService
+        
+        existing, _ = ReportService.save_or_update_resume_data(self.task, self.position, "老候选人", "旧简历")
+        other_task = ResumeScreeningTask.objects.create(status='running')
+        
+        saved = ReportService.bulk_save_resume_data(other_task, self.position, [
+            {"candidate_name": "老候选人", "resume_content": "旧简历",
+             "screening_result": {"scores": {"comprehensive_score": 90}, "summary": "优秀"}},
+            {"candidate_name": "新候选人", "resume_content": "新简历"},
+            {"candidate_name": "新候选人副本", "resume_content": "新简历"},
+        ])
+        
+        self.assertEqual([is_new for _, is_new in saved], [False, True, False])
+        self.assertEqual(saved[1][0].id, saved[2][0].id)
+        existing.refresh_from_db()
+        self.assertEqual(existing.task, self.task)
+        self.assertEqual(existing.screening_score, {"comprehensive_score": 90})
+        self.assertEqual(existing.screening_summary, "优秀")
+        self.assertEqual(ResumeData.objects.count(), 2)
+
+
+class ScreeningLibraryInputTest(TestCase):
+    """按简历库ID提交筛选任务的测试。"""
+    
+    def setUp(self):
+        from apps.resume_library.models import ResumeLibrary
+        
+        self.library = [
+            ResumeLibrary.objects.create(
+                filename=f"候选人{i}.txt", file_hash=f"hash{i}", content=f"简历内容{i}", file_type="text/plain"
+            )
+            for i in range(2)
+        ]
+    
+    def test_submit_by_library_id_and_mark_screened(self):
+        """测试只传 library_id 时服务端一次加载简历内容，任务完成后标记已筛选。"""
+        from apps.resume_library.services import LibraryService
+        from apps.task_queue.services import TaskQueueService
+        
+        data = {
+            "position": {"position": "后端工程师"},
+            "resumes": [{"library_id": str(item.id)} for item in self.library] + [
+                {"name": "外部简历.txt", "content": "外部简历内容"}
+            ]
+        }
+        with mock.patch(
+            'apps.resume_library.services.LibraryService.get_resumes_by_ids',
+            wraps=LibraryService.get_resumes_by_ids
+        ) as load:
+            response = Client().post('/api/screening/', data=json.dumps(data), content_type='application/json')
+        
+        self.assertEqual(response.status_code, 202)
+        load.assert_called_once()
+        task = ResumeScreeningTask.objects.get(id=response.json()['data']['task_id'])
+        self.assertEqual(
+            sorted(task.resume_data.values_list('resume_content', flat=True)),
+            ["外部简历内容", "简历内容0", "简历内容1"]
+        )
+        
+        def fake_screen(position_data, resume, run_chat=True, progress_callback=None, cancel_check=None):
+            return resume['name'][:-4], {'scores': {'comprehensive_score': 80}}
+        
+        with mock.patch.object(ScreeningService, 'screen_resume', side_effect=fake_screen):
+            self.assertTrue(TaskQueueService.execute(TaskQueueService.claim_next('worker-a')))
+        
+        for item in self.library:
+            item.refresh_from_db()
+            self.assertTrue(item.is_screened)
+    
+    def test_unknown_library_id_rejected(self):
+        """测试引用不存在或格式错误的简历库ID时返回参数错误。"""
+        for library_id in ("00000000-0000-0000-0000-000000000000", "not-a-uuid"):
+            data = {"position": {"position": "后端工程师"}, "resumes": [{"library_id": library_id}]}
+            response = Client().post('/api/screening/', data=json.dumps(data), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(ResumeScreeningTask.objects.exists())
+
+
+class ScreeningSubmissionDedupTest(TestCase):
+    """筛选任务重复提交去重的测试。"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.data = {
+            "position": {"position": "后端工程师"},
+            "resumes": [{"name": "a.txt", "content": "简历A"}, {"name": "b.txt", "content": "简历B"}]
+        }
+    
+    def submit(self, data=None, **headers):
+        return Client().post(
+            '/api/screening/', data=json.dumps(data or self.data), content_type='application/json', headers=headers
+        )
+    
+    def test_duplicate_body_returns_existing_task(self):
+        """测试未带幂等键时，简历顺序不同的相同提交返回已有任务。"""
+        first = self.submit().json()['data']
+        reordered = dict(self.data, resumes=list(reversed(self.data['resumes'])))
+        second = self.submit(reordered).json()['data']
+        
+        self.assertEqual(second['status'], 'duplicate')
+        self.assertEqual(second['task_id'], first['task_id'])
+        self.assertEqual(ResumeScreeningTask.objects.count(), 1)
+        
+        # 强制重新筛选不按请求内容去重
+        forced = self.submit(dict(self.data, force_rescreen=True)).json()['data']
+        self.assertEqual(forced['status'], 'submitted')
+    
+    def test_idempotency_key(self):
+        """测试相同 Idempotency-Key 返回已有任务，不同的键创建新任务。"""
+        first = self.submit(**{'Idempotency-Key': 'k1'}).json()['data']
+        changed = dict(self.data, resumes=[{"name": "c.txt", "content": "简历C"}])
+        
+        self.assertEqual(self.submit(changed, **{'Idempotency-Key': 'k1'}).json()['data']['task_id'], first['task_id'])
+        self.assertEqual(self.submit(**{'Idempotency-Key': 'k2'}).json()['data']['status'], 'submitted')
+    
+    def test_failed_task_can_be_resubmitted(self):
+        """测试已有任务失败或去重关闭时允许重新提交。"""
+        first = self.submit().json()['data']
+        ResumeScreeningTask.objects.filter(id=first['task_id']).update(status='failed')
+        
+        second = self.submit().json()['data']
+        self.assertEqual(second['status'], 'submitted')
+        self.assertNotEqual(second['task_id'], first['task_id'])
+        
+        with self.settings(RESUME_SCREENING={'IDEMPOTENCY_WINDOW': 0}):
+            self.assertEqual(self.submit().json()['data']['status'], 'submitted')
+        self.assertEqual(ResumeScreeningTask.objects.count(), 3)
+    
+    def test_concurrent_resubmits_single_winner(self):
+        """测试已有任务失败后并发的重新提交只有一个接管去重键，另一个返回接管后的任务。"""
+        from apps.resume_screening.services import SubmissionDedupService
+        
+        key = SubmissionDedupService.get_key('k1', {}, [])
+        failed_id, _ = SubmissionDedupService.claim(key)
+        ResumeScreeningTask.objects.create(id=failed_id, status='failed')
+        
+        results = []
+        calls = []
+        original = SubmissionDedupService._is_retryable
+        
+        def concurrent_claim(submission):
+            # 第一个请求判断完成、尚未接管时，第二个请求先完成接管
+            calls.append(submission)
+            if len(calls) == 1:
+                results.append(SubmissionDedupService.claim(key))
+            return original(submission)
+        
+        with mock.patch.object(SubmissionDedupService, '_is_retryable', side_effect=concurrent_claim):
+            results.append(SubmissionDedupService.claim(key))
+        
+        (winner_id, winner_new), (loser_id, loser_new) = results
+        self.assertTrue(winner_new)
+        self.assertFalse(loser_new)
+        self.assertEqual(loser_id, winner_id)
+        self.assertNotEqual(winner_id, failed_id)
+        
+        # 接管的任务尚未创建时仍视为进行中，不允许再次接管
+        self.assertEqual(SubmissionDedupService.claim(key), (winner_id, False))
+
+
+class ScreeningCancellationTest(TestCase):
+    """筛选任务取消的测试。"""
+    
+    def test_cancel_api(self):
+        """测试取消接口：等待中的任务直接取消，进行中的任务设置取消标志，已结束的任务不能取消。"""
+        client = Client()
+        pending = ResumeScreeningTask.objects.create(status='pending')
+        running = ResumeScreeningTask.objects.create(status='running')
+        completed = ResumeScreeningTask.objects.create(status='completed')
+        
+        response = client.post(f'/api/screening/tasks/{pending.id}/cancel/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['status'], 'cancelled')
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'cancelled')
+        
+        response = client.post(f'/api/screening/tasks/{running.id}/cancel/')
+        self.assertEqual(response.json()['data']['status'], 'cancelling')
+        running.refresh_from_db()
+        self.assertTrue(running.cancel_requested)
+        self.assertEqual(running.status, 'running')
+        
+        response = client.post(f'/api/screening/tasks/{completed.id}/cancel/')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_agents_stop_before_next_turn(self):
+        """测试取消后代理在下一次发言前停止，不再调用LLM。"""
+        from services.agents import ScreeningAgentManager, AgentRunCancelled
+        
+        calls = []
+        
+        def fake_reply(agent, messages=None, sender=None, **kw):
+            calls.append(agent.name)
+            return f"{agent.name}回复"
+        
+        with mock.patch.dict(os.environ, {'LLM_API_KEY': 'sk-test'}):
+            manager = ScreeningAgentManager({"position": "Python开发"}, mode='sequential')
+            manager.setup()
+            group_manager = ScreeningAgentManager({"position": "Python开发"})
+            group_manager.setup()
+        manager.set_cancel_check(lambda: "HR_Expert" in calls)
+        
+        with mock.patch('autogen.ConversableAgent.generate_reply', fake_reply):
+            with self.assertRaises(AgentRunCancelled):
+                manager.run_screening("张三", "简历内容")
+        self.assertEqual(calls, ["Assistant", "HR_Expert"])
+        
+        group_manager.set_cancel_check(lambda: True)
+        selector = group_manager.group_chat.speaker_selection_method
+        self.assertIsNone(selector(group_manager.hr_agent, group_manager.group_chat))
+    
+    def test_cancel_stops_batch(self):
+        """测试取消后不再开始新的简历，进行中的简历停止且不写入检查点。"""
+        from services.agents import AgentRunCancelled
+        from apps.resume_screening.services import ScreeningCancelled
+        
+        task = ResumeScreeningTask.objects.create(status='running', total_steps=3)
+        resumes = [{"name": f"候选人{i}.txt", "content": f"简历内容{i}"} for i in range(3)]
+        started = []
+        
+        def fake_screen(position_data, resume, run_chat=True, progress_callback=None, cancel_check=None):
+            started.append(resume['name'])
+            for _ in range(500):
+                if cancel_check():
+                    raise AgentRunCancelled("对话已取消")
+                time.sleep(0.01)
+            return resume['name'][:-4], {'scores': {}}
+        
+        with mock.patch.object(ScreeningService, 'screen_resume', side_effect=fake_screen):
+            with self.assertRaises(ScreeningCancelled):
+                ScreeningService.run_screening(
+                    task, {}, resumes, max_workers=1, checkpoint=True, is_cancelled=lambda: bool(started)
+                )
+        
+        self.assertEqual(started, ["候选人0.txt"])
+        self.assertEqual(task.checkpoints.count(), 0)
+    
+    def test_cancelled_job_not_screened(self):
+        """测试已请求取消的任务被领取后直接标记为已取消，不调用LLM。"""
+        from apps.task_queue.models import BackgroundJob
+        from apps.task_queue.services import TaskQueueService
+        from apps.resume_screening.tasks import enqueue_screening_task
+        
+        task = ResumeScreeningTask.objects.create(status='running', total_steps=1, cancel_requested=True)
+        job = enqueue_screening_task(task, [{"name": "张三.txt", "content": "简历"}])
+        
+        with mock.patch.object(ScreeningService, 'screen_resume') as screen:
+            self.assertTrue(TaskQueueService.execute(TaskQueueService.claim_next('worker-a')))
+        
+        screen.assert_not_called()
+        task.refresh_from_db()
+        job.refresh_from_db()
+        self.assertEqual(task.status, 'cancelled')
+        self.assertEqual(job.status, BackgroundJob.Status.COMPLETED)
+
+
+class FairShareSchedulingTest(TestCase):
+    """筛选任务优先级与公平调度的测试。"""
+    
+    def test_round_robin_and_priority(self):
+        """测试同优先级任务轮流获得名额，高优先级任务优先。"""
+        import threading
+        from apps.resume_screening.services.scheduler import FairShareScheduler
+        
+        scheduler = FairShareScheduler(slots=1)
+        events = {key: threading.Event() for key in ("big", "small", "urgent")}
+        order = []
+        
+        def grant_next():
+            for key, event in events.items():
+                if event.is_set() and scheduler.take(key):
+                    event.clear()
+                    order.append(key)
+                    return
+        
+        scheduler.request("big", 0, events["big"])
+        grant_next()
+        scheduler.request("small", 0, events["small"])
+        scheduler.request("big", 0, events["big"])
+        scheduler.release()
+        grant_next()
+        scheduler.request("small", 0, events["small"])
+        scheduler.release()
+        grant_next()
+        scheduler.request("urgent", 5, events["urgent"])
+        scheduler.release()
+        grant_next()
+        
+        self.assertEqual(order, ["big", "small", "big", "urgent"])
+        
+        scheduler.withdraw("small")
+        self.assertEqual(scheduler.stats(), {"in_use": 1, "waiting": 0})
+    
+    def test_priority_and_queue_position(self):
+        """测试提交时指定优先级，状态接口返回等待中任务的队列位置。"""
+        client = Client()
+        data = {
+            "position": {"position": "Python Developer"},
+            "resumes": [{"name": "test.pdf", "content": "Python developer"}]
+        }
+        normal = client.post('/api/screening/', data=json.dumps(data), content_type='application/json')
+        urgent_data = dict(data, priority=5, resumes=[{"name": "urgent.pdf", "content": "Go developer"}])
+        urgent = client.post('/api/screening/', data=json.dumps(urgent_data), content_type='application/json')
+        normal_id = normal.json()['data']['task_id']
+        urgent_id = urgent.json()['data']['task_id']
+        
+        status = client.get(f'/api/screening/tasks/{urgent_id}/status/').json()['data']
+        self.assertEqual(status['priority'], 5)
+        self.assertEqual(status['queue_position'], 1)
+        status = client.get(f'/api/screening/tasks/{normal_id}/status/').json()['data']
+        self.assertEqual(status['queue_position'], 2)
+        
+        from apps.task_queue.services import TaskQueueService
+        self.assertEqual(TaskQueueService.claim_next('worker-a').reference_id, urgent_id)
+
+
+class ScreeningProgressStoreTest(TestCase):
+    """筛选实时进度存储与数据库节流写入的测试。"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.task = ResumeScreeningTask.objects.create(status='running', total_steps=2)
+    
+    def test_publish_increments_version(self):
+        """测试每次发布进度快照版本号加1，并合并已有字段。"""
+        from apps.common.progress import TaskProgressStore
+        
+        TaskProgressStore.publish('screening', self.task.id, status='running', progress=10)
+        snapshot = TaskProgressStore.publish('screening', self.task.id, progress=20)
+        
+        self.assertEqual(snapshot['version'], 2)
+        self.assertEqual(TaskProgressStore.get('screening', self.task.id)['status'], 'running')
+        self.assertEqual(TaskProgressStore.get('screening', self.task.id)['progress'], 20)
+    
+    def test_tracker_throttles_db_writes(self):
+        """测试进度每次都发布到缓存，数据库只在节流间隔到达或强制时写入。"""
+        from apps.common.progress import TaskProgressStore
+        from apps.resume_screening.services.screening_service import ScreeningProgressTracker
+        
+        with self.settings(RESUME_SCREENING={'PROGRESS_DB_FLUSH_INTERVAL': 60}):
+            tracker = ScreeningProgressTracker(self.task, 2)
+        with mock.patch.object(self.task, 'save') as save:
+            tracker.flush(force=True)
+            tracker.speaker_callback(0)("HR_Expert", 3)
+            tracker.flush()
+            tracker.mark_finished(0)
+            tracker.flush()
+            
+            self.assertEqual(save.call_count, 1)
+            snapshot = TaskProgressStore.get('screening', self.task.id)
+            self.assertEqual(snapshot['current_step'], 1)
+            self.assertEqual(snapshot['progress'], 50)
+            self.assertEqual(snapshot['current_speaker'], "HR_Expert")
+            
+            tracker.flush(force=True)
+            self.assertEqual(save.call_count, 2)
+    
+    def test_status_view_reads_live_progress(self):
+        """测试状态接口返回进行中任务的实时进度和版本号，已结束任务以数据库为准。"""
+        from apps.common.progress import TaskProgressStore
+        
+        TaskProgressStore.publish(
+            'screening', self.task.id, status='running', progress=42, current_step=1, current_speaker="Critic"
+        )
+        url = f'/api/screening/tasks/{self.task.id}/status/'
+        
+        data = Client().get(url).json()['data']
+        self.assertEqual(data['progress'], 42)
+        self.assertEqual(data['current_speaker'], "Critic")
+        self.assertEqual(data['version'], 1)
+        
+        ResumeScreeningTask.objects.filter(id=self.task.id).update(status='completed', progress=100)
+        data = Client().get(url).json()['data']
+        self.assertEqual(data['status'], 'completed')
+        self.assertEqual(data['progress'], 100)
+    
+    def test_agent_speaker_update_saves_changed_fields(self):
+        """测试未设置进度回调时代理只写入发言人和进度字段。"""
+        from services.agents.base import BaseAgentManager
+        
+        manager = BaseAgentManager()
+        manager.set_task(self.task)
+        with mock.patch.object(self.task, 'save') as save:
+            manager.update_task_speaker("HR_Expert", 3)
+        
+        save.assert_called_once_with(update_fields=['current_speaker', 'progress'])
+        self.assertEqual(self.task.progress, 50)
+
+
+class ScreeningEventStreamTest(TestCase):
+    """筛选任务进度事件流的测试。"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.task = ResumeScreeningTask.objects.create(status='running', total_steps=2)
+    
+    async def test_stream_pushes_progress_resumes_and_final_scores(self):
+        """测试事件流推送进度、单份简历结束和最终评分，任务结束后关闭连接。"""
+        import asyncio
+        from django.test import AsyncClient
+        from apps.common.progress import TaskProgressStore
+        
+        await ResumeData.objects.acreate(
+            task=self.task, position_title="开发", position_details={}, candidate_name="张三",
+            resume_content="很长的简历全文", resume_file_hash="hash-zs", screening_score={"comprehensive_score": 88}
+        )
+        TaskProgressStore.publish(
+            'screening', self.task.id, status='running', progress=50, current_step=1, current_speaker="HR_Expert",
+            finished_resumes=[{"candidate_name": "张三", "status": "completed", "scores": {"comprehensive_score": 88}}]
+        )
+        asyncio.get_running_loop().call_later(
+            0.05, lambda: TaskProgressStore.publish('screening', self.task.id, status='completed', progress=100)
+        )
+        
+        with mock.patch.object(TaskProgressStore, 'POLL_INTERVAL', 0.01):
+            response = await AsyncClient().get(
+                f'/api/screening/tasks/{self.task.id}/events/', HTTP_ACCEPT='text/event-stream'
+            )
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        
+        events = [
+            (block.split('\n')[-2][len('event: '):], json.loads(block.split('\n')[-1][len('data: '):]))
+            for block in body.strip().split('\n\n')
+        ]
+        self.assertEqual([name for name, _ in events], ['progress', 'resume', 'completed'])
+        self.assertEqual(events[0][1]['current_speaker'], "HR_Expert")
+        self.assertEqual(events[1][1]['candidate_name'], "张三")
+        self.assertEqual(events[2][1]['results'][0]['screening_score'], {"comprehensive_score": 88})
+        self.assertNotIn('resume_content', events[2][1]['results'][0])
+    
+    def test_stream_not_found(self):
+        """测试任务不存在时返回404而不是建立事件流。"""
+        response = Client().get(
+            '/api/screening/tasks/00000000-0000-0000-0000-000000000000/events/', HTTP_ACCEPT='text/event-stream'
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ScreeningStatusLongPollTest(TestCase):
+    """筛选任务状态接口长轮询的测试。"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.task = ResumeScreeningTask.objects.create(status='running', total_steps=2)
+        self.url = f'/api/screening/tasks/{self.task.id}/status/'
+    
+    async def test_wait_until_progress_version_changes(self):
+        """测试等待进度版本号变化后返回最新进度，等待期间不查询任务数据。"""
+        import asyncio
+        from django.test import AsyncClient
+        from apps.common.progress import TaskProgressStore
+        from apps.resume_screening.views import ScreeningTaskStatusView
+        
+        TaskProgressStore.publish('screening', self.task.id, status='running', progress=10)
+        asyncio.get_running_loop().call_later(
+            0.1, lambda: TaskProgressStore.publish('screening', self.task.id, progress=60, current_speaker="Critic")
+        )
+        
+        build = ScreeningTaskStatusView._build_status
+        with mock.patch.object(TaskProgressStore, 'POLL_INTERVAL', 0.01), \
+                mock.patch.object(ScreeningTaskStatusView, '_build_status', autospec=True, side_effect=build) as build_status:
+            response = await AsyncClient().get(self.url, {'since_version': 1, 'wait': 5})
+            waiting = asyncio.ensure_future(response.streaming_content.__aiter__().__anext__())
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiting.done())
+            self.assertEqual(build_status.call_count, 0)
+            body = await waiting
+        
+        data = json.loads(body)['data']
+        self.assertEqual(data['version'], 2)
+        self.assertEqual(data['progress'], 60)
+        self.assertEqual(data['current_speaker'], "Critic")
+    
+    def test_wait_times_out_with_current_state(self):
+        """测试等待超时后返回当前状态。"""
+        from apps.common.progress import TaskProgressStore
+        
+        TaskProgressStore.publish('screening', self.task.id, status='running', progress=10)
+        with mock.patch.object(TaskProgressStore, 'POLL_INTERVAL', 0.01):
+            response = Client().get(self.url, {'since_version': 1, 'wait': 1})
+            body = b''.join(response)
+        
+        data = json.loads(body)['data']
+        self.assertEqual(data['version'], 1)
+        self.assertEqual(data['progress'], 10)
+
+
+class ScreeningResultCacheTest(TestCase):
+    """筛选结果缓存的测试。"""
+    
+    def setUp(self):
+        self.task = ResumeScreeningTask.objects.create(status='running', total_steps=1)
+        self.position = {"id": "p-1", "position": "Python开发", "required_skills": ["Python"], "resume_count": 3}
+        self.resumes = [{"name": "张三.txt", "content": "Python开发经验五年"}]
+    
+    def fake_screen(self, position_data, resume, run_chat=True, progress_callback=None, cancel_check=None):
+        return resume['name'][:-4], {
+            'md_content': '# 报告', 'json_content': '{}',
+            'scores': {'comprehensive_score': 80}, 'summary': '推荐面试'
+        }
+    
+    def test_cache_hit_skips_screening(self):
+        """测试相同简历和岗位标准再次筛选时直接复用缓存，force_rescreen时重新筛选。"""
+        from apps.resume_screening.models import ScreeningResultCache
+        
+        with mock.patch.object(ScreeningService, 'screen_resume', side_effect=self.fake_screen) as screen:
+            ScreeningService.run_screening(self.task, self.position, self.resumes)
+            # 岗位的简历数量等无关字段变化不影响命中
+            results = ScreeningService.run_screening(
+                self.task, dict(self.position, resume_count=5), self.resumes
+            )
+            self.assertEqual(screen.call_count, 1)
+            self.assertEqual(results["张三"]['scores'], {'comprehensive_score': 80})
+            self.assertTrue(results["张三"]['metrics']['cache_hit'])
+            
+            ScreeningService.run_screening(self.task, self.position, self.resumes, force_rescreen=True)
+            self.assertEqual(screen.call_count, 2)
+            
+            ScreeningService.run_screening(
+                self.task, dict(self.position, required_skills=["Go"]), self.resumes
+            )
+            self.assertEqual(screen.call_count, 3)
+        
+        self.assertEqual(ScreeningResultCache.objects.count(), 2)
+        self.assertEqual(ScreeningResultCache.objects.filter(hit_count=1).count(), 1)
+    
+    def test_evict_position(self):
+        """测试删除岗位时清除相关缓存。"""
+        from apps.position_settings.models import PositionCriteria
+        from apps.resume_screening.models import ScreeningResultCache
+        from apps.resume_screening.services import ScreeningCacheService
+        
+        position = PositionCriteria.objects.create(position="Python开发", required_skills=["Python"])
+        ScreeningCacheService.store("简历A", {"id": str(position.id), "position": "Python开发"}, {'scores': {}})
+        ScreeningCacheService.store("简历B", position.to_dict(), {'scores': {}})
+        ScreeningCacheService.store("简历C", {"position": "Java开发"}, {'scores': {}})
+        
+        response = Client().delete(f'/api/positions/{position.id}/')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ScreeningResultCache.objects.count(), 1)
+
+
+class ScreeningPipelineModeTest(TestCase):
+    """筛选代理执行模式的测试。"""
+    
+    def run_manager(self, mode, reply_text="回复", **kwargs):
+        """使用模拟的LLM回复运行筛选代理，返回(对话记录, 各代理收到的上下文)。"""
+        from services.agents import ScreeningAgentManager
+        
+        calls = {}
+        
+        def fake_reply(agent, messages=None, sender=None, **kw):
+            calls[agent.name] = [m['name'] for m in messages]
+            return f"{agent.name}{reply_text}"
+        
+        with mock.patch.dict(os.environ, {'LLM_API_KEY': 'sk-test'}):
+            manager = ScreeningAgentManager({"position": "Python开发"}, mode=mode, **kwargs)
+            manager.setup()
+        with mock.patch('autogen.ConversableAgent.generate_reply', fake_reply):
+            messages = manager.run_screening("张三", "简历内容")
+        return manager, messages, calls
+    
+    def test_parallel_mode_fans_out_experts(self):
+        """测试parallel模式下专家互不可见，Critic汇总全部专家意见。"""
+        manager, messages, calls = self.run_manager('parallel')
+        
+        self.assertEqual(
+            [m['name'] for m in messages],
+            ["User_Proxy", "Assistant", "HR_Expert", "Technical_Expert", "Project_Manager_Expert", "Critic"]
+        )
+        for expert in ["HR_Expert", "Technical_Expert", "Project_Manager_Expert"]:
+            self.assertEqual(calls[expert], ["User_Proxy", "Assistant"])
+        self.assertEqual(
+            calls["Critic"],
+            ["User_Proxy", "Assistant", "HR_Expert", "Technical_Expert", "Project_Manager_Expert"]
+        )
+    
+    def test_isolated_context(self):
+        """测试上下文隔离：专家只看到自身输入，Critic只看到精简结论，并统计节省的输入token。"""
+        manager, messages, calls = self.run_manager(
+            'group_chat', reply_text="评分理由" * 200, isolate_context=True
+        )
+        
+        self.assertEqual(manager.mode, 'sequential')
+        self.assertEqual(
+            [m['name'] for m in messages],
+            ["User_Proxy", "HR_Expert", "Technical_Expert", "Project_Manager_Expert", "Critic"]
+        )
+        self.assertNotIn("Assistant", calls)
+        for agent in ["HR_Expert", "Technical_Expert", "Project_Manager_Expert", "Critic"]:
+            self.assertEqual(calls[agent], ["User_Proxy"])
+        
+        prompt = manager._build_expert_prompt(manager.hr_agent, "张三", "简历内容")
+        self.assertIn("你的评分规则", prompt)
+        self.assertIn("简历内容", prompt)
+        
+        metrics = manager.get_token_metrics()
+        self.assertGreater(metrics['input_tokens_saved'], 0)
+        self.assertLess(metrics['input_tokens'], metrics['baseline_input_tokens'])
+    
+    def test_lean_mode_skips_assistant(self):
+        """测试精简模式跳过Assistant发言，对话记录仍以User_Proxy开头。"""
+        manager, messages, calls = self.run_manager('sequential', lean=True)
+        
+        self.assertEqual(
+            [m['name'] for m in messages],
+            ["User_Proxy", "HR_Expert", "Technical_Expert", "Project_Manager_Expert", "Critic"]
+        )
+        self.assertNotIn("Assistant", calls)
+        self.assertEqual(calls["HR_Expert"], ["User_Proxy"])
+        
+        with mock.patch.dict(os.environ, {'LLM_API_KEY': 'sk-test'}):
+            from services.agents import ScreeningAgentManager
+            group_manager = ScreeningAgentManager({}, lean=True)
+            group_manager.setup()
+        self.assertNotIn("Assistant", group_manager.group_chat.agent_names)
+    
+    def test_early_exit_skips_manager_and_critic(self):
+        """测试HR和技术评分均低于阈值时跳过项目经理专家，并给出确定性的不匹配结论。"""
+        from services.agents import ScreeningAgentManager
+        
+        replies = {
+            "HR_Expert": "HR评分：30分，理由：经验不足，建议月薪：8000",
+            "Technical_Expert": "技术评分：20分，理由：技能不匹配，建议月薪：8000",
+        }
+        called = []
+        
+        def fake_reply(agent, messages=None, sender=None, **kw):
+            called.append(agent.name)
+            return replies.get(agent.name, "回复")
+        
+        with mock.patch.dict(os.environ, {'LLM_API_KEY': 'sk-test'}):
+            manager = ScreeningAgentManager(
+                {"position": "Python开发"}, mode='sequential', early_exit_threshold=50,
+                weights=ScreeningService.WEIGHTS
+            )
+            manager.setup()
+        with mock.patch('autogen.ConversableAgent.generate_reply', fake_reply):
+            messages = manager.run_screening("张三", "简历内容")
+        
+        self.assertNotIn("Project_Manager_Expert", called)
+        self.assertNotIn("Critic", called)
+        self.assertTrue(manager.early_exited)
+        self.assertEqual(messages[-1]['name'], "Critic")
+        
+        extracted = ScreeningService.extract_scores_and_comments(messages)
+        self.assertEqual(extracted['final_recommendation']['decision'], "不匹配")
+        # (30*0.3 + 20*0.4) / 0.7
+        self.assertAlmostEqual(extracted['scores']['comprehensive_score'], 24.3)
+    
+    def test_unknown_mode_rejected(self):
+        """测试未知执行模式。"""
+        from services.agents import ScreeningAgentManager
+        
+        with self.assertRaises(ValueError):
+            ScreeningAgentManager({}, mode='unknown')
+
+
 class ResumeScreeningAPITest(TestCase):
     """简历筛选API端点的测试。"""
     
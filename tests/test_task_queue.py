@@ -0,0 +1,371 @@
+"""
+后台任务队列模块的测试。
+"""
+import json
+import socket
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.utils import timezone
+
+from apps.task_queue.models import BackgroundJob
+from apps.task_queue.services import TaskQueueService
+from apps.task_queue.worker import JobWorker
+
+
+CALLS = []
+
+
+def record_job(job):
+    """测试用处理函数：记录调用。"""
+    CALLS.append(job.payload)
+
+
+def failing_job(job):
+    """测试用处理函数：总是失败。"""
+    raise RuntimeError("boom")
+
+
+def slow_job(job):
+    """测试用处理函数：执行时间超过心跳间隔。"""
+    import time
+    time.sleep(0.3)
+
+
+FAILURES = []
+failing_job.on_failure = lambda job, error: FAILURES.append((job.reference_id, error))
+
+
+class TaskQueueServiceTest(TestCase):
+    """TaskQueueService的测试。"""
+
+    def setUp(self):
+        CALLS.clear()
+        FAILURES.clear()
+
+    def test_enqueue_and_execute(self):
+        """测试入队后由工作进程领取执行。"""
+        job = TaskQueueService.enqueue('tests.test_task_queue.record_job', payload={'x': 1})
+        self.assertEqual(job.status, 'pending')
+
+        worker = JobWorker(concurrency=1)
+        self.assertTrue(worker.run_once())
+        self.assertFalse(worker.run_once())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(CALLS, [{'x': 1}])
+
+    def test_claim_respects_priority(self):
+        """测试高优先级任务先被领取。"""
+        TaskQueueService.enqueue('tests.test_task_queue.record_job', payload={'p': 0})
+        high = TaskQueueService.enqueue('tests.test_task_queue.record_job', payload={'p': 5}, priority=5)
+
+        claimed = TaskQueueService.claim_next('worker-a')
+        self.assertEqual(claimed.id, high.id)
+        self.assertEqual(claimed.locked_by, 'worker-a')
+
+    def test_leased_job_not_claimed_twice(self):
+        """测试租约有效期内任务不会被重复领取，过期后可被重新领取。"""
+        job = TaskQueueService.enqueue('tests.test_task_queue.record_job')
+
+        self.assertIsNotNone(TaskQueueService.claim_next('worker-a', lease_seconds=60))
+        self.assertIsNone(TaskQueueService.claim_next('worker-b', lease_seconds=60))
+
+        BackgroundJob.objects.filter(id=job.id).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        reclaimed = TaskQueueService.claim_next('worker-b', lease_seconds=60)
+        self.assertEqual(reclaimed.id, job.id)
+        self.assertEqual(reclaimed.attempts, 2)
+
+    def test_failed_job_retries_with_backoff(self):
+        """测试失败任务按退避重新排队，超过最大次数后标记失败。"""
+        job = TaskQueueService.enqueue('tests.test_task_queue.failing_job', max_attempts=2)
+
+        claimed = TaskQueueService.claim_next('worker-a')
+        self.assertFalse(TaskQueueService.execute(claimed))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(job.last_error, 'boom')
+
+        # 退避期内不可领取
+        self.assertIsNone(TaskQueueService.claim_next('worker-a'))
+
+        BackgroundJob.objects.filter(id=job.id).update(run_after=timezone.now())
+        claimed = TaskQueueService.claim_next('worker-a')
+        self.assertFalse(TaskQueueService.execute(claimed))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_exhausted_reclaim_runs_failure_hook(self):
+        """测试租约过期后被重新领取但已超出尝试次数时，不执行处理函数并调用失败回调。"""
+        job = TaskQueueService.enqueue('tests.test_task_queue.failing_job', reference_id='task-1', max_attempts=1)
+        TaskQueueService.claim_next('worker-a', lease_seconds=60)
+        BackgroundJob.objects.filter(id=job.id).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        
+        reclaimed = TaskQueueService.claim_next('worker-b')
+        self.assertFalse(TaskQueueService.execute(reclaimed))
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(FAILURES, [('task-1', '超出最大尝试次数')])
+    
+    def test_run_once_sends_heartbeats(self):
+        """测试 run_once（--burst 模式）执行期间持续续约。"""
+        job = TaskQueueService.enqueue('tests.test_task_queue.slow_job')
+        worker = JobWorker(concurrency=1, heartbeat_interval=0.05)
+        
+        with mock.patch.object(TaskQueueService, 'heartbeat', return_value=1) as heartbeat:
+            self.assertTrue(worker.run_once())
+        
+        self.assertGreaterEqual(heartbeat.call_count, 1)
+        self.assertEqual(list(heartbeat.call_args[0][0]), [job.id])
+        self.assertEqual(worker.active_count, 0)
+    
+    def test_recover_releases_jobs_of_exited_local_workers(self):
+        """测试启动恢复时释放本机已退出进程持有的任务。"""
+        import socket
+        
+        job = TaskQueueService.enqueue('tests.test_task_queue.record_job')
+        TaskQueueService.claim_next(f"{socket.gethostname()}:999999:dead", lease_seconds=600)
+        
+        with mock.patch('apps.task_queue.services._pid_alive', return_value=False):
+            self.assertEqual(TaskQueueService.recover(), 1)
+        
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertIsNone(job.locked_by)
+        self.assertIsNotNone(TaskQueueService.claim_next('worker-b'))
+    
+    def test_heartbeat_extends_lease(self):
+        """测试心跳续约。"""
+        TaskQueueService.enqueue('tests.test_task_queue.record_job')
+        claimed = TaskQueueService.claim_next('worker-a', lease_seconds=10)
+
+        updated = TaskQueueService.heartbeat([claimed.id], 'worker-a', lease_seconds=600)
+        self.assertEqual(updated, 1)
+        claimed.refresh_from_db()
+        self.assertGreater(claimed.lease_expires_at, timezone.now() + timedelta(seconds=300))
+
+        # 其他持有者不能续约
+        self.assertEqual(TaskQueueService.heartbeat([claimed.id], 'worker-b'), 0)
+
+
+class ScreeningEnqueueTest(TestCase):
+    """筛选提交入队的测试。"""
+
+    def test_submit_enqueues_job(self):
+        """测试提交筛选任务写入后台队列而不是启动线程。"""
+        data = {
+            "position": {"position": "Python Developer", "required_skills": ["Python"]},
+            "resumes": [{"name": "test.pdf", "content": "Python developer"}]
+        }
+
+        with mock.patch('threading.Thread') as thread:
+            response = Client().post(
+                '/api/screening/',
+                data=json.dumps(data),
+                content_type='application/json'
+            )
+            thread.assert_not_called()
+
+        self.assertEqual(response.status_code, 202)
+        task_id = response.json()['data']['task_id']
+        job = BackgroundJob.objects.get(reference_id=task_id)
+        self.assertEqual(job.handler, 'apps.resume_screening.tasks.run_screening_job')
+        self.assertEqual(job.payload['resumes'][0]['content'], "Python developer")
+
+
+class WebhookStub:
+    """本地HTTP桩服务：记录收到的回调请求，按预设顺序返回状态码。"""
+
+    def __init__(self, statuses=None):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.requests = []
+        self.statuses = list(statuses or [])
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                stub.requests.append((dict(self.headers), body))
+                self.send_response(stub.statuses.pop(0) if stub.statuses else 200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@mock.patch.dict('django.conf.settings.WEBHOOK', {'SECRET': 'test-secret', 'ALLOWED_HOSTS': ['127.0.0.1']})
+class WebhookTest(TestCase):
+    """任务完成回调的测试。"""
+
+    def setUp(self):
+        self.stub = WebhookStub()
+
+    def tearDown(self):
+        self.stub.close()
+
+    def run_jobs(self):
+        """执行队列中所有到期的任务。"""
+        while True:
+            job = TaskQueueService.claim_next('worker-a')
+            if job is None:
+                return
+            TaskQueueService.execute(job)
+
+    def test_validate_callback_url(self):
+        """测试回调地址校验：需配置密钥、http(s)协议，且主机在允许列表中。"""
+        from apps.common.exceptions import ValidationException
+        from apps.task_queue.webhooks import WebhookService
+
+        self.assertIsNone(WebhookService.validate_callback_url(None))
+        self.assertEqual(WebhookService.validate_callback_url(self.stub.url), self.stub.url)
+        with self.assertRaises(ValidationException):
+            WebhookService.validate_callback_url('file:///etc/passwd')
+        with mock.patch.dict('django.conf.settings.WEBHOOK', {'ALLOWED_HOSTS': ['hooks.example.com']}):
+            with self.assertRaises(ValidationException):
+                WebhookService.validate_callback_url(self.stub.url)
+        with mock.patch.dict('django.conf.settings.WEBHOOK', {'SECRET': ''}):
+            with self.assertRaises(ValidationException):
+                WebhookService.validate_callback_url(self.stub.url)
+
+    @mock.patch.dict('django.conf.settings.WEBHOOK', {'ALLOWED_HOSTS': []})
+    def test_rejects_non_public_callback_hosts(self):
+        """测试回调主机不在白名单中时拒绝解析到内网、回环、链路本地等非公网地址的回调地址。"""
+        from apps.common.exceptions import ValidationException
+        from apps.task_queue.webhooks import WebhookService
+
+        for url in ['http://169.254.169.254/latest/meta-data/', 'http://10.0.0.8/hook',
+                    'http://localhost:8000/hook', 'http://[::ffff:127.0.0.1]/hook', 'http://0.0.0.0/hook']:
+            with self.assertRaises(ValidationException, msg=url):
+                WebhookService.validate_callback_url(url)
+
+        public = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('93.184.216.34', 443))]
+        with mock.patch('socket.getaddrinfo', return_value=public):
+            url = 'https://hooks.example.com/hook'
+            self.assertEqual(WebhookService.validate_callback_url(url), url)
+
+    @mock.patch.dict('django.conf.settings.WEBHOOK', {'ALLOWED_HOSTS': []})
+    def test_delivery_pins_resolved_address(self):
+        """测试推送时重新校验解析结果（DNS重绑定到内网时拒绝），并直接连接校验过的IP地址。"""
+        import httpx
+        from apps.common.exceptions import ValidationException
+        from apps.task_queue.webhooks import WebhookService
+
+        body = {'id': 'e1', 'event': 'screening.completed', 'data': {}}
+        rebound = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('169.254.169.254', 443))]
+        with mock.patch('socket.getaddrinfo', return_value=rebound), \
+                mock.patch.object(httpx.Client, 'post') as post:
+            with self.assertRaises(ValidationException):
+                WebhookService.deliver('https://hooks.example.com/hook', body)
+        post.assert_not_called()
+
+        public = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('93.184.216.34', 443))]
+        with mock.patch('socket.getaddrinfo', return_value=public), \
+                mock.patch.object(httpx.Client, 'post', return_value=httpx.Response(
+                    200, request=httpx.Request('POST', 'https://93.184.216.34/hook')
+                )) as post:
+            WebhookService.deliver('https://hooks.example.com/hook', body)
+        target = post.call_args.args[0]
+        self.assertEqual(str(target), 'https://93.184.216.34/hook')
+        self.assertEqual(post.call_args.kwargs['headers']['Host'], 'hooks.example.com')
+        self.assertEqual(post.call_args.kwargs['extensions'], {'sni_hostname': 'hooks.example.com'})
+
+    def test_signed_delivery_with_retry(self):
+        """测试推送失败后退避重试，成功推送的请求体带有可校验的签名。"""
+        import hashlib
+        import hmac
+        from apps.task_queue.webhooks import WebhookService
+
+        self.stub.statuses = [500]
+        job = WebhookService.notify(self.stub.url, 'screening.completed', {'task_id': 't1'}, reference_id='t1')
+
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'pending')
+        self.assertGreater(job.run_after, timezone.now())
+
+        BackgroundJob.objects.filter(id=job.id).update(run_after=timezone.now())
+        self.run_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+
+        self.assertEqual(len(self.stub.requests), 2)
+        headers, body = self.stub.requests[-1]
+        self.assertEqual(headers['X-Webhook-Event'], 'screening.completed')
+        self.assertEqual(headers['X-Webhook-Id'], self.stub.requests[0][0]['X-Webhook-Id'])
+        expected = hmac.new(
+            b'test-secret', f"{headers['X-Webhook-Timestamp']}.".encode() + body, hashlib.sha256
+        ).hexdigest()
+        self.assertEqual(headers['X-Webhook-Signature'], f"sha256={expected}")
+        self.assertEqual(json.loads(body)['data'], {'task_id': 't1'})
+
+    def test_video_analysis_completion_delivered(self):
+        """测试提交视频分析时指定回调地址，分析完成后推送结果。"""
+        import tempfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            response = Client().post('/api/videos/upload/', data={
+                'video_file': SimpleUploadedFile('interview.mp4', b'video', content_type='video/mp4'),
+                'candidate_name': '张三',
+                'position_applied': '开发',
+                'callback_url': self.stub.url,
+            })
+            self.assertIn(response.status_code, [200, 201, 202])
+
+            self.run_jobs()
+
+        self.assertEqual(len(self.stub.requests), 1)
+        headers, body = self.stub.requests[0]
+        payload = json.loads(body)
+        self.assertEqual(headers['X-Webhook-Event'], 'video_analysis.completed')
+        self.assertEqual(payload['data']['id'], response.json()['data']['id'])
+        self.assertEqual(payload['data']['status'], 'completed')
+
+    def test_screening_completion_enqueues_webhook(self):
+        """测试筛选任务完成后写入 screening.completed 回调任务，附带各候选人评分。"""
+        from apps.resume_screening.models import ResumeScreeningTask
+        from apps.resume_screening.services import ScreeningService
+        from apps.resume_screening.tasks import enqueue_screening_task
+        from apps.task_queue.webhooks import WEBHOOK_JOB_HANDLER
+
+        task = ResumeScreeningTask.objects.create(status='pending', total_steps=1, position_data={'position': '开发'})
+        enqueue_screening_task(task, [{'name': '张三.txt', 'content': '简历'}], callback_url=self.stub.url)
+        result = {'scores': {'comprehensive_score': 90}, 'summary': '匹配'}
+        with mock.patch.object(ScreeningService, 'run_screening', return_value={'张三': result}):
+            TaskQueueService.execute(TaskQueueService.claim_next('worker-a'))
+
+        webhook = BackgroundJob.objects.get(handler=WEBHOOK_JOB_HANDLER)
+        body = webhook.payload['body']
+        self.assertEqual(body['event'], 'screening.completed')
+        self.assertEqual(body['data']['task_id'], str(task.id))
+        self.assertEqual(body['data']['results'][0]['candidate_name'], '张三')
+
+    def test_screening_rejects_invalid_callback(self):
+        """测试提交筛选时回调地址无效返回参数错误。"""
+        data = {
+            "position": {"position": "Python Developer"},
+            "resumes": [{"name": "test.pdf", "content": "Python developer"}],
+            "callback_url": "ftp://example.com/hook",
+        }
+        response = Client().post('/api/screening/', data=json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BackgroundJob.objects.exists())
@@ -1,8 +1,11 @@
 """
 视频分析模块的测试。
 """
+from unittest import mock
+
 from django.test import TestCase, Client
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 
 from apps.video_analysis.models import VideoAnalysis
 from apps.video_analysis.services import VideoAnalysisService
@@ -75,6 +78,30 @@ class VideoAnalysisServiceTest(TestCase):
         self.assertEqual(updated.fraud_score, 0.2)
         self.assertEqual(updated.extraversion_score, 0.8)
         self.assertEqual(updated.status, 'completed')
+    
+    def test_failed_only_on_final_attempt(self):
+        """测试分析出错时只有队列的最后一次尝试才标记为失败，其余尝试回到等待中等待重试。"""
+        from apps.task_queue.models import BackgroundJob
+        from apps.task_queue.services import TaskQueueService
+        from apps.video_analysis.tasks import enqueue_video_analysis
+        
+        analysis = VideoAnalysis.objects.create(
+            video_name="test.mp4", candidate_name="赵六", position_applied="开发工程师"
+        )
+        job = enqueue_video_analysis(analysis)
+        BackgroundJob.objects.filter(id=job.id).update(max_attempts=2)
+        
+        with mock.patch.object(VideoAnalysisService, '_simulate_analysis', side_effect=RuntimeError("模型不可用")):
+            TaskQueueService.execute(TaskQueueService.claim_next('worker-a'))
+            analysis.refresh_from_db()
+            self.assertEqual(analysis.status, 'pending')
+            
+            BackgroundJob.objects.filter(id=job.id).update(run_after=timezone.now())
+            TaskQueueService.execute(TaskQueueService.claim_next('worker-a'))
+        
+        analysis.refresh_from_db()
+        self.assertEqual(analysis.status, 'failed')
+        self.assertEqual(analysis.error_message, "模型不可用")
 
 
 class VideoAnalysisAPITest(TestCase):
@@ -109,3 +136,57 @@ class VideoAnalysisAPITest(TestCase):
         response = self.client.get('/api/videos/00000000-0000-0000-0000-000000000000/status/')
         
         self.assertEqual(response.status_code, 404)
+
+
+class VideoAnalysisLongPollTest(TestCase):
+    """视频分析状态接口长轮询的测试。"""
+    
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.analysis = VideoAnalysis.objects.create(
+            video_name="test.mp4", candidate_name="张三", position_applied="开发", status='processing'
+        )
+        self.url = f'/api/videos/{self.analysis.id}/status/'
+    
+    async def test_wait_returns_after_status_change(self):
+        """测试版本号未变化时等待，分析完成后返回新状态和版本号。"""
+        import asyncio
+        import json
+        from unittest import mock
+        from django.test import AsyncClient
+        from apps.common.progress import TaskProgressStore
+        from apps.video_analysis.tasks import publish_progress
+        
+        async def complete():
+            await asyncio.sleep(0.05)
+            self.analysis.status = 'completed'
+            await VideoAnalysis.objects.filter(id=self.analysis.id).aupdate(status='completed')
+            publish_progress(self.analysis)
+        
+        completing = asyncio.ensure_future(complete())
+        with mock.patch.object(TaskProgressStore, 'POLL_INTERVAL', 0.01):
+            response = await AsyncClient().get(self.url, {'since_version': 0, 'wait': 5})
+            body = b''.join([chunk async for chunk in response.streaming_content])
+        await completing
+        
+        data = json.loads(body)['data']
+        self.assertEqual(data['status'], 'completed')
+        self.assertEqual(data['version'], 1)
+    
+    def test_returns_immediately_without_wait_or_when_version_changed(self):
+        """测试未传 wait、版本号已变化或分析已结束时立即返回。"""
+        from apps.video_analysis.tasks import publish_progress
+        
+        client = Client()
+        self.assertEqual(client.get(self.url).json()['data']['version'], 0)
+        
+        publish_progress(self.analysis)
+        response = client.get(self.url, {'since_version': 0, 'wait': 30})
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.json()['data']['version'], 1)
+        
+        VideoAnalysis.objects.filter(id=self.analysis.id).update(status='failed')
+        response = client.get(self.url, {'since_version': 1, 'wait': 30})
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.json()['data']['status'], 'failed')